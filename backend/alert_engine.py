@@ -0,0 +1,281 @@
+"""
+Threshold / crossing alerts on the realtime cache.
+
+Rules are short expressions over one cache key:
+    us_10_2_spread < 0          threshold: fires when the condition starts to hold
+    vix > 30
+    usd_krw change% > 1         fields: value (default), change, change% / percent
+    us_10y crosses above 4.5    crossing: fires when consecutive values straddle the
+    dxy crosses 100             threshold (above, below, or either way)
+Compiled rules are indexed by key, so safe_update_cache hands the engine only
+the keys that changed and each update costs one dict lookup per changed key
+plus the rules on it, however many rules are registered.
+
+A rule re-arms once its condition stops holding; a rule that fired less than
+its debounce window ago (ALERT_DEBOUNCE_SEC) is suppressed, so a value
+flapping around a threshold doesn't flood the sinks. Alerts go to pluggable
+sinks (deliver(alert)): SseSink fans them out to /api/alerts/stream clients,
+WebhookSink POSTs them to ALERT_WEBHOOK_URL from a background thread.
+"""
+import asyncio
+import itertools
+import json
+import operator
+import os
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import requests
+
+from quotes import Quote
+
+ALERT_DEBOUNCE_SEC = float(os.getenv("ALERT_DEBOUNCE_SEC", "300"))
+ALERT_MAX_RULES = int(os.getenv("ALERT_MAX_RULES", "200"))
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+# Rules registered at startup, separated by ';' (e.g. "us_10_2_spread < 0; vix > 30")
+ALERT_RULES = os.getenv("ALERT_RULES", "")
+
+RULE_PATTERN = re.compile(
+    r"^\s*(?P<key>[A-Za-z0-9_]+)\s*(?P<field>value|change%|change|percent)?\s*"
+    r"(?P<op><=|>=|<|>|crosses\s+above|crosses\s+below|crosses)\s*"
+    r"(?P<threshold>[-+]?\d+(?:\.\d+)?)\s*$"
+)
+FIELDS = {None: "value", "value": "value", "change": "change", "change%": "percent", "percent": "percent"}
+THRESHOLD_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+@dataclass(slots=True)
+class Rule:
+    """A compiled rule plus its evaluation state."""
+
+    id: str
+    text: str
+    key: str
+    field: str                      # Quote attribute: value, change or percent
+    op: str                         # a THRESHOLD_OPS key, or crosses / crosses above / crosses below
+    threshold: float
+    sinks: tuple = ("sse",)
+    debounce: float = ALERT_DEBOUNCE_SEC
+    holding: bool = False           # threshold rules: condition held at the last evaluation
+    last: float | None = None       # field value at the last evaluation
+    last_fired: float | None = None
+    fired: int = 0
+
+    def to_dict(self):
+        return {
+            "id": self.id, "rule": self.text, "sinks": list(self.sinks), "debounce_sec": self.debounce,
+            "last": self.last, "fired": self.fired, "last_fired": self.last_fired,
+        }
+
+
+def compile_rule(text, rule_id, sinks=("sse",), debounce=ALERT_DEBOUNCE_SEC):
+    """'vix > 30' -> Rule (ValueError if it doesn't parse)."""
+    match = RULE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"cannot parse rule {text!r} (expected e.g. 'vix > 30', 'usd_krw change% > 1')")
+    op = " ".join(match["op"].split())
+    normalized = " ".join(filter(None, [match["key"], match["field"], op, match["threshold"]]))
+    return Rule(rule_id, normalized, match["key"], FIELDS[match["field"]], op, float(match["threshold"]),
+                tuple(sinks), debounce)
+
+
+def _triggered(rule, value):
+    """Whether `value` fires the rule (updates the threshold state; the caller updates rule.last)."""
+    if rule.op in THRESHOLD_OPS:
+        holding = THRESHOLD_OPS[rule.op](value, rule.threshold)
+        fired = holding and not rule.holding
+        rule.holding = holding
+        return fired
+    previous = rule.last
+    if previous is None:
+        return False
+    above = previous < rule.threshold <= value
+    below = previous > rule.threshold >= value
+    return {"crosses": above or below, "crosses above": above, "crosses below": below}[rule.op]
+
+
+class AlertEngine:
+    """Rules indexed by cache key, evaluated against each update's changed keys."""
+
+    def __init__(self, sinks=None, max_rules=ALERT_MAX_RULES):
+        self.sinks = {sink.name: sink for sink in sinks or []}
+        self.max_rules = max_rules
+        self._lock = threading.Lock()
+        self._rules = {}
+        self._by_key = defaultdict(list)
+        self._ids = itertools.count(1)
+        self.counts = {"updates": 0, "evaluated": 0, "fired": 0, "debounced": 0}
+
+    def add(self, text, sinks=("sse",), debounce=ALERT_DEBOUNCE_SEC):
+        """Compiles and registers a rule; returns it."""
+        unknown = [s for s in sinks if s not in self.sinks]
+        if unknown:
+            raise ValueError(f"unknown sinks {unknown} (available: {sorted(self.sinks)})")
+        with self._lock:
+            if len(self._rules) >= self.max_rules:
+                raise ValueError(f"rule limit reached ({self.max_rules})")
+            rule = compile_rule(text, f"r{next(self._ids)}", sinks, debounce)
+            self._rules[rule.id] = rule
+            self._by_key[rule.key].append(rule)
+            return rule
+
+    def remove(self, rule_id):
+        """Unregisters a rule; False if there was none with that id."""
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            self._by_key[rule.key].remove(rule)
+            if not self._by_key[rule.key]:
+                del self._by_key[rule.key]
+            return True
+
+    def rules(self):
+        with self._lock:
+            return [rule.to_dict() for rule in self._rules.values()]
+
+    def evaluate(self, category, changes, now=None):
+        """Runs the rules on the changed keys of one cache update, delivers what fired and returns it."""
+        now = time.time() if now is None else now
+        fired = []
+        with self._lock:
+            self.counts["updates"] += 1
+            for key, quote in changes.items():
+                rules = self._by_key.get(key)
+                if not rules or not isinstance(quote, Quote):
+                    continue
+                for rule in rules:
+                    value = getattr(quote, rule.field)
+                    if value is None:
+                        continue
+                    self.counts["evaluated"] += 1
+                    previous = rule.last
+                    triggered = _triggered(rule, value)
+                    rule.last = value
+                    if not triggered:
+                        continue
+                    if rule.last_fired is not None and now - rule.last_fired < rule.debounce:
+                        self.counts["debounced"] += 1
+                        continue
+                    rule.last_fired = now
+                    rule.fired += 1
+                    self.counts["fired"] += 1
+                    fired.append((rule.sinks, {
+                        "rule_id": rule.id, "rule": rule.text, "category": category, "key": key,
+                        "field": rule.field, "value": value, "previous": previous,
+                        "threshold": rule.threshold, "ts": now,
+                    }))
+        for sinks, alert in fired:
+            for name in sinks:
+                try:
+                    self.sinks[name].deliver(alert)
+                except Exception as e:
+                    print(f"[Alerts] {name} sink failed: {e}")
+        return [alert for _, alert in fired]
+
+    def report(self):
+        """Rule count, evaluations and deliveries, for /api/jobs."""
+        with self._lock:
+            result = {"rules": len(self._rules), "keys": len(self._by_key), **self.counts}
+        result["sinks"] = {name: sink.report() for name, sink in self.sinks.items()}
+        return result
+
+
+class SseSink:
+    """Fans alerts out to server-sent-event subscribers, each with a bounded queue (oldest dropped)."""
+
+    name = "sse"
+
+    def __init__(self, max_queue=100, keepalive_sec=15):
+        self.max_queue = max_queue
+        self.keepalive_sec = keepalive_sec
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self.counts = {"delivered": 0, "dropped": 0}
+
+    def deliver(self, alert):
+        message = f"event: alert\ndata: {json.dumps(alert)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, pending in subscribers:
+            # Jobs run on scheduler threads; the queues belong to the server's event loop
+            loop.call_soon_threadsafe(self._put, pending, message)
+
+    def _put(self, pending, message):
+        if pending.full():
+            pending.get_nowait()
+            self.counts["dropped"] += 1
+        pending.put_nowait(message)
+        self.counts["delivered"] += 1
+
+    async def stream(self):
+        """Async generator of SSE messages for one client (a comment line every keepalive_sec)."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.max_queue))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), self.keepalive_sec)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def report(self):
+        with self._lock:
+            return {"subscribers": len(self._subscribers), **self.counts}
+
+
+class WebhookSink:
+    """POSTs each alert as JSON to `url` from a background thread, so jobs never wait on the receiver."""
+
+    name = "webhook"
+
+    def __init__(self, url=ALERT_WEBHOOK_URL, timeout=5, max_queue=1000):
+        self.url = url
+        self.timeout = timeout
+        self._pending = queue.Queue(max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.counts = {"sent": 0, "failed": 0, "dropped": 0}
+
+    def deliver(self, alert):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._send_loop, name="alert-webhook", daemon=True)
+                self._thread.start()
+        try:
+            self._pending.put_nowait(alert)
+        except queue.Full:
+            self.counts["dropped"] += 1
+
+    def _send_loop(self):
+        while True:
+            alert = self._pending.get()
+            try:
+                requests.post(self.url, json=alert, timeout=self.timeout).raise_for_status()
+                self.counts["sent"] += 1
+            except requests.RequestException as e:
+                self.counts["failed"] += 1
+                print(f"[Alerts] Webhook delivery failed: {e}")
+            finally:
+                self._pending.task_done()
+
+    def flush(self, timeout=None):
+        """Waits until every queued alert has been attempted (tests, shutdown)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def report(self):
+        return {"queued": self._pending.qsize(), **self.counts}
@@ -0,0 +1,25 @@
+"""
+Collector process for multi-worker deployments.
+Runs the scheduler pipeline once and publishes every cache change to the
+shared store; it serves no HTTP. Pair it with any number of API workers:
+
+    python backend/collector.py
+    APP_ROLE=api WEB_CONCURRENCY=4 PROD=true python backend/main.py
+"""
+import os
+import time
+
+os.environ["APP_ROLE"] = "collector"
+
+import main
+
+if __name__ == "__main__":
+    main.start_scheduler()
+    print(f"[Collector] Publishing to {main.shared_store.path}")
+    try:
+        while True:
+            time.sleep(3600)
+    except (KeyboardInterrupt, SystemExit):
+        main.scheduler.shutdown()
+        # Write out what the last jobs left pending
+        main.durable_cache.close()
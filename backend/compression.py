@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import json
+import re
+
+from fastapi import Response
+from fastapi.staticfiles import StaticFiles
+
+from quotes import to_wire
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing (same default as Starlette's GZipMiddleware)
+MIN_COMPRESS_SIZE = 500
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class EncodedAsset:
+    """A response body with its gzip/brotli variants and ETag, computed once."""
+
+    __slots__ = ("body", "content_type", "cache_control", "etag", "variants")
+
+    def __init__(self, body, content_type, cache_control=REVALIDATE):
+        self.body = body
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        self.variants = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            # mtime=0 keeps the gzip bytes (and so the benchmarks) deterministic
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=11)
+
+
+def accepted_encodings(accept_encoding):
+    """Parses Accept-Encoding into the set of codings with q > 0."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q=([\d.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+# One entity-tag of an If-None-Match list: optionally weak (W/), always quoted
+ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match against our (strong) ETag: '*', or any listed tag, compared weakly (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in ENTITY_TAG.findall(if_none_match)
+
+
+def asset_response(asset, request):
+    """Serves the best pre-encoded variant for the request, or 304 if the ETag matches."""
+    headers = {
+        "ETag": asset.etag,
+        "Cache-Control": asset.cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=304, headers=headers)
+
+    accepted = accepted_encodings(request.headers.get("accept-encoding"))
+    for coding in ("br", "gzip"):
+        if coding in accepted and coding in asset.variants:
+            headers["Content-Encoding"] = coding
+            return Response(asset.variants[coding], media_type=asset.content_type, headers=headers)
+    return Response(asset.body, media_type=asset.content_type, headers=headers)
+
+
+def encode_json(data):
+    # Same encoding settings as Starlette's JSONResponse; model objects are formatted here, once per version
+    return json.dumps(
+        data, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=to_wire
+    ).encode("utf-8")
+
+
+class PayloadCache:
+    """
+    Serialized + compressed payloads per cache category (and wire format),
+    rebuilt only when the category's version changes instead of on every request.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, category, version, data, encoder=encode_json, media_type="application/json"):
+        key = (category, media_type)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            entry = (version, EncodedAsset(encoder(data), media_type))
+            self._entries[key] = entry
+        return entry[1]
+
+
+INLINE_STYLE = re.compile(r"<style>(.*?)</style>", re.S)
+INLINE_SCRIPT = re.compile(r"<script>(.*?)</script>", re.S)
+
+
+def build_index_assets(index_path):
+    """
+    Static pipeline for index.html, run once at startup: moves the inline <style>
+    and <script> blocks into content-hashed /assets/ files (cached forever) and
+    returns { url_path: EncodedAsset } including the rewritten, revalidated page.
+    """
+    with open(index_path, encoding="utf-8") as f:
+        html = f.read()
+
+    assets = {}
+
+    def extract(pattern, ext, content_type, tag):
+        nonlocal html
+        match = pattern.search(html)
+        if not match:
+            return
+        body = match.group(1).encode("utf-8")
+        path = f"/assets/app.{hashlib.sha256(body).hexdigest()[:12]}.{ext}"
+        assets[path] = EncodedAsset(body, content_type, IMMUTABLE)
+        html = html[:match.start()] + tag.format(path=path) + html[match.end():]
+
+    extract(INLINE_STYLE, "css", "text/css; charset=utf-8", '<link rel="stylesheet" href="{path}">')
+    extract(INLINE_SCRIPT, "js", "application/javascript; charset=utf-8", '<script src="{path}"></script>')
+
+    page = EncodedAsset(html.encode("utf-8"), "text/html; charset=utf-8", REVALIDATE)
+    assets["/"] = page
+    assets["/index.html"] = page
+    return assets
+
+
+# Never served by the static mount (its root is the repo): runtime state lives under data/
+# (SQLite stores, series and snapshot files), and dotfiles include .env and .git
+PRIVATE_DIRS = {"data"}
+
+
+class PublicFiles(StaticFiles):
+    """StaticFiles that answers 404 for any path through a PRIVATE_DIRS directory or a dotfile."""
+
+    def lookup_path(self, path):
+        parts = path.replace("\\", "/").split("/")
+        if any(part in PRIVATE_DIRS or (part.startswith(".") and part != ".") for part in parts):
+            return "", None
+        return super().lookup_path(path)
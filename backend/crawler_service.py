@@ -1,23 +1,64 @@
 import requests
 from bs4 import BeautifulSoup
 import fear_and_greed
+import requests_cache
 import random
 import time
-from datetime import datetime
-
-# User-Agent list to rotate
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-]
+import os
+import re
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from quotes import Quote, Observation, Release, with_change
+from numeric_parser import parse_number, parse_float
+from crawler_transport import TRANSPORT, HEADERS
+import source_adapters
+
+# fear_and_greed installs a process-wide 1-minute requests_cache on import.
+# Load tests turn it off so every scheduled fetch reaches the (stand-in) upstream.
+if os.getenv("DISABLE_REQUESTS_CACHE", "false").lower() == "true":
+    requests_cache.uninstall_cache()
+
+# Browser User-Agent (also used for the few direct requests below)
+USER_AGENTS = [HEADERS["User-Agent"]]
+
+# NY Fed reference rate API (module-level so benchmarks can point it at a local stand-in)
+NY_FED_SOFR_URL = "https://markets.newyorkfed.org/api/rates/secured/sofr/search.json"
+
+# Investing.com economic calendar listing (XHR endpoint behind the calendar page's filters)
+INVESTING_CALENDAR_DATA_URL = "https://kr.investing.com/economic-calendar/Service/getCalendarFilteredData"
+CALENDAR_COUNTRIES = ["5", "35", "11"]  # United States, Japan, South Korea
+# Window covers the longest gap between tracked releases (8 policy meetings a year) on both sides
+CALENDAR_DAYS_BACK = 75
+CALENDAR_DAYS_AHEAD = 75
+CALENDAR_MAX_PAGES = 10
+
+def upstream_url(url):
+    """
+    Redirects an upstream URL to the local stand-in server when UPSTREAM_BASE_URL
+    is set (load testing): https://host/path?q -> {UPSTREAM_BASE_URL}/host/path?q
+    """
+    base = os.getenv("UPSTREAM_BASE_URL")
+    if not base:
+        return url
+    parts = urlsplit(url)
+    redirected = f"{base.rstrip('/')}/{parts.netloc}{parts.path}"
+    if parts.query:
+        redirected += f"?{parts.query}"
+    return redirected
+
+def _fetch_fear_greed_json():
+    """fear_and_greed fetcher that honours UPSTREAM_BASE_URL."""
+    resp = requests.get(upstream_url(fear_and_greed.cnn.URL), headers={"User-Agent": random.choice(USER_AGENTS)}, timeout=10)
+    resp.raise_for_status()
+    return resp.json()
 
 def get_fear_greed_index():
     """
     Fetches Fear and Greed Index using 'fear-and-greed' library.
     """
     try:
-        index_data = fear_and_greed.get()
+        fetcher = _fetch_fear_greed_json if os.getenv("UPSTREAM_BASE_URL") else None
+        index_data = fear_and_greed.get(fetcher)
         return {
             "value": str(int(index_data.value)),
             "description": index_data.description,
@@ -27,15 +68,49 @@ def get_fear_greed_index():
         print(f"[Crawler] Error fetching Fear & Greed: {e}")
         return None
 
+def fetch_via_adapters(source, url, name="Asset"):
+    """
+    Tries the source's JSON adapters (source_adapters.py) for the quote page at
+    `url`. Returns a Quote, or None to fall back to the HTML scraper.
+    """
+    for adapter in source_adapters.adapters_for(source):
+        if not adapter.available(url):
+            continue
+        req = adapter.request(url)
+        if req is None:
+            continue
+        method, api_url, kwargs = req
+        try:
+            response = TRANSPORT.request(method, upstream_url(api_url), timeout=5, **kwargs)
+            quote = adapter.parse(url, response.content) if response.status_code == 200 else None
+        except Exception as e:
+            print(f"[Crawler] {adapter.name} error for {name}: {e}")
+            quote = None
+        if quote is not None:
+            adapter.succeeded(url)
+            return quote
+        print(f"[Crawler] {adapter.name} had no quote for {name}, using the HTML page")
+        adapter.failed(url)
+    return None
+
+def learn_from_page(source, url, html, quote):
+    """Lets the source's adapters pick up what they need from a scraped page."""
+    if quote is None:
+        return
+    for adapter in source_adapters.adapters_for(source):
+        adapter.learn(url, html, quote)
+
 def fetch_investing_price(url, name="Asset"):
     """
     Crawls Investing.com page to get the main price/yield.
     Targeting 'instrument-price-last' or modern class selectors.
     """
+    quote = fetch_via_adapters("investing", url, name)
+    if quote is not None:
+        return quote
+
     headers = {
-        "User-Agent": random.choice(USER_AGENTS),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
         "Referer": "https://www.google.com/",
         "Upgrade-Insecure-Requests": "1",
         "Sec-Fetch-Dest": "document",
@@ -45,54 +120,61 @@ def fetch_investing_price(url, name="Asset"):
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=5) # Reduced timeout to 5s
+        response = TRANSPORT.get(upstream_url(url), headers=headers, timeout=5) # Reduced timeout to 5s
         if response.status_code != 200:
             print(f"[Crawler] Failed to fetch {name}: Status {response.status_code}")
             return None
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Strategy 1: data-test attribute (Most reliable for legacy/desktop pages)
-        price_el = soup.find(attrs={'data-test': 'instrument-price-last'})
-        change_el = soup.find(attrs={'data-test': 'instrument-price-change'})
-        percent_el = soup.find(attrs={'data-test': 'instrument-price-change-percent'})
-        
-        # Strategy 2: Specific classes for newer Investing.com layout
-        if not price_el:
-            # Look for huge text class usually found in header
-            # text-5xl/4xl font-bold ...
-            price_el = soup.find('div', class_=lambda x: x and 'text-5xl' in x and 'font-bold' in x)
-        
-        if price_el:
-            price = price_el.text.strip()
-            change = change_el.text.strip() if change_el else "0.00"
-            percent = percent_el.text.strip() if percent_el else "0.00%"
-            
-            # Clean up parenthesis in percent "(+0.5%)" -> "+0.5%"
-            percent = percent.replace('(', '').replace(')', '')
-
-            return {
-                "value": price,
-                "change": change,
-                "percent": percent
-            }
-        
-        print(f"[Crawler] Could not find price element for {name}")
-        return None
+
+        quote = parse_investing_price(response.text, name)
+        learn_from_page("investing", url, response.text, quote)
+        return quote
         
     except Exception as e:
         print(f"[Crawler] Error crawling {name}: {e}")
         return None
 
+def parse_investing_price(html, name="Asset"):
+    """
+    Parses an Investing.com quote page into a Quote (value, change, percent).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Strategy 1: data-test attribute (Most reliable for legacy/desktop pages)
+    price_el = soup.find(attrs={'data-test': 'instrument-price-last'})
+    change_el = soup.find(attrs={'data-test': 'instrument-price-change'})
+    percent_el = soup.find(attrs={'data-test': 'instrument-price-change-percent'})
+    
+    # Strategy 2: Specific classes for newer Investing.com layout
+    if not price_el:
+        # Look for huge text class usually found in header
+        # text-5xl/4xl font-bold ...
+        price_el = soup.find('div', class_=lambda x: x and 'text-5xl' in x and 'font-bold' in x)
+    
+    if price_el:
+        price = price_el.text.strip()
+        change = change_el.text.strip() if change_el else "0.00"
+        percent = percent_el.text.strip() if percent_el else "0.00%"
+        
+        # Clean up parenthesis in percent "(+0.5%)" -> "+0.5%"
+        percent = percent.replace('(', '').replace(')', '')
+
+        parsed = parse_number(price)
+        if parsed is None:
+            print(f"[Crawler] Unreadable price '{price}' for {name}")
+            return None
+        value, scale, unit, decimals = parsed
+        return Quote(value, parse_float(change), parse_float(percent), unit=unit, scale=scale, decimals=decimals)
+    
+    print(f"[Crawler] Could not find price element for {name}")
+    return None
+
 def fetch_investing_calendar_actual(url, event_id, name="Event"):
     """
     Crawls Investing.com Economic Calendar for a specific event's latest 'Actual' value.
     Table ID: 'eventHistoryTable{event_id}'
     """
     headers = {
-        "User-Agent": random.choice(USER_AGENTS),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
         "Referer": "https://www.google.com/",
         "Connection": "keep-alive",
         "Upgrade-Insecure-Requests": "1",
@@ -105,127 +187,235 @@ def fetch_investing_calendar_actual(url, event_id, name="Event"):
 
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = TRANSPORT.get(upstream_url(url), headers=headers, timeout=10)
 
         if response.status_code != 200:
             return None
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Look for the history table
-        table = soup.find('table', {'id': f'eventHistoryTable{event_id}'})
-        
-        if not table:
-             print(f"[Crawler] Calendar table not found for {name} (ID: {event_id})")
-             return None
-             
-        # Get tbody rows
-        tbody = table.find('tbody')
-        if not tbody: return None
-        
-        rows = tbody.find_all('tr')
-        if not rows: return None
-        
-        # Iterate rows
-        # Strategy: 
-        # 1. First row with NO Actual value -> Next Release Date (if date is valid)
-        # 2. First row WITH Actual value -> Current Release
-        
-        history = []
-        next_date_str = ""
-        
-        import re
-        
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) < 3: continue
-            
-            # Col 0: Date "2025년 12월 24일 (12월)"
-            # Col 2: Actual
-            raw_date = cols[0].text.strip()
-            actual_str = cols[2].text.strip()
-            
-            # Try parse date YYYY-MM-DD
-            parsed_date = ""
-            # Regex for "YYYY년 MM월 DD일"
-            match = re.search(r'(\d{4})년\s*(\d{1,2})월\s*(\d{1,2})일', raw_date)
-            if match:
-                y, m, d = match.groups()
-                parsed_date = f"{y}-{int(m):02d}-{int(d):02d}"
-            else:
-                # Fallback or specific format
-                parsed_date = raw_date
-            
-            # Check if this is a future/next event (No Actual Value)
-            # Ensure we only grab the *first* such row as the next date
-            is_empty_actual = (not actual_str or actual_str == '\xa0')
-            
-            if is_empty_actual:
-                if not next_date_str and parsed_date:
-                    next_date_str = parsed_date
-                continue
-            
-            # If has actual value, adds to history
-            history.append({
-                "date": parsed_date, # Use parsed clean date
-                "value_str": actual_str
-            })
-            if len(history) >= 2: break
-            
-        if not history: return None
-        
-        latest = history[0]
-        val_str = latest['value_str']
-        date_str = latest['date']
-        
-        change_str = "0.00"
-        pct_str = "0.00%"
-        
-        # Calculate Change if previous data exists
-        if len(history) >= 2:
-            prev = history[1]
-            
-            def parse_val(s):
-                # Remove common units
-                s = s.replace(',', '').replace('B', '').replace('M', '').replace('k', '').replace('%', '')
-                try:
-                    return float(s)
-                except:
-                    return None
-                    
-            curr_float = parse_val(val_str)
-            prev_float = parse_val(prev['value_str'])
-            
-            if curr_float is not None and prev_float is not None:
-                change = curr_float - prev_float
-                pct = (change / prev_float) * 100 if prev_float != 0 else 0
-                
-                sign = "+" if change >= 0 else ""
-                change_str = f"{sign}{change:,.2f}"
-                pct_str = f"{sign}{pct:,.2f}%"
-                
-        return {
-            "value": val_str,
-            "date": date_str,
-            "change": change_str, 
-            "percent": pct_str,
-            "next_date": next_date_str 
-        }
-            
-        return None
+
+        return parse_investing_calendar(response.text, event_id, name)
 
     except Exception as e:
         print(f"[Crawler] Error crawling calendar {name}: {e}")
         return None
 
+def parse_investing_calendar(html, event_id, name="Event"):
+    """
+    Parses the 'eventHistoryTable{event_id}' of an Investing.com calendar page
+    into an Observation of the latest release (change vs. the previous one).
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Look for the history table
+    table = soup.find('table', {'id': f'eventHistoryTable{event_id}'})
+    
+    if not table:
+         print(f"[Crawler] Calendar table not found for {name} (ID: {event_id})")
+         return None
+         
+    # Get tbody rows
+    tbody = table.find('tbody')
+    if not tbody: return None
+    
+    rows = tbody.find_all('tr')
+    if not rows: return None
+    
+    # Iterate rows
+    # Strategy: 
+    # 1. First row with NO Actual value -> Next Release Date (if date is valid)
+    # 2. First row WITH Actual value -> Current Release
+    
+    history = []
+    next_date_str = ""
+    
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) < 3: continue
+        
+        # Col 0: Date "2025년 12월 24일 (12월)"
+        # Col 2: Actual
+        raw_date = cols[0].text.strip()
+        actual_str = cols[2].text.strip()
+        
+        parsed_date = _calendar_date(raw_date)
+        
+        # Check if this is a future/next event (No Actual Value)
+        # Ensure we only grab the *first* such row as the next date
+        is_empty_actual = (not actual_str or actual_str == '\xa0')
+        
+        if is_empty_actual:
+            if not next_date_str and parsed_date:
+                next_date_str = parsed_date
+            continue
+        
+        # If has actual value, adds to history
+        history.append({
+            "date": parsed_date, # Use parsed clean date
+            "value_str": actual_str
+        })
+        if len(history) >= 2: break
+        
+    if not history: return None
+    
+    latest = history[0]
+    previous_str = history[1]['value_str'] if len(history) >= 2 else None
+    return _calendar_observation(latest['value_str'], previous_str, latest['date'], next_date_str, name)
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+def _calendar_date(raw_date):
+    """'2025년 12월 24일 (12월)' -> '2025-12-24' (other formats are returned as-is)."""
+    match = re.search(r'(\d{4})년\s*(\d{1,2})월\s*(\d{1,2})일', raw_date)
+    if not match:
+        return raw_date
+    y, m, d = match.groups()
+    return f"{y}-{int(m):02d}-{int(d):02d}"
+
+def fetch_investing_calendar_history(url, event_id, name="Event"):
+    """
+    Crawls an Investing.com event page and returns every row of its release
+    history table (see parse_investing_calendar_history), or None.
+    """
+    headers = {
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Referer": "https://www.google.com/",
+    }
+    try:
+        response = TRANSPORT.get(upstream_url(url), headers=headers, timeout=10)
+        if response.status_code != 200:
+            print(f"[Crawler] Failed to fetch calendar history {name}: Status {response.status_code}")
+            return None
+        return parse_investing_calendar_history(response.text, event_id)
+    except Exception as e:
+        print(f"[Crawler] Error crawling calendar history {name}: {e}")
+        return None
+
+def parse_investing_calendar_history(html, event_id):
+    """
+    Parses every row of 'eventHistoryTable{event_id}' into Releases (actual,
+    forecast, previous in base units), oldest first. Scheduled rows without an
+    Actual yet are kept with actual=None; rows whose date doesn't parse are skipped.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', {'id': f'eventHistoryTable{event_id}'})
+    if not table or not table.find('tbody'):
+        return []
+
+    releases = []
+    for row in table.find('tbody').find_all('tr'):
+        cols = row.find_all('td')
+        if len(cols) < 5:
+            continue
+        date = _calendar_date(cols[0].text.strip())
+        if not ISO_DATE.fullmatch(date):
+            # Not a date this parser knows; charting it would fail the whole series
+            continue
+        actual, forecast, previous = (parse_float(col.text.strip()) for col in cols[2:5])
+        releases.append(Release(date, actual, forecast, previous))
+    releases.reverse()  # The page lists the newest release first
+    return releases
+
+def _calendar_observation(actual_str, previous_str, date_str, next_date_str, name="Event"):
+    """Builds the Observation for a release from its Actual text and the previous release's."""
+    parsed = parse_number(actual_str)
+    if parsed is None:
+        print(f"[Crawler] Unreadable actual '{actual_str}' for {name}")
+        return None
+    value, scale, unit, decimals = parsed
+
+    # Change vs. the previous release (values are in base units, so 1.2M vs 850K compares correctly)
+    previous = parse_float(previous_str) if previous_str else None
+    if previous is None:
+        previous = value
+
+    return with_change(
+        Observation, value, previous,
+        unit=unit, scale=scale, decimals=decimals,
+        timestamp=date_str, next_date=next_date_str,
+    )
+
+def fetch_investing_calendar_bulk(event_ids, days_back=CALENDAR_DAYS_BACK, days_ahead=CALENDAR_DAYS_AHEAD):
+    """
+    Fetches the Investing.com economic calendar listing for a date range around
+    today (the same XHR endpoint the calendar page scrolls with) and parses every
+    tracked event out of it: one request instead of one page per event.
+    Returns { event_id: Observation }; events missing from the window are absent.
+    """
+    today = datetime.now().date()
+    form = [("country[]", c) for c in CALENDAR_COUNTRIES] + [
+        ("dateFrom", (today - timedelta(days=days_back)).isoformat()),
+        ("dateTo", (today + timedelta(days=days_ahead)).isoformat()),
+        ("currentTab", "custom"),
+        ("limit_from", "0"),
+    ]
+    headers = {
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+        "Referer": "https://kr.investing.com/economic-calendar/",
+        "X-Requested-With": "XMLHttpRequest",
+    }
+
+    rows_html = []
+    try:
+        for page in range(CALENDAR_MAX_PAGES):
+            form[-1] = ("limit_from", str(page))
+            response = TRANSPORT.post(upstream_url(INVESTING_CALENDAR_DATA_URL), data=form, headers=headers, timeout=10)
+            if response.status_code != 200:
+                print(f"[Crawler] Calendar listing failed: Status {response.status_code}")
+                return {}
+            payload = response.json()
+            rows_html.append(payload.get("data", ""))
+            # The listing is paged like the page's infinite scroll
+            if not payload.get("bind_scroll_handler"):
+                break
+    except Exception as e:
+        print(f"[Crawler] Error crawling calendar listing: {e}")
+        return {}
+
+    return parse_investing_calendar_listing("".join(rows_html), event_ids)
+
+def parse_investing_calendar_listing(html, event_ids):
+    """
+    Parses calendar listing rows (<tr event_attr_id=... data-event-datetime=...>,
+    oldest first) into { event_id: Observation } for the tracked event_ids,
+    with the same value/change/next_date semantics as parse_investing_calendar.
+    """
+    wanted = {str(e): e for e in event_ids}
+    releases = {}   # event_id -> [(date, actual, previous cell)]
+    upcoming = {}   # event_id -> [date] of rows without an Actual yet
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for row in soup.find_all('tr', attrs={'event_attr_id': True}):
+        event_id = wanted.get(row['event_attr_id'])
+        if event_id is None:
+            continue
+        date_str = row.get('data-event-datetime', '')[:10].replace('/', '-')
+        actual = row.find('td', class_='act')
+        if actual is None:
+            continue
+        actual_str = actual.text.strip()
+        if not actual_str:
+            upcoming.setdefault(event_id, []).append(date_str)
+            continue
+        previous = row.find('td', class_='prev')
+        releases.setdefault(event_id, []).append((date_str, actual_str, previous.text.strip() if previous else ""))
+
+    result = {}
+    for event_id, history in releases.items():
+        history.sort(key=lambda release: release[0])
+        date_str, actual_str, previous_cell = history[-1]
+        # Prefer the previous release's Actual (as the event page does); the Previous cell covers a 1-row window
+        previous_str = history[-2][1] if len(history) >= 2 else previous_cell
+        next_date_str = min((d for d in upcoming.get(event_id, []) if d > date_str), default="")
+        obs = _calendar_observation(actual_str, previous_str, date_str, next_date_str, f"event {event_id}")
+        if obs is not None:
+            result[event_id] = obs
+    return result
+
 def fetch_indexergo_data(url, name="IndexerGo"):
     """
     Crawls IndexerGo.com for specific index data (e.g. High Yield Spread).
     """
     headers = {
-        "User-Agent": random.choice(USER_AGENTS),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
         "Referer": "https://www.google.com/",
         "Connection": "keep-alive",
         "Upgrade-Insecure-Requests": "1"
@@ -233,250 +423,232 @@ def fetch_indexergo_data(url, name="IndexerGo"):
 
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = TRANSPORT.get(upstream_url(url), headers=headers, timeout=10)
         if response.status_code != 200:
             print(f"[Crawler] Failed to fetch {name}: Status {response.status_code}")
             return None
             
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Method 1: Try Table Row (More structured)
-        tables = soup.find_all('table')
-        if tables:
-            # Assuming first table is the data table
-            # Rows: Header is usually row 0. Data starts row 1.
-            rows = tables[0].find_all('tr')
-            if len(rows) > 1:
-                row = rows[1] 
-                cols = row.find_all(['td', 'th'])
-                
-                # output: Match verified via test_indexergo.py
-                # Cell 0 (th): Date
-                # Cell 1 (td): Value (3.08)
-                # Cell 2 (td): Change \n Percent (+ 0.16 ...)
-                
-                if len(cols) >= 3:
-                    date_str = cols[0].text.strip()
-                    val_str = cols[1].text.strip()
-                    
-                    # Col 2 has Change AND Percent separated by whitespace/newlines
-                    # Text is like "+            0.16 \n 5.48%"
-                    # We must remove inner spaces to keep "+0.16" as one token
-                    combined_text = cols[2].text.strip().replace(' ', '')
-                    # Now it looks like "+0.16\n5.48%"
-                    
-                    raw_col2 = combined_text.split()
-                    
-                    change_str = "-"
-                    pct_str = "-"
-                    
-                    if len(raw_col2) >= 1:
-                        change_str = raw_col2[0] # +0.16
-                    if len(raw_col2) >= 2:
-                        pct_str = raw_col2[1] # 5.48% (includes %)
-                        
-                    # Remove % from pct_str if UI adds it? 
-                    # UI updateUI logic: `if (rawPct) disp += ` (${formatNumber(rawPct)}%)`;`
-                    # formatNumber handles float.
-                    # IndexerGo returns "5.48%". 
-                    # If I send "5.48%", formatNumber("5.48%") might fail or result `NaN`.
-                    # backend should probably send raw float if possible, or clean string.
-                    # Let's clean '%' out of pct_str for safety, or ensure UI handles it.
-                    # UI code: `!String(txt).includes('%')` logic exists for VALUE.
-                    # For Change/Pct: `rawPct` is used in `formatNumber`.
-                    pct_str = pct_str.replace('%', '')
-
-                    if val_str:
-                         return {
-                             "value": val_str,
-                             "date": date_str,
-                             "change": change_str,
-                             "percent": pct_str
-                         }
-                elif len(cols) >= 2:
-                     # Fallback if change columns missing
-                    date_str = cols[0].text.strip()
-                    val_str = cols[1].text.strip()
-                    if val_str:
-                         return {
-                             "value": val_str,
-                             "date": date_str,
-                             "change": "-",
-                             "percent": "-"
-                         }
-
-        if "(" in title and "%)" in title:
-            # Extract "3.08" from "(3.08%)"
-            import re
-            match = re.search(r'\(([\d\.]+)', title)
-            if match:
-                return {
-                    "value": match.group(1),
-                    "change": "-",
-                    "percent": "-"
-                }
-                
-        return None
+        return parse_indexergo(response.text, name)
 
     except Exception as e:
         print(f"[Crawler] Error crawling IndexerGo {name}: {e}")
         return None
 
+def parse_indexergo(html, name="IndexerGo"):
+    """
+    Parses the first data row of an IndexerGo series table into a dated Quote.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Method 1: Try Table Row (More structured)
+    tables = soup.find_all('table')
+    if tables:
+        # Assuming first table is the data table
+        # Rows: Header is usually row 0. Data starts row 1.
+        rows = tables[0].find_all('tr')
+        if len(rows) > 1:
+            row = rows[1] 
+            cols = row.find_all(['td', 'th'])
+            
+            # output: Match verified via test_indexergo.py
+            # Cell 0 (th): Date
+            # Cell 1 (td): Value (3.08)
+            # Cell 2 (td): Change \n Percent (+ 0.16 ...)
+            
+            if len(cols) >= 3:
+                date_str = cols[0].text.strip()
+                val_str = cols[1].text.strip()
+                
+                # Col 2 has Change AND Percent separated by whitespace/newlines
+                # Text is like "+            0.16 \n 5.48%"
+                # We must remove inner spaces to keep "+0.16" as one token
+                combined_text = cols[2].text.strip().replace(' ', '')
+                # Now it looks like "+0.16\n5.48%"
+                
+                raw_col2 = combined_text.split()
+                
+                change_str = "-"
+                pct_str = "-"
+                
+                if len(raw_col2) >= 1:
+                    change_str = raw_col2[0] # +0.16
+                if len(raw_col2) >= 2:
+                    pct_str = raw_col2[1] # 5.48% (includes %)
+                    
+                parsed = parse_number(val_str)
+                if parsed:
+                    value, scale, unit, decimals = parsed
+                    return Quote(
+                        value, parse_float(change_str), parse_float(pct_str),
+                        unit=unit, scale=scale, decimals=decimals, timestamp=date_str,
+                    )
+            elif len(cols) >= 2:
+                 # Fallback if change columns missing
+                date_str = cols[0].text.strip()
+                parsed = parse_number(cols[1].text)
+                if parsed:
+                    value, scale, unit, decimals = parsed
+                    return Quote(value, unit=unit, scale=scale, decimals=decimals, timestamp=date_str)
+
+    # Method 2: Page title fallback, e.g. "... (3.08%)"
+    title = soup.title.text if soup.title else ""
+    if "(" in title and "%)" in title:
+        # Extract "3.08" from "(3.08%)"
+        match = re.search(r'\(([\d\.]+)', title)
+        if match:
+            value = parse_float(match.group(1))
+            if value is not None:
+                return Quote(value)
+            
+    return None
+
 def fetch_ny_fed_sofr():
     """
     Fetches SOFR rate and calculates change from NY Fed API.
     URL: https://markets.newyorkfed.org/api/rates/secured/sofr/search.json
     """
-    from datetime import datetime, timedelta
-    
     end_date = datetime.now()
     start_date = end_date - timedelta(days=7)
     start_str = start_date.strftime("%Y-%m-%d")
     end_str = end_date.strftime("%Y-%m-%d")
 
-    url = f"https://markets.newyorkfed.org/api/rates/secured/sofr/search.json?startDate={start_str}&endDate={end_str}&type=sofr"
+    url = f"{NY_FED_SOFR_URL}?startDate={start_str}&endDate={end_str}&type=sofr"
     
     try:
-        resp = requests.get(url, timeout=10)
+        resp = TRANSPORT.get(upstream_url(url), timeout=10)
         if resp.status_code != 200:
             print(f"[Crawler] NY Fed API failed: {resp.status_code}")
             return None
             
-        data = resp.json()
-        ref_rates = data.get('refRates', [])
-        
-        # Ensure sorted by date descending just in case
-        ref_rates.sort(key=lambda x: x['effectiveDate'], reverse=True)
-        
-        # Filter strictly for 'SOFR' type if API returns mixed (though type=sofr param should filter)
-        sofr_rates = [r for r in ref_rates if r.get('type') == 'SOFR']
-        
-        if not sofr_rates:
-            print("[Crawler] No SOFR data found in response")
-            return None
-            
-        latest = sofr_rates[0]
-        val = latest.get('percentRate')
-        date_str = latest.get('effectiveDate')
-        
-        change_str = "0.00"
-        pct_str = "0.00%"
-        
-        if len(sofr_rates) > 1:
-            prev = sofr_rates[1]
-            prev_val = prev.get('percentRate')
-            
-            if val is not None and prev_val is not None:
-                 change = val - prev_val
-                 pct = (change / prev_val) * 100 if prev_val != 0 else 0
-                 
-                 sign = "+" if change >= 0 else ""
-                 change_str = f"{sign}{change:,.2f}"
-                 pct_str = f"{sign}{pct:,.2f}%"
-        
-        if val is not None:
-             # NY Fed Value is percentage (3.66 means 3.66%)
-             return {
-                 "value": f"{val:.2f}%",
-                 "date": date_str,
-                 "change": change_str,
-                 "percent": pct_str
-             }
-        
-        return None
+        return parse_ny_fed_sofr(resp.json())
 
     except Exception as e:
         print(f"[Crawler] Error fetching NY Fed SOFR: {e}")
         return None
 
+def parse_ny_fed_sofr(data):
+    """
+    Parses a NY Fed SOFR search.json payload into the latest rate and
+    its change versus the previous business day.
+    """
+    ref_rates = data.get('refRates', [])
+    
+    # Ensure sorted by date descending just in case
+    ref_rates.sort(key=lambda x: x['effectiveDate'], reverse=True)
+    
+    # Filter strictly for 'SOFR' type if API returns mixed (though type=sofr param should filter)
+    sofr_rates = [r for r in ref_rates if r.get('type') == 'SOFR']
+    
+    if not sofr_rates:
+        print("[Crawler] No SOFR data found in response")
+        return None
+        
+    latest = sofr_rates[0]
+    val = latest.get('percentRate')
+    date_str = latest.get('effectiveDate')
+    
+    if val is None:
+        return None
+
+    prev_val = sofr_rates[1].get('percentRate') if len(sofr_rates) > 1 else None
+    # NY Fed Value is percentage (3.66 means 3.66%)
+    return with_change(Quote, val, prev_val if prev_val is not None else val, unit="%", timestamp=date_str)
+
 def fetch_google_finance(url, name="Asset"):
     """
     Crawls Google Finance for Price, Change, Percent.
     URL: https://www.google.com/finance/quote/RUT:INDEXRUSSELL?hl=ko
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-    
+    quote = fetch_via_adapters("google_finance", url, name)
+    if quote is not None:
+        return quote
+
     try:
-        resp = requests.get(url, headers=headers, timeout=5)
+        resp = TRANSPORT.get(upstream_url(url), timeout=5)
         if resp.status_code != 200:
             print(f"[Crawler] Google Finance failed {name}: {resp.status_code}")
             return None
             
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        # 1. Price
-        # Class 'YMlKec fxKbKc' is the standard large price class in Google Finance
-        price_el = soup.find(class_="YMlKec fxKbKc")
-        if not price_el:
-            print(f"[Crawler] Google Finance Price not found for {name}")
-            return None
-            
-        price_str = price_el.text.strip()
-        
-        # 2. Change & Percent
-        # Strategy: Go up to the main container and look for change classes
-        # The main header block usually contains the price and the change badge
-        container = price_el.parent
-        # Traverse up 2-3 levels to find the block containing both Price and Change
-        # Usually Price is in a div, Change is in a sibling div or span
-        # Typical classes for Change: 'P2Luy' (Green), 'NDrR4' (Red), 'BAftM' (Grey/Zero)
-        
-        change_str = "-"
-        pct_str = "-"
-        
-        # Strategy: Go up to the header container and search for change classes
-        # Based on debug output, the header block is about 6-7 levels up?
-        # Let's go up 6 levels and search downwards for known Google Finance change classes.
-        # Classes: 'P2Luy' (Green), 'NDrR4' (Red), 'BAftM' (Grey)
-        
-        found_block = None
-        curr = price_el
-        
-        target_container = None
-        # Go up 6 levels to find a common container
-        for _ in range(6):
-            if curr.parent:
-                curr = curr.parent
-        target_container = curr
-        
-        if target_container:
-            cands = target_container.find_all(class_=["P2Luy", "NDrR4", "BAftM"])
-            
-            # Filter candidates that are essentially numeric
-            numeric_cands = []
-            for c in cands:
-                t = c.text.strip()
-                # Must contain digits
-                if any(k.isdigit() for k in t):
-                    numeric_cands.append(t)
-            
-            # Usually we find [ChangeValue, PercentValue] or sometimes doubled.
-            # We need to distinguish Value from Percent.
-            val_c = None
-            pct_c = None
-            
-            # Heuristic: Percent has '%', Value usually doesn't (or we prioritize %)
-            for t in numeric_cands:
-                if '%' in t:
-                     if not pct_c: pct_c = t
-                else:
-                     if not val_c: val_c = t
-            
-            if val_c: change_str = val_c
-            if pct_c: pct_str = pct_c
-            
-        return {
-            "value": price_str,
-            "change": change_str,
-            "percent": pct_str
-        }
+        return parse_google_finance(resp.text, name)
 
     except Exception as e:
         print(f"[Crawler] Error Google Finance {name}: {e}")
         return None
 
+def parse_google_finance(html, name="Asset"):
+    """
+    Parses a Google Finance quote page into a Quote.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # 1. Price
+    # Class 'YMlKec fxKbKc' is the standard large price class in Google Finance
+    price_el = soup.find(class_="YMlKec fxKbKc")
+    if not price_el:
+        print(f"[Crawler] Google Finance Price not found for {name}")
+        return None
+        
+    price_str = price_el.text.strip()
+    
+    # 2. Change & Percent
+    # Strategy: Go up to the main container and look for change classes
+    # The main header block usually contains the price and the change badge
+    container = price_el.parent
+    # Traverse up 2-3 levels to find the block containing both Price and Change
+    # Usually Price is in a div, Change is in a sibling div or span
+    # Typical classes for Change: 'P2Luy' (Green), 'NDrR4' (Red), 'BAftM' (Grey/Zero)
+    
+    change_str = "-"
+    pct_str = "-"
+    
+    # Strategy: Go up to the header container and search for change classes
+    # Based on debug output, the header block is about 6-7 levels up?
+    # Let's go up 6 levels and search downwards for known Google Finance change classes.
+    # Classes: 'P2Luy' (Green), 'NDrR4' (Red), 'BAftM' (Grey)
+    
+    found_block = None
+    curr = price_el
+    
+    target_container = None
+    # Go up 6 levels to find a common container
+    for _ in range(6):
+        if curr.parent:
+            curr = curr.parent
+    target_container = curr
+    
+    if target_container:
+        cands = target_container.find_all(class_=["P2Luy", "NDrR4", "BAftM"])
+        
+        # Filter candidates that are essentially numeric
+        numeric_cands = []
+        for c in cands:
+            t = c.text.strip()
+            # Must contain digits
+            if any(k.isdigit() for k in t):
+                numeric_cands.append(t)
+        
+        # Usually we find [ChangeValue, PercentValue] or sometimes doubled.
+        # We need to distinguish Value from Percent.
+        val_c = None
+        pct_c = None
+        
+        # Heuristic: Percent has '%', Value usually doesn't (or we prioritize %)
+        for t in numeric_cands:
+            if '%' in t:
+                 if not pct_c: pct_c = t
+            else:
+                 if not val_c: val_c = t
+        
+        if val_c: change_str = val_c
+        if pct_c: pct_str = pct_c
+
+    parsed = parse_number(price_str)
+    if parsed is None:
+        print(f"[Crawler] Unreadable Google Finance price '{price_str}' for {name}")
+        return None
+    value, scale, unit, decimals = parsed
+    return Quote(value, parse_float(change_str), parse_float(pct_str), unit=unit, scale=scale, decimals=decimals)
+
 def fetch_enara_foreign_holding():
     """
     Fetches the latest KOSPI Foreign Ownership Amount and Ratio from e-Nara Index (index.go.kr).
@@ -484,107 +656,110 @@ def fetch_enara_foreign_holding():
     """
     url = os.getenv("ENARA_FOREIGN_BOND_URL", "https://www.index.go.kr/unity/potal/eNara/sub/showStblGams3.do?stts_cd=108601&idx_cd=1086&freq=M&period=N")
     headers = {
-        "User-Agent": random.choice(USER_AGENTS),
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
         "Referer": "https://www.index.go.kr/"
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = TRANSPORT.get(upstream_url(url), headers=headers, timeout=10)
         if response.status_code != 200:
             return None
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.find_all('tr')
-        
-        # Identified Rows via browser check:
-        # e-Nara Index 1086 has a specific structure:
-        # Row 0: Header
-        # Row 1: Header/Category
-        # Row 2: Category Separator (blank or sub-header)
-        # Row 3 (index 2 in tbody usually, but in all tr): FOREIGN_AMT
-        # Row 6 (index 5 in tbody usually): FOREIGN_RATIO
-        
-        # Based on raw outerHTML analysis:
-        # Row 0, 1: Header
-        # Row 2 (index 2): '외국인 보유금액' (Total)
-        # Row 3 (index 3): '유가증권시장' (KOSPI Amt) <- Target
-        # Row 4 (index 4): '코스닥시장' (KOSDAQ Amt)
-        # Row 5 (index 5): '시가총액대비(%)' -> '외국인 보유금액' (Total %)
-        # Row 6 (index 6): '유가증권시장' (KOSPI %) <- Target
-        
-        if len(rows) > 6:
-            amt_row = rows[3] # KOSPI Amount (index 3)
-            pct_row = rows[6] # KOSPI Ratio (index 6)
-            
-            # Text based verification
-            if '유가증권시장' not in amt_row.text or '유가증권시장' not in pct_row.text:
-                print(f"[Crawler] e-Nara Row text mismatch: {amt_row.text.strip()} / {pct_row.text.strip()}")
-                # Try fallback to text match if index is shifted
-                for idx, r in enumerate(rows):
-                    if '유가증권시장' in r.text:
-                        if '보유금액' in rows[max(0, idx-1)].text or '보유금액' in r.text:
-                             amt_row = r
-                        elif '시가총액' in rows[max(0, idx-1)].text or '시가총액' in r.text:
-                             pct_row = r
-
-            amt_cols = amt_row.find_all('td')
-            pct_cols = pct_row.find_all('td')
-
-
-            
-            latest_amt = ""
-            latest_pct = ""
-            
-            # Find latest non-empty amt
-            for col in reversed(amt_cols):
-                val = col.text.strip().replace(',', '')
-                if val and val != '-':
-                    latest_amt = val
-                    break
-            
-            # Find latest non-empty pct
-            for col in reversed(pct_cols):
-                val = col.text.strip()
-                if val and val != '-':
-                    latest_pct = val
-                    break
-            
-            if latest_amt and latest_pct:
-                # Get date from header
-                date_str = datetime.now().strftime("%Y-%m")
-                thead = soup.find('thead')
-                if thead:
-                    th_rows = thead.find_all('tr')
-                    if th_rows:
-                        # Use last row of header for dates
-                        date_cols = th_rows[-1].find_all('th')
-                        if date_cols:
-                            date_str = date_cols[-1].text.strip()
-
-                # Format Amount: e-Nara usually uses 'trillion KRW' (조원) for this stat
-                # We show it as "XXX.X조"
-                try:
-                    amt_float = float(latest_amt)
-                    formatted_amt = f"{amt_float/10:,.1f}조" # The scale might be 100B, let's assume it's roughly correct for display
-                except:
-                    formatted_amt = f"{latest_amt}조"
-
-                return {
-                    "value": formatted_amt,
-                    "percent": f"{latest_pct}%",
-                    "date": date_str,
-                    "change": "",
-                    "next_date": ""
-                }
-        
-        print("[Crawler] Failed to parse e-Nara table structure (Row check failed).")
-        return None
+        return parse_enara_foreign_holding(response.text)
 
     except Exception as e:
         print(f"[Crawler] Error fetching e-Nara data: {e}")
         return None
 
+def parse_enara_foreign_holding(html):
+    """
+    Parses the e-Nara 1086 table into the latest KOSPI foreign holding
+    amount and ratio.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = soup.find_all('tr')
+    
+    # Identified Rows via browser check:
+    # e-Nara Index 1086 has a specific structure:
+    # Row 0: Header
+    # Row 1: Header/Category
+    # Row 2: Category Separator (blank or sub-header)
+    # Row 3 (index 2 in tbody usually, but in all tr): FOREIGN_AMT
+    # Row 6 (index 5 in tbody usually): FOREIGN_RATIO
+    
+    # Based on raw outerHTML analysis:
+    # Row 0, 1: Header
+    # Row 2 (index 2): '외국인 보유금액' (Total)
+    # Row 3 (index 3): '유가증권시장' (KOSPI Amt) <- Target
+    # Row 4 (index 4): '코스닥시장' (KOSDAQ Amt)
+    # Row 5 (index 5): '시가총액대비(%)' -> '외국인 보유금액' (Total %)
+    # Row 6 (index 6): '유가증권시장' (KOSPI %) <- Target
+    
+    if len(rows) > 6:
+        amt_row = rows[3] # KOSPI Amount (index 3)
+        pct_row = rows[6] # KOSPI Ratio (index 6)
+        
+        # Text based verification
+        if '유가증권시장' not in amt_row.text or '유가증권시장' not in pct_row.text:
+            print(f"[Crawler] e-Nara Row text mismatch: {amt_row.text.strip()} / {pct_row.text.strip()}")
+            # Try fallback to text match if index is shifted
+            for idx, r in enumerate(rows):
+                if '유가증권시장' in r.text:
+                    if '보유금액' in rows[max(0, idx-1)].text or '보유금액' in r.text:
+                         amt_row = r
+                    elif '시가총액' in rows[max(0, idx-1)].text or '시가총액' in r.text:
+                         pct_row = r
+
+        amt_cols = amt_row.find_all('td')
+        pct_cols = pct_row.find_all('td')
+
+
+        
+        latest_amt = ""
+        latest_pct = ""
+        
+        # Find latest non-empty amt
+        for col in reversed(amt_cols):
+            val = col.text.strip()
+            if val and val != '-':
+                latest_amt = val
+                break
+        
+        # Find latest non-empty pct
+        for col in reversed(pct_cols):
+            val = col.text.strip()
+            if val and val != '-':
+                latest_pct = val
+                break
+        
+        if latest_amt and latest_pct:
+            # Get date from header
+            date_str = datetime.now().strftime("%Y-%m")
+            thead = soup.find('thead')
+            if thead:
+                th_rows = thead.find_all('tr')
+                if th_rows:
+                    # Use last row of header for dates
+                    date_cols = th_rows[-1].find_all('th')
+                    if date_cols:
+                        date_str = date_cols[-1].text.strip()
+
+            # Amount: e-Nara usually uses 'trillion KRW' (조원) for this stat
+            # We show it as "XXX.X조"
+            amt_float = parse_float(latest_amt)
+            if amt_float is None:
+                print(f"[Crawler] Unreadable e-Nara amount '{latest_amt}'")
+                return None
+
+            # The scale might be 100B, let's assume it's roughly correct for display
+            return Observation(
+                amt_float / 10 * 1e12, scale="조", decimals=1,
+                label=f"{latest_pct}%", timestamp=date_str,
+            )
+    
+    print("[Crawler] Failed to parse e-Nara table structure (Row check failed).")
+    return None
+
 
 if __name__ == "__main__":
     pass
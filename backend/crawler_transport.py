@@ -0,0 +1,196 @@
+"""
+Crawler transport: one keep-alive session for scraping traffic, paced per
+upstream host.
+
+Per upstream host the transport keeps
+    - a token bucket (CRAWLER_RATE_PER_MIN, CRAWLER_BURST): a request waits up
+      to CRAWLER_MAX_WAIT_SEC for a token and otherwise fails with Throttled,
+      so the configured rate is never exceeded
+    - a cooldown: a 403/429 answer (or a 503 with Retry-After) stops all
+      requests to that host for an exponential backoff, and at least for the
+      response's Retry-After. Requests made while it runs fail with Throttled
+      without being sent.
+
+Every request carries the same browser headers (HEADERS); callers add their
+own Accept/Referer on top.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+from job_executor import budget_timeout, checkpoint
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+# Responses that mean "back off from this host"; a 503 only when it says for how long
+BLOCK_STATUSES = {403, 429}
+
+# Requests per minute per upstream host (0 = unlimited)
+CRAWLER_RATE_PER_MIN = float(os.getenv("CRAWLER_RATE_PER_MIN", "60"))
+CRAWLER_BURST = float(os.getenv("CRAWLER_BURST", "5"))
+# Longest a request waits for a token before failing with Throttled
+CRAWLER_MAX_WAIT_SEC = float(os.getenv("CRAWLER_MAX_WAIT_SEC", "5"))
+
+COOLDOWN_BASE_SEC = 30
+COOLDOWN_MAX_SEC = 900
+
+
+class Throttled(requests.RequestException):
+    """Not sent: the host is cooling down after a block, or its rate budget stayed empty for max_wait."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class HostState:
+    """Token bucket, cooldown and counters for one upstream host."""
+
+    def __init__(self, rate_per_min, burst):
+        self.rate = rate_per_min / 60
+        self.burst = burst
+        self.tokens = burst
+        self.refilled = time.monotonic()
+        self.cooldown_until = 0.0
+        self.strikes = 0
+        self.counts = {"requests": 0, "ok": 0, "blocked": 0, "errors": 0, "refused": 0}
+        self.latency_ms = None
+
+    def token_wait(self, now):
+        """Seconds until a token is free (0 = now), refilling the bucket first."""
+        if not self.rate:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate:
+            self.tokens -= 1
+        self.counts["requests"] += 1
+
+    def record(self, status, latency, retry_after=None):
+        """One outcome (status None = connection error); a block starts or extends the cooldown."""
+        if status is None:
+            self.counts["errors"] += 1
+            return
+        if status in BLOCK_STATUSES or (status == 503 and retry_after is not None):
+            self.counts["blocked"] += 1
+            self.strikes += 1
+            cooldown = min(COOLDOWN_BASE_SEC * 2 ** (self.strikes - 1), COOLDOWN_MAX_SEC)
+            self.cooldown_until = time.monotonic() + max(cooldown, retry_after or 0)
+            return
+        self.counts["ok"] += 1
+        self.strikes = 0
+        ms = latency * 1000
+        self.latency_ms = ms if self.latency_ms is None else self.latency_ms + 0.2 * (ms - self.latency_ms)
+
+    def report(self, now):
+        return {
+            "cooldown_sec": round(max(0.0, self.cooldown_until - now), 1),
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            **self.counts,
+        }
+
+
+def _retry_after(response):
+    """Retry-After in seconds (delta-seconds or HTTP-date), or None."""
+    value = response.headers.get("Retry-After", "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CrawlerTransport:
+    """requests-like get()/post() with per-host pacing and block cooldowns."""
+
+    def __init__(self, rate_per_min=CRAWLER_RATE_PER_MIN, burst=CRAWLER_BURST, max_wait=CRAWLER_MAX_WAIT_SEC,
+                 headers=HEADERS):
+        self.rate_per_min = rate_per_min
+        self.burst = burst
+        self.max_wait = max_wait
+        self.headers = headers
+        self.hosts = {}
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # Created on first use, after crawler_service has settled whether requests_cache is installed
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+    def _host(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.rate_per_min, self.burst)
+        return state
+
+    def _acquire(self, host):
+        """Takes a token for `host`, waiting (bounded) for one; raises Throttled instead of sending."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self._lock:
+                state = self._host(host)
+                now = time.monotonic()
+                if now < state.cooldown_until:
+                    state.counts["refused"] += 1
+                    remaining = state.cooldown_until - now
+                    raise Throttled(f"{host} is cooling down for {remaining:.0f}s", remaining)
+                wait = state.token_wait(now)
+                if wait == 0:
+                    state.take()
+                    return state
+                if now + wait > deadline:
+                    state.counts["refused"] += 1
+                    raise Throttled(f"{host} rate budget exhausted", wait)
+            # Jitter keeps paced requests from leaving in lockstep
+            time.sleep(wait + random.uniform(0, 0.1))
+
+    def request(self, method, url, headers=None, **kwargs):
+        host = urlsplit(url).netloc
+        # Scheduler jobs: stop here once the job's budget is spent, and never outlast it
+        checkpoint()
+        kwargs["timeout"] = budget_timeout(kwargs.get("timeout"))
+        state = self._acquire(host)
+        start = time.monotonic()
+        try:
+            response = self.session.request(method, url, headers={**self.headers, **(headers or {})}, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                state.record(None, time.monotonic() - start)
+            raise
+        with self._lock:
+            state.record(response.status_code, time.monotonic() - start, _retry_after(response))
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def report(self):
+        """Per-host counters and cooldowns for /api/jobs."""
+        with self._lock:
+            now = time.monotonic()
+            return {host: state.report(now) for host, state in self.hosts.items()}
+
+
+TRANSPORT = CrawlerTransport()
@@ -0,0 +1,171 @@
+"""
+Write-behind persistence of the in-memory CACHE, so a restart comes back with
+the last values instead of an empty dashboard.
+
+CACHE stays the only thing requests and jobs read. safe_update_cache hands
+each change to WriteBehindStore.enqueue, which just records the changed keys
+in a pending dict (no I/O, no serialization); a background thread wakes every
+DURABLE_FLUSH_SEC (or once DURABLE_BATCH_MAX keys are pending) and writes the
+batch to a local SQLite database (WAL) in one transaction. A key that changes
+several times between flushes is written once, with its latest value. A
+value that can't be encoded is logged and dropped, not retried. On
+boot, load() returns every persisted entry to seed CACHE before the first
+job runs.
+
+Quote / Observation values are stored as their dataclass fields and rebuilt
+as the same type on load; everything else is stored as plain JSON. History
+is not persisted here: its series already live in the series store.
+"""
+import dataclasses
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from quotes import Observation, Quote
+
+DURABLE_CACHE_PATH = os.getenv("DURABLE_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache.db"))
+DURABLE_FLUSH_SEC = float(os.getenv("DURABLE_FLUSH_SEC", "2"))
+DURABLE_BATCH_MAX = int(os.getenv("DURABLE_BATCH_MAX", "500"))
+
+MODEL_TYPES = {cls.__name__: cls for cls in (Quote, Observation)}
+
+
+def encode(value):
+    """(kind, payload text) for one cache value."""
+    kind = type(value).__name__
+    if kind in MODEL_TYPES:
+        return kind, json.dumps([getattr(value, f.name) for f in dataclasses.fields(value)], ensure_ascii=False)
+    return "json", json.dumps(value, ensure_ascii=False)
+
+
+def decode(kind, payload):
+    if kind == "json":
+        return json.loads(payload)
+    return MODEL_TYPES[kind](*json.loads(payload))
+
+
+class WriteBehindStore:
+    """Pending changes in memory, flushed in batches to SQLite by a background thread."""
+
+    def __init__(self, path=DURABLE_CACHE_PATH, flush_sec=DURABLE_FLUSH_SEC, batch_max=DURABLE_BATCH_MAX):
+        self.path = path
+        self.flush_sec = flush_sec
+        self.batch_max = batch_max
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entry ("
+            " category TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (category, key)) WITHOUT ROWID"
+        )
+        conn.commit()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one batch in flight (writer thread vs flush())
+        self._pending = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        self.counts = {"enqueued": 0, "flushes": 0, "rows": 0, "failed": 0, "dropped": 0, "last_flush_ms": None}
+
+    def _conn(self):
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, category, changes):
+        """Records {key: value} changes of a category for the next flush; never touches the disk."""
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="cache-write-behind", daemon=True)
+                self._thread.start()
+            for key, value in changes.items():
+                self._pending[(category, key)] = value
+            self.counts["enqueued"] += len(changes)
+            full = len(self._pending) >= self.batch_max
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes everything pending in one transaction; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            now = time.time()
+            rows = []
+            for (category, key), value in batch.items():
+                try:
+                    rows.append((category, key, *encode(value), now))
+                except (TypeError, ValueError) as e:
+                    # Retrying can't make it serializable; one bad value mustn't hold back the batch
+                    self.counts["dropped"] += 1
+                    print(f"[DurableCache] Dropping unserializable entry {category}/{key}: {e}")
+            if not rows:
+                return 0
+            try:
+                conn = self._conn()
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO entry (category, key, kind, payload, updated_at) VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT(category, key) DO UPDATE SET kind = excluded.kind,"
+                        " payload = excluded.payload, updated_at = excluded.updated_at",
+                        rows,
+                    )
+            except sqlite3.Error as e:
+                # Keep the batch for the next flush, unless a newer value arrived meanwhile
+                with self._lock:
+                    self._pending = {**{row[:2]: batch[row[:2]] for row in rows}, **self._pending}
+                self.counts["failed"] += 1
+                print(f"[DurableCache] Flush of {len(batch)} entries failed: {e}")
+                return 0
+            self.counts["flushes"] += 1
+            self.counts["rows"] += len(rows)
+            self.counts["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return len(rows)
+
+    def load(self):
+        """{category: {key: value}} of everything persisted (boot)."""
+        result = {}
+        for category, key, kind, payload in self._conn().execute("SELECT category, key, kind, payload FROM entry"):
+            try:
+                result.setdefault(category, {})[key] = decode(kind, payload)
+            except (TypeError, ValueError, KeyError) as e:
+                print(f"[DurableCache] Skipping unreadable entry {category}/{key}: {e}")
+        return result
+
+    def close(self):
+        """Stops the writer thread and flushes what is still pending (shutdown)."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def report(self):
+        """Pending keys, flush counts and latency, and the database size, for /api/jobs."""
+        with self._lock:
+            pending = len(self._pending)
+        disk = sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal") if os.path.exists(self.path + suffix))
+        return {"pending": pending, **self.counts, "disk_bytes": disk}
@@ -0,0 +1,143 @@
+"""
+Release history of the tracked economic-calendar events.
+
+Every row of an Investing.com event page's history table (actual, forecast,
+previous) is merged here, keyed by the finance_service.CALENDAR_EVENTS key.
+The economy charts are drawn from the actuals, and the forecasts give
+surprise-vs-consensus metrics without another upstream request.
+
+A page shows only the latest dozen rows, so the merged history is what the
+charts are built from, and it must survive a restart: every merge that
+changes an event writes its releases to a series_store.SeriesStore
+(EVENT_SERIES_DIR) as three series per event, '<key>.actual',
+'<key>.forecast' and '<key>.previous', one record per release day with NaN
+for a blank cell. The store is read back when EventSeriesStore is created.
+"""
+import math
+import os
+import threading
+
+import numpy as np
+
+from quotes import Release
+from series_store import SERIES_DTYPE, SeriesStore, epoch_day
+
+# Keep ~20 years of monthly releases per event
+MAX_RELEASES = 240
+EVENT_SERIES_DIR = os.getenv("EVENT_SERIES_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "events"))
+FIELDS = ("actual", "forecast", "previous")
+
+
+class EventSeriesStore:
+    """{ key: { date: Release } }, merged across fetches (a page shows only the latest rows)."""
+
+    def __init__(self, max_releases=MAX_RELEASES, store=None):
+        self.max_releases = max_releases
+        self.store = store
+        self._series = {}
+        self._lock = threading.Lock()
+        if store is not None:
+            self._load()
+
+    def _load(self):
+        """Reads back every event whose three series are stored."""
+        ids = set(self.store.ids())
+        for key in sorted({series_id.rpartition(".")[0] for series_id in ids}):
+            if not all(f"{key}.{field}" in ids for field in FIELDS):
+                continue
+            columns = [self.store.open(f"{key}.{field}") for field in FIELDS]
+            if any(len(column) != len(columns[0]) or not np.array_equal(column["day"], columns[0]["day"])
+                   for column in columns):
+                print(f"[EventSeries] Skipping {key}: its stored series don't line up")
+                continue
+            dates = columns[0]["day"].astype("datetime64[D]").astype(str)
+            values = [[None if math.isnan(v) else v for v in column["value"].tolist()] for column in columns]
+            self._series[key] = {date: Release(date, *row) for date, *row in zip(dates.tolist(), *values)}
+
+    def _write(self, key, series):
+        """Writes `key`'s releases to the store (called under the lock, after a change)."""
+        dates = sorted(series)
+        for field in FIELDS:
+            records = np.empty(len(dates), dtype=SERIES_DTYPE)
+            records["day"] = [epoch_day(date) for date in dates]
+            records["value"] = [getattr(series[date], field) for date in dates]  # None -> NaN
+            self.store.write(f"{key}.{field}", records)
+
+    def merge(self, key, releases):
+        """Adds or revises releases of `key`. Returns how many rows changed."""
+        changed = 0
+        with self._lock:
+            series = self._series.setdefault(key, {})
+            for release in releases:
+                if series.get(release.date) != release:
+                    series[release.date] = release
+                    changed += 1
+            if len(series) > self.max_releases:
+                for date in sorted(series)[:len(series) - self.max_releases]:
+                    del series[date]
+            if changed and self.store is not None:
+                try:
+                    self._write(key, series)
+                except (OSError, ValueError) as e:
+                    print(f"[EventSeries] Failed to store {key}: {e}")
+        return changed
+
+    def releases(self, key):
+        """Releases of `key`, oldest first (scheduled ones included, with actual=None)."""
+        with self._lock:
+            series = self._series.get(key, {})
+            return [series[date] for date in sorted(series)]
+
+    def chart(self, key):
+        """Released actuals as a history series: { 'dates': [str], 'values': [float] }, or None."""
+        released = [r for r in self.releases(key) if r.actual is not None]
+        if not released:
+            return None
+        return {'dates': [r.date for r in released], 'values': [r.actual for r in released]}
+
+    def surprise(self, key):
+        """
+        Surprise (actual - forecast) of the latest release, relative to the
+        consensus and to the event's own surprise history:
+            surprise_pct  surprise / |forecast| in %
+            z             surprise / stdev of the earlier surprises
+            beat_rate     share of releases that came in above forecast, in %
+        None until a release with a forecast exists.
+        """
+        scored = [r for r in self.releases(key) if r.actual is not None and r.forecast is not None]
+        if not scored:
+            return None
+        latest = scored[-1]
+        surprises = [r.actual - r.forecast for r in scored]
+        surprise = surprises[-1]
+        earlier = surprises[:-1]
+        z = None
+        if len(earlier) >= 3:
+            mean = sum(earlier) / len(earlier)
+            stdev = math.sqrt(sum((s - mean) ** 2 for s in earlier) / (len(earlier) - 1))
+            z = surprise / stdev if stdev > 0 else None
+        return {
+            "date": latest.date,
+            "actual": latest.actual,
+            "forecast": latest.forecast,
+            "surprise": surprise,
+            "surprise_pct": surprise / abs(latest.forecast) * 100 if latest.forecast else None,
+            "z": z,
+            "beat_rate": sum(s > 0 for s in surprises) / len(surprises) * 100,
+            "mean_abs_surprise": sum(abs(s) for s in surprises) / len(surprises),
+            "count": len(surprises),
+        }
+
+    def summary(self, key):
+        """Wire form of one event for /api/finance/events: columns plus surprise metrics."""
+        releases = self.releases(key)
+        return {
+            "dates": [r.date for r in releases],
+            "actual": [r.actual for r in releases],
+            "forecast": [r.forecast for r in releases],
+            "previous": [r.previous for r in releases],
+            "surprise": self.surprise(key),
+        }
+
+
+EVENT_SERIES = EventSeriesStore(store=SeriesStore(EVENT_SERIES_DIR))
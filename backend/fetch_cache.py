@@ -0,0 +1,102 @@
+"""
+Single-flight, memoizing layer for upstream fetches that several jobs share.
+
+Some upstream series feed more than one job: KRW=X backs both the realtime
+USD/KRW quote and krw_chart, T10Y2Y the realtime 10-2 spread and
+spread_chart, and the IndexerGo high yield page both daily stock and economy
+jobs (same cron). Those fetches go through FETCH_CACHE.get(source, key,
+max_age, fetch):
+    - a result younger than max_age is returned as is, so back-to-back jobs
+      share one upstream call and one parse
+    - a call for a key that is already being fetched waits for that fetch
+      instead of starting another (concurrent jobs)
+    - None (a failed fetch) is handed to the waiters but not kept, so the next
+      caller retries
+    - a scheduler job past its budget stops here (job_executor.checkpoint)
+The freshness window is the caller's: a realtime poll accepts a result only
+seconds old, a daily or history job one from the last hour. Realtime polls
+don't download the charts' full series themselves: they peek() for one
+fetched within their window and otherwise make their own small latest-N
+fetch under a separate key.
+"""
+import threading
+import time
+
+from job_executor import checkpoint
+
+
+class _Flight:
+    """One fetch in progress; waiters block on `done`."""
+
+    __slots__ = ("done", "value")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class FetchCache:
+    """{ (source, key): (fetched_at, value) } plus the fetches in flight."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._inflight = {}
+        self.counts = {"fetched": 0, "fresh_hits": 0, "joined": 0}
+
+    def get(self, source, key, max_age, fetch):
+        """Value of (source, key) no older than max_age seconds, calling fetch() at most once for concurrent callers."""
+        slot = (source, key)
+        checkpoint()
+        with self._lock:
+            entry = self._entries.get(slot)
+            if entry is not None and time.monotonic() - entry[0] < max_age:
+                self.counts["fresh_hits"] += 1
+                return entry[1]
+            flight = self._inflight.get(slot)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[slot] = _Flight()
+                self.counts["fetched"] += 1
+            else:
+                self.counts["joined"] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.value
+
+        try:
+            flight.value = fetch()
+        finally:
+            with self._lock:
+                del self._inflight[slot]
+                if flight.value is not None:
+                    self._entries[slot] = (time.monotonic(), flight.value)
+            flight.done.set()
+        return flight.value
+
+    def peek(self, source, key, max_age):
+        """Value of (source, key) if one no older than max_age is held, else None; never fetches."""
+        with self._lock:
+            entry = self._entries.get((source, key))
+            if entry is None or time.monotonic() - entry[0] >= max_age:
+                return None
+            self.counts["fresh_hits"] += 1
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def report(self):
+        """Upstream calls made vs saved (fresh hits + joined in-flight calls), for /api/jobs."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                **self.counts,
+                "entries": {f"{source}:{key}": round(now - fetched_at, 1)
+                            for (source, key), (fetched_at, _) in self._entries.items()},
+            }
+
+
+FETCH_CACHE = FetchCache()
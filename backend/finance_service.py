@@ -1,56 +1,130 @@
-import yfinance as yf
 import requests
 import os
 import time
 from datetime import datetime, timedelta
 import crawler_service
+from event_series import EVENT_SERIES
+from fetch_cache import FETCH_CACHE
+from job_executor import budget_timeout
+from quotes import Quote, Observation, with_change
+from series_store import SERIES_DTYPE
+from history_cache import to_records
+import numpy as np
 # import FinanceDataReader as fdr # Removed for memory optimization
 import gc
 
 # Environment Variable based configuration
 FRED_API_KEY = os.environ.get("FRED_API_KEY", "") # No more hardcoded default for security
+FRED_OBSERVATIONS_URL = "https://api.stlouisfed.org/fred/series/observations"
+YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{ticker}"
+YAHOO_SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
+INDEXERGO_HIGH_YIELD_URL = "https://www.indexergo.com/series/?frq=M&idxDetail=13404"
+# Daily closes from Yahoo's chart JSON ("chart", no pandas) or yfinance's history() ("yfinance")
+YF_HISTORY_SOURCE = os.getenv("YF_HISTORY_SOURCE", "chart")
+
+# How old a shared fetch (fetch_cache.py) may be for a realtime poll vs a daily/history job.
+# Scaled like the schedules so load tests at SCHEDULE_SPEEDUP still poll upstream every cycle.
+_SPEEDUP = float(os.getenv("SCHEDULE_SPEEDUP", "1"))
+SHARED_REALTIME_MAX_AGE_SEC = float(os.getenv("SHARED_REALTIME_MAX_AGE_SEC", "20")) / _SPEEDUP
+SHARED_DAILY_MAX_AGE_SEC = float(os.getenv("SHARED_DAILY_MAX_AGE_SEC", "3600")) / _SPEEDUP
 
 
 def get_ticker_data(ticker_symbol):
     """
-    Fetches data for a single ticker using yfinance.
-    Returns: { 'value': str, 'change': str, 'percent': float }
+    Latest price of a Yahoo ticker against the previous daily close. Reuses
+    the chart's 1-year daily series when it was fetched within
+    SHARED_REALTIME_MAX_AGE_SEC, and otherwise fetches only the last 5 days.
+    Returns: Quote (value, change, percent)
     """
-    try:
-        ticker = yf.Ticker(ticker_symbol)
-        # Get fast info first
-        info = ticker.fast_info
-        
-        price = None
-        prev_close = None
-        
-        if hasattr(info, 'last_price') and info.last_price is not None:
-            price = info.last_price
-            prev_close = info.previous_close
-        else:
-            hist = ticker.history(period="2d")
-            if not hist.empty:
-                price = hist['Close'].iloc[-1]
-                prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else price
-        
-        if price is None:
-            return None
+    daily = FETCH_CACHE.peek("yf", ticker_symbol, SHARED_REALTIME_MAX_AGE_SEC)
+    if daily is None:
+        daily = FETCH_CACHE.get("yf_latest", ticker_symbol, SHARED_REALTIME_MAX_AGE_SEC,
+                                lambda: fetch_yf_daily(ticker_symbol, period="5d"))
+    if daily is None:
+        return None
+    closes = daily['value']
+    prev_close = closes[-2] if len(closes) > 1 else closes[-1]
+    return with_change(Quote, float(closes[-1]), float(prev_close))
 
-        change = price - prev_close
-        percent = (change / prev_close) * 100
-        
-        sign = "+" if change >= 0 else ""
-        return {
-            "value": f"{price:,.2f}",
-            "change": f"{sign}{change:,.2f}",
-            "percent": f"{sign}{percent:,.2f}", 
-            "raw_change": change,
-            "raw_percent": percent
-        }
+def get_yf_daily(ticker, max_age):
+    """1 year of daily closes as SERIES_DTYPE records, shared by the realtime quote and the chart."""
+    return FETCH_CACHE.get("yf", ticker, max_age, lambda: fetch_yf_daily(ticker))
+
+def fetch_yf_daily(ticker, period="1y"):
+    """
+    One upstream call for a ticker's daily closes over `period` (a Yahoo
+    range: "1y" for the chart, "5d" for a realtime quote).
+    The chart JSON is decoded straight into NumPy records; yfinance's
+    history() (which builds a pandas DataFrame) is only used when
+    YF_HISTORY_SOURCE=yfinance or as a fallback when the chart request fails.
+    """
+    if YF_HISTORY_SOURCE != "yfinance" or os.getenv("UPSTREAM_BASE_URL"):
+        try:
+            return parse_yahoo_chart_records(fetch_yahoo_chart(ticker, range_=period, interval="1d"))
+        except Exception as e:
+            if os.getenv("UPSTREAM_BASE_URL"):
+                # Load testing: yfinance's own session can't be redirected to the stand-in
+                print(f"Error fetching ticker {ticker}: {e}")
+                return None
+            print(f"Chart JSON for {ticker} failed ({e}), falling back to yfinance")
+    try:
+        import yfinance as yf  # pulls in pandas: only loaded when this path is taken
+        series = history_frame_to_series(yf.Ticker(ticker).history(period=period, interval="1d", auto_adjust=False))
+        return to_records(series) if series else None
     except Exception as e:
-        print(f"Error fetching ticker {ticker_symbol}: {e}")
+        print(f"Error fetching ticker {ticker}: {e}")
         return None
 
+def fetch_quotes_batch(symbols):
+    """
+    Latest quotes of many Yahoo symbols in one upstream batch (quote_engine.py).
+    Returns: { symbol: Quote } for the symbols Yahoo knew.
+    """
+    try:
+        if os.getenv("UPSTREAM_BASE_URL"):
+            # Load testing: the spark endpoint is Yahoo's own multi-symbol batch
+            headers = {"User-Agent": crawler_service.USER_AGENTS[0]}
+            params = {"symbols": ",".join(symbols), "range": "5d", "interval": "1d"}
+            resp = requests.get(crawler_service.upstream_url(YAHOO_SPARK_URL), params=params, headers=headers, timeout=budget_timeout(10))
+            resp.raise_for_status()
+            return parse_yahoo_spark(resp.json())
+
+        import yfinance as yf
+        frame = yf.download(symbols, period="5d", interval="1d", group_by="ticker",
+                            auto_adjust=False, progress=False, threads=False)
+        return download_frame_to_quotes(frame, symbols)
+    except Exception as e:
+        print(f"Error fetching quote batch ({len(symbols)} symbols): {e}")
+        return {}
+
+def download_frame_to_quotes(frame, symbols):
+    """Converts a yf.download(group_by="ticker") frame into { symbol: Quote } (last close vs the one before)."""
+    quotes = {}
+    if frame is None or frame.empty:
+        return quotes
+    for symbol in symbols:
+        try:
+            closes = frame[symbol]['Close'] if frame.columns.nlevels > 1 else frame['Close']
+        except KeyError:
+            continue
+        closes = [float(c) for c in closes if c == c]  # skip NaN
+        if closes:
+            quotes[symbol] = with_change(Quote, closes[-1], closes[-2] if len(closes) > 1 else None)
+    return quotes
+
+def parse_yahoo_spark(data):
+    """Converts a Yahoo spark payload into { symbol: Quote }, like download_frame_to_quotes."""
+    quotes = {}
+    for result in (data.get('spark') or {}).get('result') or []:
+        for response in result.get('response') or []:
+            closes = [c for c in response['indicators']['quote'][0]['close'] if c is not None]
+            price = response['meta'].get('regularMarketPrice') or (closes[-1] if closes else None)
+            if price is None:
+                continue
+            prev_close = closes[-2] if len(closes) > 1 else response['meta'].get('chartPreviousClose')
+            quotes[result['symbol']] = with_change(Quote, float(price), prev_close)
+    return quotes
+
 def get_fred_data(series_id, label_type="value"):
     """
     Fetches latest observation from FRED API.
@@ -60,60 +134,49 @@ def get_fred_data(series_id, label_type="value"):
         print(f"[FRED] Missing API Key. Skipping {series_id}")
         return None
         
-    url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={FRED_API_KEY}&file_type=json&sort_order=desc&limit=2"
+    url = f"{FRED_OBSERVATIONS_URL}?series_id={series_id}&api_key={FRED_API_KEY}&file_type=json&sort_order=desc&limit=2"
     
     try:
-        response = requests.get(url, timeout=5)
+        response = requests.get(crawler_service.upstream_url(url), timeout=budget_timeout(5))
         response.raise_for_status()
-        data = response.json()
-        observations = data.get('observations', [])
-        
-        if not observations:
-            return None
-            
-        latest = observations[0]
-        prev = observations[1] if len(observations) > 1 else None
-        
-        val_str = latest['value']
-        date_str = latest['date'] # YYYY-MM-DD
-        
-        if val_str == '.':
-            return None
-            
-        val = float(val_str)
-        
-        # Calculate change
-        change_str = "0.00"
-        percent_str = "0.00%"
-        
-        if prev and prev['value'] != '.':
-            prev_val = float(prev['value'])
-            change = val - prev_val
-            pct = (change / prev_val) * 100 if prev_val != 0 else 0
-            
-            sign = "+" if change >= 0 else ""
-            change_str = f"{sign}{change:,.2f}"
-            percent_str = f"{sign}{pct:,.2f}%"
-
-        # Formatting based on label_type
-        formatted_val = f"{val:,.2f}"
-        if label_type == "percent":
-           formatted_val = f"{val:,.2f}%"
-        elif label_type == "int":
-           formatted_val = f"{int(val):,}"
-
-        return {
-            "value": formatted_val,
-            "change": change_str,
-            "percent": percent_str,
-            "date": date_str,
-            "next_date": "TBD" # FRED doesn't provide next release date easily in this endpoint
-        }
+        return parse_fred_latest(response.json(), label_type)
 
     except Exception as e:
         print(f"[FRED] Error fetching {series_id}: {e}")
         return None
 
+def parse_fred_latest(data, label_type="value"):
+    """
+    Parses a FRED observations payload (sort_order=desc) into an Observation
+    of the latest value and its change versus the previous observation.
+    """
+    observations = data.get('observations', [])
+    
+    if not observations:
+        return None
+        
+    latest = observations[0]
+    prev = observations[1] if len(observations) > 1 else None
+    
+    val_str = latest['value']
+    date_str = latest['date'] # YYYY-MM-DD
+    
+    if val_str == '.':
+        return None
+        
+    val = float(val_str)
+    prev_val = float(prev['value']) if prev and prev['value'] != '.' else val
+
+    # Formatting based on label_type
+    return with_change(
+        Observation, val, prev_val,
+        unit="%" if label_type == "percent" else "",
+        decimals=0 if label_type == "int" else 2,
+        timestamp=date_str,
+        next_date="TBD", # FRED doesn't provide next release date easily in this endpoint
+    )
+
+
 # --- Stocks ---
 
 import crawler_service
@@ -122,46 +185,116 @@ import crawler_service
 
 # --- Stocks ---
 
-def get_realtime_stocks():
-    """Fetches stock data via Investing.com Crawling (30s job)"""
-    # User requested consistency with Investing.com URLs.
-    # Switching from yfinance to direct crawling.
-    targets = {
-        'sp_futures': 'https://kr.investing.com/indices/us-spx-500-futures',
-        'dow_futures': 'https://kr.investing.com/indices/us-30-futures',
-        'nasdaq_futures': 'https://kr.investing.com/indices/nq-100-futures',
-        'wti': 'https://kr.investing.com/commodities/crude-oil',
-        #'russell': 'https://kr.investing.com/indices/smallcap-2000', # 500 Error
-        'vix': 'https://kr.investing.com/indices/volatility-s-p-500'
-    }
-    
-    result = {}
-    
-    # Crawl each target
-    for key, url in targets.items():
-        # Use existing fetch_investing_price
-        # It handles value, change, percent
-        data = crawler_service.fetch_investing_price(url, key)
-        if data:
-            result[key] = data
-            
-    # Russell 2000 -> yfinance (^RUT)
-    # Switched from Google Finance due to crawling instability (NaN% issue)
-    russell = get_ticker_data('^RUT')
-    if russell:
-        result['russell'] = russell
-            
+# --- Realtime instruments ---
+# key -> (category, trading calendar, fetcher). The realtime jobs in main.py ask
+# the adaptive poller (market_hours.py) which keys are due and fetch only those.
+
+def _investing(url, name):
+    return lambda: crawler_service.fetch_investing_price(url, name)
+
+def _fear_greed():
     # Fear & Greed (Library or Crawl)
     fg = crawler_service.get_fear_greed_index()
     if fg:
-        result['fear_greed'] = {
-            "value": fg['value'],
-            "change": "0", 
-            "percent": fg['description'] 
-        }
-            
+        return Quote(float(fg['value']), 0.0, decimals=0, label=fg['description'])
+    return None
+
+def _us_10_2_spread():
+    # 10-2Y Spread (FRED API)
+    # Changed from Investing.com Crawling to FRED API
+    spread = get_fred_latest_two('T10Y2Y', 'US10Y2Y')
+    if spread:
+        spread.url = 'https://fred.stlouisfed.org/series/T10Y2Y'
+    return spread
+
+REALTIME_INSTRUMENTS = {
+    # Stocks: Investing.com crawling (user requested consistency with Investing.com URLs)
+    'sp_futures': ("stocks", "cme_globex", _investing('https://kr.investing.com/indices/us-spx-500-futures', 'sp_futures')),
+    'dow_futures': ("stocks", "cme_globex", _investing('https://kr.investing.com/indices/us-30-futures', 'dow_futures')),
+    'nasdaq_futures': ("stocks", "cme_globex", _investing('https://kr.investing.com/indices/nq-100-futures', 'nasdaq_futures')),
+    'wti': ("stocks", "cme_globex", _investing('https://kr.investing.com/commodities/crude-oil', 'wti')),
+    #'russell': 'https://kr.investing.com/indices/smallcap-2000', # 500 Error
+    'vix': ("stocks", "us_equity", _investing('https://kr.investing.com/indices/volatility-s-p-500', 'vix')),
+    # Russell 2000 -> yfinance (^RUT)
+    # Switched from Google Finance due to crawling instability (NaN% issue)
+    'russell': ("stocks", "us_equity", lambda: get_ticker_data('^RUT')),
+    'fear_greed': ("stocks", "us_equity", _fear_greed),
+
+    # Rates
+    'us_10y': ("rates", "cme_globex", lambda: get_ticker_data('^TNX')),
+    'us_2y': ("rates", "cme_globex", _investing('https://kr.investing.com/rates-bonds/u.s.-2-year-bond-yield', 'US2Y')),
+    'us_10_2_spread': ("rates", "fred_release", _us_10_2_spread),
+    'jp_2y': ("rates", "jgb", _investing('https://kr.investing.com/rates-bonds/japan-2-year-bond-yield', 'JP2Y')),
+    'kr_10y': ("rates", "krx", _investing('https://kr.investing.com/rates-bonds/south-korea-10-year-bond-yield', 'KR10Y')),
+    'kr_2y': ("rates", "krx", _investing('https://kr.investing.com/rates-bonds/south-korea-2-year-bond-yield', 'KR2Y')),
+
+    # Exchange: DXY -> Investing.com, USD/KRW -> yfinance (User Request)
+    'dxy': ("exchange", "fx", _investing('https://kr.investing.com/currencies/us-dollar-index', 'DXY')),
+    'usd_krw': ("exchange", "fx", lambda: get_ticker_data('KRW=X')),
+}
+
+def fetch_realtime(category, keys=None):
+    """Fetches the realtime instruments of a category (only `keys` if given)."""
+    result = {}
+    for key, (cat, _calendar, fetch) in REALTIME_INSTRUMENTS.items():
+        if cat != category or (keys is not None and key not in keys):
+            continue
+        data = fetch()
+        if data:
+            result[key] = data
     return result
 
+# --- Economic calendar events ---
+# key -> (Investing event id, name, URL env var, default event page URL).
+# All events come from one calendar listing request per cycle; an event's own
+# page is fetched only when it is missing from the listing.
+
+CALENDAR_EVENTS = {
+    'fed_rate': (168, 'FedRate', None, 'https://kr.investing.com/economic-calendar/interest-rate-decision-168'),
+    'jp_policy': (164, 'BOJRate', None, 'https://kr.investing.com/economic-calendar/boj-interest-rate-decision-164'),
+    'kr_base': (473, 'BOKRate', None, 'https://kr.investing.com/economic-calendar/south-korea-interest-rate-decision-473'),
+    'foreign_reserves': (1889, 'Reserves', None, 'https://kr.investing.com/economic-calendar/south-korea-fx-reserves-usd-1889'),
+    'cci': (48, 'CCI', "INVESTING_CCI_URL", "https://kr.investing.com/economic-calendar/cb-consumer-confidence-48"),
+    'unemployment': (300, 'Unemployment', "INVESTING_UNEMPLOYMENT_URL", "https://kr.investing.com/economic-calendar/unemployment-rate-300"),
+    'non_farm': (227, 'NFP', "INVESTING_NFP_URL", "https://kr.investing.com/economic-calendar/nonfarm-payrolls-227"),
+    'pmi': (173, 'PMI', "INVESTING_PMI_URL", "https://kr.investing.com/economic-calendar/ism-manufacturing-pmi-173"),
+}
+
+# The daily rates/exchange/economy jobs run back to back; they share one listing fetch
+CALENDAR_BATCH_TTL_SEC = float(os.getenv("CALENDAR_BATCH_TTL_SEC", "300"))
+
+def get_calendar_batch():
+    """{ event_id: Observation } for every CALENDAR_EVENTS id, fetched at most once per CALENDAR_BATCH_TTL_SEC."""
+    return FETCH_CACHE.get("investing_calendar", "listing", CALENDAR_BATCH_TTL_SEC, _fetch_calendar_batch)
+
+def _fetch_calendar_batch():
+    event_ids = [event_id for event_id, _, _, _ in CALENDAR_EVENTS.values()]
+    events = crawler_service.fetch_investing_calendar_bulk(event_ids)
+    print(f"[JOB] Calendar listing: {len(events)}/{len(event_ids)} events in one request")
+    return events
+
+def get_calendar_event(key):
+    """Latest release of a CALENDAR_EVENTS entry, from the shared listing or else its own page."""
+    event_id, name, _, _ = CALENDAR_EVENTS[key]
+    obs = get_calendar_batch().get(event_id)
+    if obs is None:
+        obs = crawler_service.fetch_investing_calendar_actual(calendar_event_url(key), event_id, name)
+    return obs
+
+def calendar_event_url(key):
+    _, _, url_env, default_url = CALENDAR_EVENTS[key]
+    return os.getenv(url_env, default_url) if url_env else default_url
+
+def get_indexergo_high_yield():
+    """IndexerGo high yield spread, fetched once for both daily jobs that show it."""
+    url = os.getenv("INDEXERGO_HIGH_YIELD_URL", INDEXERGO_HIGH_YIELD_URL)
+    return FETCH_CACHE.get("indexergo", url, SHARED_DAILY_MAX_AGE_SEC,
+                           lambda: crawler_service.fetch_indexergo_data(url, 'HighYield'))
+
+def get_realtime_stocks():
+    """Fetches stock data via Investing.com Crawling (30s job)"""
+    return fetch_realtime("stocks")
+
 def get_daily_stocks():
     """Fetches daily stock-related data via Crawler (Daily job)"""
     result = {}
@@ -169,9 +302,7 @@ def get_daily_stocks():
     # High Yield Spread (Restore Original: IndexerGo first)
     try:
         # Try IndexerGo (Original primary)
-        hy = crawler_service.fetch_indexergo_data(
-            'https://www.indexergo.com/series/?frq=M&idxDetail=13404', 'HighYield'
-        )
+        hy = get_indexergo_high_yield()
         if hy:
             result['high_yield'] = hy
             print("[JOB] Successfully updated High Yield via IndexerGo")
@@ -181,7 +312,7 @@ def get_daily_stocks():
             fred_hy = get_fred_data('BAMLH0A0HYM2', label_type="value")
             if fred_hy:
                 # Add dynamic URL for fallback
-                fred_hy['url'] = "https://fred.stlouisfed.org/series/BAMLH0A0HYM2"
+                fred_hy.url = "https://fred.stlouisfed.org/series/BAMLH0A0HYM2"
                 result['high_yield'] = fred_hy
                 print("[JOB] Successfully updated High Yield via FRED (Dynamic URL set)")
 
@@ -196,47 +327,7 @@ def get_daily_stocks():
 
 def get_realtime_rates():
     """Fetches live rates via yfinance & Investing.com (5m job)"""
-    result = {}
-    
-    # 1. US 10Y Yield (yfinance)
-    us_10y = get_ticker_data('^TNX')
-    if us_10y:
-        result['us_10y'] = us_10y
-        
-    # 2. US 2Y Yield (Investing.com)
-    us_2y = crawler_service.fetch_investing_price(
-        'https://kr.investing.com/rates-bonds/u.s.-2-year-bond-yield', 'US2Y'
-    )
-    if us_2y: result['us_2y'] = us_2y
-    
-
-    # 3. 10-2Y Spread (FRED API)
-    # Changed from Investing.com Crawling to FRED API
-    spread = get_fred_latest_two('T10Y2Y', 'US10Y2Y')
-    if spread: 
-        spread['url'] = 'https://fred.stlouisfed.org/series/T10Y2Y'
-        result['us_10_2_spread'] = spread
-
-    
-    # 4. Japan 2Y (Investing.com)
-    jp_2y = crawler_service.fetch_investing_price(
-        'https://kr.investing.com/rates-bonds/japan-2-year-bond-yield', 'JP2Y'
-    )
-    if jp_2y: result['jp_2y'] = jp_2y
-    
-    # 5. Korea 10Y (Investing.com)
-    kr_10y = crawler_service.fetch_investing_price(
-        'https://kr.investing.com/rates-bonds/south-korea-10-year-bond-yield', 'KR10Y'
-    )
-    if kr_10y: result['kr_10y'] = kr_10y
-    
-    # 6. Korea 2Y (Investing.com)
-    kr_2y = crawler_service.fetch_investing_price(
-        'https://kr.investing.com/rates-bonds/south-korea-2-year-bond-yield', 'KR2Y'
-    )
-    if kr_2y: result['kr_2y'] = kr_2y
-        
-    return result
+    return fetch_realtime("rates")
 
 def get_daily_rates():
     """Fetches official rates via Investing.com Crawling (Daily job)"""
@@ -245,10 +336,8 @@ def get_daily_rates():
     # 1. Fed Funds Rate (Restore Original Strategy: Investing.com primary)
     try:
         # 1-1. Try Investing.com Crawling (Original)
-        fed_inv = crawler_service.fetch_investing_calendar_actual(
-            'https://kr.investing.com/economic-calendar/interest-rate-decision-168', 168, 'FedRate'
-        )
-        if fed_inv and fed_inv.get('value'):
+        fed_inv = get_calendar_event('fed_rate')
+        if fed_inv and fed_inv.value is not None:
             result['fed_rate'] = fed_inv
             print("[JOB] Successfully updated Fed Rate via Investing.com")
         else:
@@ -257,10 +346,10 @@ def get_daily_rates():
             fed_fred = get_fred_data('DFF', label_type="percent")
             if fed_fred:
                 # Add dynamic URL for fallback to Daily Series
-                fed_fred['url'] = "https://fred.stlouisfed.org/series/DFF"
+                fed_fred.url = "https://fred.stlouisfed.org/series/DFF"
                 # If Investing.com provided next_date but no value, merge them
-                if fed_inv and fed_inv.get('next_date'):
-                    fed_fred['next_date'] = fed_inv['next_date']
+                if fed_inv and fed_inv.next_date:
+                    fed_fred.next_date = fed_inv.next_date
                 result['fed_rate'] = fed_fred
                 print("[JOB] Successfully updated Fed Rate via FRED DFF (Dynamic URL set)")
 
@@ -278,15 +367,11 @@ def get_daily_rates():
     if sofr: result['sofr'] = sofr
     
     # 3. Japan Policy Rate (Decision)
-    jp_rate = crawler_service.fetch_investing_calendar_actual(
-        'https://kr.investing.com/economic-calendar/boj-interest-rate-decision-164', 164, 'BOJRate'
-    )
+    jp_rate = get_calendar_event('jp_policy')
     if jp_rate: result['jp_policy'] = jp_rate
     
     # 4. Korea Base Rate (Decision) - Corrected ID 473
-    kr_rate = crawler_service.fetch_investing_calendar_actual(
-        'https://kr.investing.com/economic-calendar/south-korea-interest-rate-decision-473', 473, 'BOKRate'
-    )
+    kr_rate = get_calendar_event('kr_base')
     if kr_rate: result['kr_base'] = kr_rate
 
     
@@ -296,28 +381,14 @@ def get_daily_rates():
 
 def get_realtime_exchange():
     """Fetches live exchange rates via Investing.com Crawling (5m job)"""
-    result = {}
-    
-    # DXY -> Investing.com
-    dxy = crawler_service.fetch_investing_price(
-        'https://kr.investing.com/currencies/us-dollar-index', 'DXY'
-    )
-    if dxy: result['dxy'] = dxy
-    
-    # USD/KRW -> yfinance (User Request)
-    usd_krw = get_ticker_data('KRW=X')
-    if usd_krw: result['usd_krw'] = usd_krw
-    
-    return result
+    return fetch_realtime("exchange")
 
 def get_daily_exchange():
     """Fetches reserves etc. via Investing.com Crawling (Daily job)"""
     result = {}
     
     # Korea Reserves
-    res = crawler_service.fetch_investing_calendar_actual(
-        'https://kr.investing.com/economic-calendar/south-korea-fx-reserves-usd-1889', 1889, 'Reserves'
-    )
+    res = get_calendar_event('foreign_reserves')
     if res:
         result['foreign_reserves'] = res
         
@@ -335,14 +406,10 @@ def get_daily_exchange():
              import backend.crawler.krx_crawler as krx_crawler
              krx_data = krx_crawler.get_foreign_holding_data()
              if krx_data:
-                val_trillion = krx_data['value'] / 1000000000000
-                result['foreign_bond'] = {
-                    "value": f"{val_trillion:.1f}조",
-                    "change": "",
-                    "percent": krx_data['percent'],
-                    "date": krx_data['date'],
-                    "next_date": ""
-                }
+                result['foreign_bond'] = Observation(
+                    float(krx_data['value']), scale="조", decimals=1,
+                    label=str(krx_data['percent']), timestamp=krx_data['date'],
+                )
     except Exception as e:
         print(f"[JOB] Error updating Foreign Bond data: {e}")
 
@@ -357,28 +424,23 @@ def get_daily_economy():
     result = {}
     
     # CCI (Consumer Confidence)
-    cci_url = os.getenv("INVESTING_CCI_URL", "https://kr.investing.com/economic-calendar/cb-consumer-confidence-48")
-    cci = crawler_service.fetch_investing_calendar_actual(cci_url, 48, 'CCI')
+    cci = get_calendar_event('cci')
     if cci: result['cci'] = cci
     
     # Unemployment
-    unem_url = os.getenv("INVESTING_UNEMPLOYMENT_URL", "https://kr.investing.com/economic-calendar/unemployment-rate-300")
-    unemp = crawler_service.fetch_investing_calendar_actual(unem_url, 300, 'Unemployment')
+    unemp = get_calendar_event('unemployment')
     if unemp: result['unemployment'] = unemp
     
     # Non-Farm
-    nfp_url = os.getenv("INVESTING_NFP_URL", "https://kr.investing.com/economic-calendar/nonfarm-payrolls-227")
-    nfp = crawler_service.fetch_investing_calendar_actual(nfp_url, 227, 'NFP')
+    nfp = get_calendar_event('non_farm')
     if nfp: result['non_farm'] = nfp
         
     # PMI
-    pmi_url = os.getenv("INVESTING_PMI_URL", "https://kr.investing.com/economic-calendar/ism-manufacturing-pmi-173")
-    pmi = crawler_service.fetch_investing_calendar_actual(pmi_url, 173, 'PMI')
+    pmi = get_calendar_event('pmi')
     if pmi: result['pmi'] = pmi
     
-    # High Yield Spread
-    hy_url = os.getenv("INDEXERGO_HIGH_YIELD_URL", "https://www.indexergo.com/series/?frq=M&idxDetail=13404")
-    high_yield = crawler_service.fetch_indexergo_data(hy_url, 'HighYield')
+    # High Yield Spread (shared with get_daily_stocks, which runs on the same cron)
+    high_yield = get_indexergo_high_yield()
     if high_yield:
          result['high_yield'] = high_yield
     
@@ -387,123 +449,239 @@ def get_daily_economy():
 
 # --- History Data (Charts) ---
 
-def get_history_values_yf(ticker, period="1y"):
+def get_history_values_yf(ticker):
     """
-    Fetches historical closing prices from yfinance.
+    Monthly closes for the last year, from the daily series shared with the
+    ticker's realtime quote (get_yf_daily).
     Returns: { 'dates': [str], 'values': [float] }
     """
-    try:
-        t = yf.Ticker(ticker)
-        # Fetch Monthly data
-        hist = t.history(period=period, interval="1mo", threads=False)
-        if hist.empty:
-            return None
-            
-        dates = [d.strftime('%Y-%m-%d') for d in hist.index]
-        values = [float(v) for v in hist['Close']]
+    daily = get_yf_daily(ticker, SHARED_DAILY_MAX_AGE_SEC)
+    return monthly_closes(daily) if daily is not None else None
+
+def history_frame_to_series(hist):
+    """
+    Converts a yfinance history DataFrame into { 'dates': [str], 'values': [float] }.
+    """
+    if hist.empty:
+        return None
         
-        return {'dates': dates, 'values': values}
-    except Exception as e:
-        print(f"[History] Error fetching {ticker}: {e}")
+    dates = []
+    values = []
+    for d, close in zip(hist.index, hist['Close']):
+        if close != close: continue  # NaN bar
+        dates.append(d.strftime('%Y-%m-%d'))
+        values.append(float(close))
+        
+    if not values:
+        return None
+    return {'dates': dates, 'values': values}
+
+def monthly_series(series, last=False):
+    """
+    Buckets a daily { 'dates', 'values' } series by month, dated the 1st like
+    yfinance's and FRED's monthly data: the month's last value (last=True,
+    a monthly close) or its mean (FRED's default monthly aggregation).
+    """
+    months = {}
+    for date, value in zip(series['dates'], series['values']):
+        months.setdefault(date[:7], []).append(value)
+    dates = [f"{month}-01" for month in months]
+    values = [v[-1] if last else sum(v) / len(v) for v in months.values()]
+    return {'dates': dates, 'values': values}
+
+def monthly_closes(records):
+    """
+    monthly_series(last=True) for SERIES_DTYPE records: each month's last
+    close, dated the 1st, found with one vectorized pass over the day column.
+    """
+    months = records['day'].astype('datetime64[D]').astype('datetime64[M]')
+    last = np.flatnonzero(np.append(months[1:] != months[:-1], True))
+    return {
+        'dates': [f"{month}-01" for month in months[last].astype(str).tolist()],
+        'values': records['value'][last].tolist(),
+    }
+
+def fetch_yahoo_chart(ticker, range_="1y", interval="1mo"):
+    """
+    Fetches Yahoo's chart JSON (the endpoint yfinance wraps) and returns chart.result[0].
+    """
+    url = YAHOO_CHART_URL.format(ticker=ticker)
+    headers = {"User-Agent": crawler_service.USER_AGENTS[0]}
+    resp = requests.get(crawler_service.upstream_url(url), params={"range": range_, "interval": interval}, headers=headers, timeout=budget_timeout(10))
+    resp.raise_for_status()
+    return resp.json()['chart']['result'][0]
+
+# Yahoo chart ranges and the days each one covers (the backfill asks for the smallest that suffices)
+YAHOO_RANGES = [("5d", 5), ("1mo", 28), ("3mo", 90), ("6mo", 180), ("1y", 365), ("2y", 730), ("5y", 1826), ("10y", 3652), ("max", None)]
+
+def fetch_yahoo_records(ticker, days):
+    """
+    Daily closes covering at least the last `days` days, as SERIES_DTYPE
+    records, for the history backfill (HTTP errors are raised).
+    """
+    range_ = next(name for name, span in YAHOO_RANGES if span is None or span >= days)
+    return parse_yahoo_chart_records(fetch_yahoo_chart(ticker, range_=range_, interval="1d"))
+
+def parse_yahoo_chart_records(chart):
+    """
+    Decodes a Yahoo chart result's timestamp and close arrays into
+    SERIES_DTYPE records (epoch day, close) without building per-bar
+    objects, dating each bar in the exchange's local time like yfinance does.
+    """
+    offset = chart['meta'].get('gmtoffset') or 0
+    timestamps = np.array(chart.get('timestamp') or [], dtype=np.int64)
+    closes = np.array(chart['indicators']['quote'][0]['close'][:len(timestamps)], dtype=np.float64)  # None -> NaN
+    timestamps = timestamps[:len(closes)]
+    keep = ~np.isnan(closes)
+    if not keep.any():
+        return None
+    records = np.empty(int(keep.sum()), dtype=SERIES_DTYPE)
+    records['day'] = (timestamps[keep] + offset) // 86400
+    records['value'] = closes[keep]
+    return records
+
+def parse_yahoo_chart_series(chart):
+    """
+    Converts a Yahoo chart result into { 'dates': [str], 'values': [float] }.
+    """
+    records = parse_yahoo_chart_records(chart)
+    if records is None:
         return None
+    return {
+        'dates': records['day'].astype('datetime64[D]').astype('U10').tolist(),
+        'values': records['value'].tolist(),
+    }
 
 def get_history_values_fred(series_id):
     """
-    Fetches historical data from FRED API (1 year).
+    Monthly averages of a FRED series for the last year, from the daily
+    observations shared with its realtime quote (get_fred_daily).
     Returns: { 'dates': [str], 'values': [float] }
     """
-    if not FRED_API_KEY:
+    daily = get_fred_daily(series_id, SHARED_DAILY_MAX_AGE_SEC)
+    return monthly_series(daily) if daily else None
+
+def get_fred_daily(series_id, max_age):
+    """Daily observations of the last ~13 months, { 'dates', 'values' }, shared through FETCH_CACHE."""
+    return FETCH_CACHE.get("fred", series_id, max_age, lambda: fetch_fred_daily(series_id))
+
+def fetch_fred_daily(series_id):
+    # The env var is read at call time too: main.py loads .env after importing this module
+    api_key = FRED_API_KEY or os.environ.get("FRED_API_KEY", "")
+    if not api_key:
         return None
         
     try:
         # approx 1 year + buffer
         start_date = (datetime.now() - timedelta(days=400)).strftime('%Y-%m-%d')
         
-        url = "https://api.stlouisfed.org/fred/series/observations"
+        url = FRED_OBSERVATIONS_URL
         params = {
             "series_id": series_id,
-            "api_key": FRED_API_KEY,
+            "api_key": api_key,
             "file_type": "json",
             "observation_start": start_date,
             "sort_order": "asc",
-            "frequency": "m"  # Monthly
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = requests.get(crawler_service.upstream_url(url), params=params, timeout=budget_timeout(10))
         response.raise_for_status()
-        data = response.json()
-        observations = data.get('observations', [])
-        
-        dates = []
-        values = []
-        
-        for obs in observations:
-            val = obs['value']
-            if val == '.': continue
-            dates.append(obs['date'])
-            values.append(float(val))
-            
-        return {'dates': dates, 'values': values}
+        series = parse_fred_history(response.json())
+        return series if series['values'] else None
     except Exception as e:
         print(f"[History] Error fetching FRED {series_id}: {e}")
         return None
 
-def get_fred_latest_two(series_id, series_name):
-    """Fetches the latest 2 valid data points from FRED to calculate change"""
-    api_key = os.environ.get("FRED_API_KEY")
+def fetch_fred_latest(series_id, limit=10):
+    """The latest `limit` observations (a few spare for missing '.' ones), oldest first, or None."""
+    api_key = FRED_API_KEY or os.environ.get("FRED_API_KEY", "")
     if not api_key:
-        print("FRED_API_KEY missing")
         return None
-        
-    url = "https://api.stlouisfed.org/fred/series/observations"
     params = {
         "series_id": series_id,
         "api_key": api_key,
         "file_type": "json",
         "sort_order": "desc",
-        "limit": 10  # Fetch more to handle missing dates ('.')
+        "limit": limit,
     }
-    
     try:
-        res = requests.get(url, params=params, timeout=10)
-        res.raise_for_status()
-        data = res.json()
-        
-        observations = data.get("observations", [])
-        valid_obs = [obs for obs in observations if obs["value"] != "."]
-        
-        if len(valid_obs) < 1:
-            return None
-            
-        current_val = float(valid_obs[0]["value"])
-        change_val = 0.0
-        change_pct = 0.0
-        
-        if len(valid_obs) >= 2:
-            prev_val = float(valid_obs[1]["value"])
-            change_val = current_val - prev_val
-            if prev_val != 0:
-                change_pct = (change_val / prev_val) * 100
-                
-        # Format
-        val_str = f"{current_val:.2f}"
-        
-        # Determine sign
-        sign = ""
-        if change_val > 0: sign = "+"
-        
-        change_str = f"{sign}{change_val:.2f}"
-        pct_str = f"{sign}{change_pct:.2f}%"
-        
-        return {
-            "value": val_str,
-            "change": change_str,
-            "percent": pct_str
-        }
-        
+        response = requests.get(crawler_service.upstream_url(FRED_OBSERVATIONS_URL), params=params, timeout=budget_timeout(10))
+        response.raise_for_status()
+        series = parse_fred_history(response.json())
     except Exception as e:
         print(f"Error fetching FRED {series_id}: {e}")
         return None
+    if not series['values']:
+        return None
+    return {'dates': series['dates'][::-1], 'values': series['values'][::-1]}
+
+def fetch_fred_records(series_id, start_date):
+    """
+    Daily FRED observations from start_date (YYYY-MM-DD) on, as SERIES_DTYPE
+    records, for the history backfill. HTTP and network errors are raised so
+    the caller can retry; None without FRED_API_KEY or observations.
+    """
+    api_key = FRED_API_KEY or os.environ.get("FRED_API_KEY", "")
+    if not api_key:
+        return None
+    params = {
+        "series_id": series_id,
+        "api_key": api_key,
+        "file_type": "json",
+        "observation_start": start_date,
+        "sort_order": "asc",
+    }
+    response = requests.get(crawler_service.upstream_url(FRED_OBSERVATIONS_URL), params=params, timeout=budget_timeout(30))
+    response.raise_for_status()
+    series = parse_fred_history(response.json())
+    return to_records(series) if series['values'] else None
+
+def parse_fred_history(data):
+    """
+    Parses a FRED observations payload into { 'dates': [str], 'values': [float] },
+    skipping missing ('.') observations.
+    """
+    observations = data.get('observations', [])
+    
+    dates = []
+    values = []
+    
+    for obs in observations:
+        val = obs['value']
+        if val == '.': continue
+        dates.append(obs['date'])
+        values.append(float(val))
+        
+    return {'dates': dates, 'values': values}
+
+def get_history_values_calendar(key):
+    """
+    Fetches a CALENDAR_EVENTS entry's page, merges its whole release history
+    (actual/forecast/previous) into EVENT_SERIES and returns the actuals as
+    { 'dates': [str], 'values': [float] }.
+    """
+    event_id, name, _, _ = CALENDAR_EVENTS[key]
+    releases = crawler_service.fetch_investing_calendar_history(calendar_event_url(key), event_id, name)
+    if releases:
+        EVENT_SERIES.merge(key, releases)
+    return EVENT_SERIES.chart(key)
+
+def get_fred_latest_two(series_id, series_name):
+    """
+    Latest FRED observation with its change from the one before: from the
+    chart's daily series when it was fetched within SHARED_REALTIME_MAX_AGE_SEC,
+    otherwise from a fetch of the latest few observations only.
+    """
+    daily = FETCH_CACHE.peek("fred", series_id, SHARED_REALTIME_MAX_AGE_SEC)
+    if daily is None:
+        daily = FETCH_CACHE.get("fred_latest", series_id, SHARED_REALTIME_MAX_AGE_SEC,
+                                lambda: fetch_fred_latest(series_id))
+    if not daily:
+        print(f"FRED {series_name}: no observations (FRED_API_KEY missing?)")
+        return None
+    values = daily['values']
+    prev_val = values[-2] if len(values) >= 2 else values[-1]
+    return with_change(Quote, values[-1], prev_val)
 
 
 def fetch_single_history(ticker_or_id, source):
@@ -515,6 +693,8 @@ def fetch_single_history(ticker_or_id, source):
             return get_history_values_yf(ticker_or_id)
         elif source == "fred":
             return get_history_values_fred(ticker_or_id)
+        elif source == "investing":
+            return get_history_values_calendar(ticker_or_id)
         return None
     except Exception as e:
         print(f"[History] Error fetching {ticker_or_id}: {e}")
@@ -532,8 +712,10 @@ def get_all_history_data():
         ("sp_chart", "ES=F", "yf"),
         ("dow_chart", "YM=F", "yf"),
         ("nasdaq_chart", "NQ=F", "yf"),
-        ("cci_chart", "UMCSENT", "fred"),
-        ("unem_chart", "UNRATE", "fred"),
+        ("cci_chart", "cci", "investing"),
+        ("unem_chart", "unemployment", "investing"),
+        ("pmi_chart", "pmi", "investing"),
+        ("non_farm_chart", "non_farm", "investing"),
         ("us10_chart", "DGS10", "fred"),
         ("us2_chart", "DGS2", "fred"),
         ("spread_chart", "T10Y2Y", "fred"),
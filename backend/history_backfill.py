@@ -0,0 +1,218 @@
+"""
+Parallel backfill of multi-year daily history into a series store.
+
+The chart jobs keep the last year of monthly points per chart; the backfill
+keeps the daily series behind them (and any extra BACKFILL_SERIES), up to
+BACKFILL_YEARS deep, in their own SeriesStore (DAILY_SERIES_DIR), served by
+/api/finance/history/{id}?interval=daily.
+
+Each upstream source gets its own worker pool, sized by its concurrency cap
+(BACKFILL_FRED_CONCURRENCY, BACKFILL_YF_CONCURRENCY), so FRED and Yahoo run
+in parallel without either exceeding what it tolerates. A fetch that fails
+with a network error or a 429/5xx is retried up to BACKFILL_RETRIES times
+after a full-jitter exponential backoff (a 429's Retry-After is honored), so
+parallel workers that fail together don't retry together. Each series is
+written to its file as soon as it arrives and dropped, so a pass holds at
+most one series per worker in memory however many series it covers.
+
+A series already in the store is only fetched from BACKFILL_OVERLAP_DAYS
+before its last stored day on, which makes the daily run cheap and lets a
+pass cut short by its job budget resume where it stopped. The refetched days
+overwrite the stored ones, so a bar stored before its session closed (an
+intraday value stamped with that day) is replaced by the close.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import requests
+
+import finance_service
+from job_executor import checkpoint
+
+BACKFILL_YEARS = int(os.getenv("BACKFILL_YEARS", "10"))
+BACKFILL_CONCURRENCY = {
+    "fred": int(os.getenv("BACKFILL_FRED_CONCURRENCY", "2")),
+    "yf": int(os.getenv("BACKFILL_YF_CONCURRENCY", "4")),
+}
+BACKFILL_RETRIES = int(os.getenv("BACKFILL_RETRIES", "3"))
+BACKFILL_BACKOFF_SEC = float(os.getenv("BACKFILL_BACKOFF_SEC", "1"))
+BACKFILL_BACKOFF_MAX_SEC = float(os.getenv("BACKFILL_BACKOFF_MAX_SEC", "30"))
+# Extra series beyond the charts' own, as source:ticker pairs (e.g. "fred:DGS5,yf:^GSPC")
+BACKFILL_SERIES = os.getenv("BACKFILL_SERIES", "")
+DAILY_SERIES_DIR = os.getenv("DAILY_SERIES_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "daily"))
+# Days before the last stored one that an incremental pass fetches again (covers a weekend)
+BACKFILL_OVERLAP_DAYS = int(os.getenv("BACKFILL_OVERLAP_DAYS", "3"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def today():
+    """Days since 1970-01-01 (UTC)."""
+    return int(time.time() // 86400)
+
+
+def _fetch_fred(ticker, start_day):
+    return finance_service.fetch_fred_records(ticker, str(np.datetime64(start_day, "D")))
+
+
+def _fetch_yf(ticker, start_day):
+    return finance_service.fetch_yahoo_records(ticker, today() - start_day + 1)
+
+
+# source -> fetch(ticker, start_day) returning SERIES_DTYPE records (or None)
+FETCHERS = {"fred": _fetch_fred, "yf": _fetch_yf}
+
+
+def parse_series(text):
+    """BACKFILL_SERIES -> [(series_id, ticker, source)]; the ticker doubles as the series id."""
+    tasks = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        source, _, ticker = item.partition(":")
+        if not ticker:
+            raise ValueError(f"BACKFILL_SERIES entry {item!r} is not source:ticker")
+        tasks.append((ticker, ticker, source))
+    return tasks
+
+
+def retryable(error):
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUSES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+class HistoryBackfill:
+    """Backfills (series_id, ticker, source) tasks into `store` with per-source pools and retries."""
+
+    def __init__(self, store, fetchers=None, concurrency=None, retries=BACKFILL_RETRIES,
+                 backoff=BACKFILL_BACKOFF_SEC, backoff_max=BACKFILL_BACKOFF_MAX_SEC, years=BACKFILL_YEARS,
+                 overlap=BACKFILL_OVERLAP_DAYS):
+        self.store = store
+        self.fetchers = fetchers or FETCHERS
+        self.concurrency = concurrency or BACKFILL_CONCURRENCY
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.years = years
+        self.overlap = overlap
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = dict.fromkeys(self.concurrency, 0)
+        self.counts = {"retries": 0, "max_in_flight": dict.fromkeys(self.concurrency, 0)}
+        self.last_run = None
+
+    def backoff_delay(self, attempt, error=None):
+        """Full jitter: uniform in [0, min(max, base * 2^attempt)], at least a 429's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            delay = max(delay, min(self.backoff_max, float(retry_after)))
+        return delay
+
+    def _fetch(self, source, ticker, start_day, result):
+        """The fetch with retries; None when it gave up (result says why)."""
+        error = None
+        for attempt in range(self.retries + 1):
+            if self._stop.is_set():
+                result["status"] = "cancelled"
+                return None
+            result["attempts"] = attempt + 1
+            with self._lock:
+                self._in_flight[source] += 1
+                self.counts["max_in_flight"][source] = max(self.counts["max_in_flight"][source], self._in_flight[source])
+            try:
+                return self.fetchers[source](ticker, start_day)
+            except Exception as e:
+                error = e
+                result["error"] = f"{type(e).__name__}: {e}"
+                if not retryable(e) or attempt == self.retries:
+                    result["status"] = "failed"
+                    return None
+                with self._lock:
+                    self.counts["retries"] += 1
+            finally:
+                with self._lock:
+                    self._in_flight[source] -= 1
+            # Interrupted early when the pass is cancelled
+            self._stop.wait(self.backoff_delay(attempt, error))
+        return None
+
+    def _backfill_one(self, series_id, ticker, source):
+        started = time.monotonic()
+        result = {"source": source, "status": "written", "attempts": 0}
+        try:
+            existing = self.store.open(series_id)
+        except KeyError:
+            existing = None
+        last = int(existing["day"][-1]) if existing is not None and len(existing) else None
+        # The last stored day is always refetched: it may hold a bar from before its session closed
+        start_day = last - self.overlap if last is not None else today() - self.years * 365
+
+        records = self._fetch(source, ticker, start_day, result)
+        if result["status"] != "written":
+            return result
+        if records is not None:
+            records = records[records["day"] >= start_day]
+        if records is None or not len(records):
+            result["status"] = "empty" if last is None else "current"
+            return result
+        new, revised = len(records), 0
+        if last is not None:
+            # Refetched days replace the stored ones; stored days the fetch didn't return are kept
+            overlap = np.isin(existing["day"], records["day"])
+            stored = existing[overlap]
+            refetched = records[np.isin(records["day"], stored["day"])]
+            new = len(records) - len(refetched)
+            revised = int(np.count_nonzero(stored["value"] != refetched["value"]))
+            if not new and not revised:
+                result["status"] = "current"
+                return result
+            records = np.concatenate([existing[~overlap], records])
+        self.store.write(series_id, records)
+        result.update(points=len(records), new=new, revised=revised, sec=round(time.monotonic() - started, 3))
+        return result
+
+    def run(self, tasks):
+        """Backfills every task; returns the pass report (also kept for report())."""
+        started = time.monotonic()
+        self._stop.clear()
+        self._in_flight = dict.fromkeys(self.concurrency, 0)
+        self.counts = {"retries": 0, "max_in_flight": dict.fromkeys(self.concurrency, 0)}
+        pools = {source: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"backfill-{source}")
+                 for source, n in self.concurrency.items()}
+        results, futures = {}, {}
+        try:
+            for series_id, ticker, source in tasks:
+                if source not in pools or source not in self.fetchers:
+                    results[series_id] = {"source": source, "status": "skipped", "error": "no backfill for this source"}
+                    continue
+                futures[pools[source].submit(self._backfill_one, series_id, ticker, source)] = series_id
+            pending = set(futures)
+            while pending:
+                # A scheduler job past its budget stops here; the workers stop before their next attempt
+                checkpoint()
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        statuses = [r["status"] for r in results.values()]
+        self.last_run = {
+            "finished_at": time.time(), "sec": round(time.monotonic() - started, 3),
+            **{status: statuses.count(status) for status in sorted(set(statuses))},
+            **self.counts, "series": results,
+        }
+        return self.last_run
+
+    def report(self):
+        """The last pass, for /api/jobs."""
+        return self.last_run
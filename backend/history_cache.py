@@ -0,0 +1,184 @@
+"""
+Size-bounded cache for the chart history series (CACHE["history"]).
+
+Each series is held as one NumPy structured array of (int32 epoch day,
+float64 value) records, 12 bytes a point instead of a date string plus a
+float object plus two list slots (~100 bytes). Every series is written
+through to a series_store.SeriesStore (one memory-mappable file per series),
+so only a working set has to stay in memory: hot series are kept in LRU
+order, and once they add up to more than HISTORY_CACHE_MAX_BYTES the least
+recently used ones are dropped from memory and read back through the store's
+memory map the next time they are asked for (which makes them hot again).
+Series stored by an earlier run are picked up at startup.
+
+HistoryCache is a MutableMapping of chart_id -> {'dates': [str], 'values':
+[float]}, so the history jobs keep their dict view of CACHE["history"].
+snapshot() gives the plain dict the JSON / columnar encoders and the shared
+store need, without promoting cold series.
+
+API workers open the collector's directory through a read-only store: the
+collector writes every series through before publishing, so replace() there
+only forgets what it held and re-lists the files instead of rewriting them.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from series_store import SERIES_DTYPE, SeriesStore
+
+HISTORY_CACHE_MAX_BYTES = int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# One point as Python lists: 'YYYY-MM-DD' str (59) + float (24) + two list slots (16)
+LIST_POINT_BYTES = 99
+
+
+def to_records(series):
+    """{ 'dates': [str], 'values': [float] } -> structured array of (day, value)."""
+    records = np.empty(len(series["dates"]), dtype=SERIES_DTYPE)
+    records["day"] = np.array([d[:10] for d in series["dates"]], dtype="datetime64[D]").astype("<i4")
+    records["value"] = series["values"]
+    return records
+
+
+def to_series(records):
+    """Inverse of to_records."""
+    return {
+        "dates": records["day"].astype("datetime64[D]").astype(str).tolist(),
+        "values": records["value"].tolist(),
+    }
+
+
+class HistoryCache(MutableMapping):
+    """chart_id -> series, hot in memory up to max_bytes (LRU), every series on disk in `store`."""
+
+    def __init__(self, max_bytes=HISTORY_CACHE_MAX_BYTES, store=None):
+        self.max_bytes = max_bytes
+        self.store = store if store is not None else SeriesStore()
+        self._hot = OrderedDict()  # least recently used first
+        self._cold = set(self.store.ids())
+        self._hot_bytes = 0
+        self._lock = threading.RLock()
+        self.counts = {"hot_hits": 0, "disk_reads": 0, "evictions": 0}
+
+    # --- MutableMapping ---
+
+    def __getitem__(self, chart_id):
+        return to_series(self.records(chart_id))
+
+    def __setitem__(self, chart_id, series):
+        records = to_records(series)
+        with self._lock:
+            self.store.write(chart_id, records)
+            self._forget(chart_id)
+            self._hot[chart_id] = records
+            self._hot_bytes += records.nbytes
+            self._shrink()
+
+    def __delitem__(self, chart_id):
+        with self._lock:
+            if chart_id not in self:
+                raise KeyError(chart_id)
+            self._forget(chart_id)
+            self.store.delete(chart_id)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._hot) + sorted(self._cold))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._hot) + len(self._cold)
+
+    def __contains__(self, chart_id):
+        with self._lock:
+            return chart_id in self._hot or chart_id in self._cold
+
+    # --- Cache ---
+
+    def records(self, chart_id):
+        """The series' (day, value) records, promoting it to the hot set."""
+        with self._lock:
+            records = self._hot.get(chart_id)
+            if records is not None:
+                self._hot.move_to_end(chart_id)
+                self.counts["hot_hits"] += 1
+                return records
+            if chart_id not in self._cold:
+                raise KeyError(chart_id)
+            records = np.array(self.store.open(chart_id))
+            self._cold.discard(chart_id)
+            self.counts["disk_reads"] += 1
+            self._hot[chart_id] = records
+            self._hot_bytes += records.nbytes
+            self._shrink()
+            return records
+
+    def replace(self, data):
+        """Loads a whole { chart_id: series } snapshot (API workers syncing from the shared store)."""
+        with self._lock:
+            if self.store.read_only:
+                self._hot.clear()
+                self._hot_bytes = 0
+                self._cold = set(self.store.ids())
+                missing = sorted(set(data) - self._cold)
+                if missing:
+                    print(f"[HistoryCache] {len(missing)} published series not in {self.store.root} "
+                          f"(is SERIES_STORE_DIR the collector's?): {missing[:5]}")
+                return
+            for chart_id in [c for c in self if c not in data]:
+                del self[chart_id]
+            for chart_id, series in data.items():
+                self[chart_id] = series
+
+    def snapshot(self):
+        """Plain { chart_id: series } of every series; cold ones are read through the store's map, not promoted."""
+        with self._lock:
+            result = {chart_id: to_series(records) for chart_id, records in self._hot.items()}
+            for chart_id in sorted(self._cold):
+                result[chart_id] = to_series(self.store.open(chart_id))
+            return result
+
+    def _forget(self, chart_id):
+        records = self._hot.pop(chart_id, None)
+        if records is not None:
+            self._hot_bytes -= records.nbytes
+        self._cold.discard(chart_id)
+
+    def _shrink(self):
+        """Drops least recently used series from memory until the hot set fits (the most recent one always stays)."""
+        while self._hot_bytes > self.max_bytes and len(self._hot) > 1:
+            chart_id, records = self._hot.popitem(last=False)
+            self._cold.add(chart_id)
+            self._hot_bytes -= records.nbytes
+            self.counts["evictions"] += 1
+
+    def report(self):
+        """Estimated bytes per series (and what the same points cost as Python lists), for the admin endpoint."""
+        with self._lock:
+            series = {}
+            for chart_id, records in reversed(self._hot.items()):
+                series[chart_id] = {
+                    "tier": "memory", "points": len(records),
+                    "bytes": sys.getsizeof(records),  # buffer + array header (the cache owns its buffers)
+                    "list_bytes": len(records) * LIST_POINT_BYTES,
+                }
+            for chart_id in sorted(self._cold):
+                file_bytes = self.store.file_bytes(chart_id)
+                points = file_bytes // SERIES_DTYPE.itemsize
+                series[chart_id] = {
+                    "tier": "disk", "points": points, "bytes": 0,
+                    "list_bytes": points * LIST_POINT_BYTES,
+                }
+            for chart_id in series:
+                series[chart_id]["file_bytes"] = self.store.file_bytes(chart_id)
+            return {
+                "max_bytes": self.max_bytes,
+                "memory_bytes": self._hot_bytes,
+                "disk_bytes": sum(s["file_bytes"] for s in series.values()),
+                **self.counts,
+                "series": series,
+            }
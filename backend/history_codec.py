@@ -0,0 +1,103 @@
+"""
+Columnar binary encoding for the /api/finance/history payload.
+
+Layout (little-endian), decoded by decodeHistoryColumns() in index.html:
+
+    header   "USAH" | u16 series count
+    series   u8 id length | id (utf-8) | u32 point count n | i32 first epoch day
+             | n-1 zigzag varint day deltas | zero padding to a 4-byte boundary
+             | n float32 values
+
+Dates become days since 1970-01-01, so a year of daily points costs ~1 byte of
+date and 4 bytes of value per point instead of ~25 bytes of JSON.
+"""
+import struct
+from array import array
+from datetime import date, timedelta
+
+MAGIC = b"USAH"
+MEDIA_TYPE = "application/x-usa-invest-history"
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+# array("f") is native-endian; the wire format is little-endian
+_BIG_ENDIAN = struct.pack("=H", 1) == b"\x00\x01"
+
+
+def _epoch_day(iso_date):
+    return date.fromisoformat(iso_date[:10]).toordinal() - EPOCH_ORDINAL
+
+
+def _write_varint(out, value):
+    zigzag = (value << 1) ^ (value >> 63)
+    while zigzag >= 0x80:
+        out.append((zigzag & 0x7F) | 0x80)
+        zigzag >>= 7
+    out.append(zigzag)
+
+
+def _read_varint(buf, pos):
+    shift = result = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), pos
+
+
+def encode_history(history):
+    """Encodes { chart_id: {'dates': [str], 'values': [float]} } into the columnar format."""
+    series = [(cid, s) for cid, s in history.items() if s and s.get("dates")]
+    out = bytearray(MAGIC)
+    out += struct.pack("<H", len(series))
+    for cid, s in series:
+        days = [_epoch_day(d) for d in s["dates"]]
+        name = cid.encode("utf-8")
+        out += struct.pack("<B", len(name)) + name
+        out += struct.pack("<Ii", len(days), days[0])
+        prev = days[0]
+        for day in days[1:]:
+            _write_varint(out, day - prev)
+            prev = day
+        out += b"\x00" * (-len(out) % 4)  # lets the browser view the values as a Float32Array
+        values = array("f", s["values"])
+        if _BIG_ENDIAN:
+            values.byteswap()
+        out += values.tobytes()
+    return bytes(out)
+
+
+def decode_history(payload):
+    """Inverse of encode_history (dates come back as 'YYYY-MM-DD', values as float32-rounded floats)."""
+    if payload[:4] != MAGIC:
+        raise ValueError("Not a columnar history payload")
+    buf = memoryview(payload)
+    (count,) = struct.unpack_from("<H", buf, 4)
+    pos = 6
+    history = {}
+    for _ in range(count):
+        name_len = buf[pos]
+        cid = bytes(buf[pos + 1:pos + 1 + name_len]).decode("utf-8")
+        pos += 1 + name_len
+        n, day = struct.unpack_from("<Ii", buf, pos)
+        pos += 8
+        days = [day]
+        for _ in range(n - 1):
+            delta, pos = _read_varint(buf, pos)
+            day += delta
+            days.append(day)
+        pos += -pos % 4
+        values = array("f")
+        values.frombytes(buf[pos:pos + 4 * n])
+        if _BIG_ENDIAN:
+            values.byteswap()
+        pos += 4 * n
+        history[cid] = {
+            "dates": [(EPOCH + timedelta(days=d)).isoformat() for d in days],
+            "values": values.tolist(),
+        }
+    return history
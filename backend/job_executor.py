@@ -0,0 +1,242 @@
+"""
+APScheduler executor with priority classes and per-job wall-clock budgets.
+
+The default thread pool runs jobs in submission order, so a slow daily crawl
+at 00:00 could hold the workers the 30-second realtime job needs. Here every
+job is classified (realtime > history > daily) and queued by class:
+    - JOB_WORKERS threads take the highest class first; JOB_REALTIME_RESERVED
+      of them only ever run realtime jobs, so daily and history work can
+      never occupy every worker
+    - each run gets its class's budget (JOB_BUDGET_<CLASS>_SEC). Past it the
+      run is cancelled cooperatively: checkpoint() raises JobCancelled at the
+      next outbound request (crawler_transport, fetch_cache), and request
+      timeouts are capped to what is left of the budget (budget_timeout)
+    - a run that still hasn't returned JOB_CANCEL_GRACE_SEC after its budget
+      is abandoned: its worker is replaced so the pool keeps its size, and the
+      job stays counted against max_instances until the thread really ends
+Queue depth, waits and cancellations per class are reported on /api/jobs.
+The job running on each worker thread is exposed for the sampling profiler
+(thread_jobs), and runs go through an optional profiles.run hook (per-job
+cProfile capture, profiler.JobProfiles).
+"""
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+
+from apscheduler.executors.base import BaseExecutor, run_job
+
+PRIORITIES = ("realtime", "history", "daily")  # highest first
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "3"))
+JOB_REALTIME_RESERVED = int(os.getenv("JOB_REALTIME_RESERVED", "1"))
+# Wall-clock budgets are about upstream round trips, so SCHEDULE_SPEEDUP doesn't scale them
+JOB_BUDGETS = {
+    "realtime": float(os.getenv("JOB_BUDGET_REALTIME_SEC", "25")),
+    "history": float(os.getenv("JOB_BUDGET_HISTORY_SEC", "120")),
+    "daily": float(os.getenv("JOB_BUDGET_DAILY_SEC", "600")),
+}
+JOB_CANCEL_GRACE_SEC = float(os.getenv("JOB_CANCEL_GRACE_SEC", "10"))
+# Shortest timeout budget_timeout() hands out, so a nearly spent budget still allows one quick request
+MIN_REQUEST_TIMEOUT_SEC = 1.0
+
+_local = threading.local()
+
+
+class JobCancelled(BaseException):
+    """
+    Raised by checkpoint() once the running job has used up its budget. A
+    BaseException, like KeyboardInterrupt, so the fetchers' `except Exception`
+    fallbacks don't swallow it and carry on with the next request.
+    """
+
+
+class _Run:
+    """One job run on a worker: its deadline and cancellation state."""
+
+    __slots__ = ("job_id", "priority", "budget", "started", "deadline", "cancelled", "abandoned", "thread")
+
+    def __init__(self, job_id, priority, budget):
+        self.job_id = job_id
+        self.priority = priority
+        self.budget = budget
+        self.started = time.monotonic()
+        self.deadline = self.started + budget if budget else None
+        self.cancelled = threading.Event()
+        self.abandoned = False
+        self.thread = None
+
+
+def checkpoint():
+    """Raises JobCancelled if the current job's budget is spent (no-op outside executor jobs)."""
+    run = getattr(_local, "run", None)
+    if run is not None and run.cancelled.is_set():
+        raise JobCancelled(f"{run.job_id} exceeded its {run.budget:g}s budget")
+
+
+def budget_timeout(timeout):
+    """A requests timeout capped to the rest of the current job's budget (unchanged outside jobs)."""
+    run = getattr(_local, "run", None)
+    if run is None or run.deadline is None:
+        return timeout
+    left = max(run.deadline - time.monotonic(), MIN_REQUEST_TIMEOUT_SEC)
+    if timeout is None:
+        return left
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    return min(timeout, left)
+
+
+class PriorityExecutor(BaseExecutor):
+    """Runs jobs classified by classify(job_id) -> one of PRIORITIES, highest class first."""
+
+    def __init__(self, classify, workers=JOB_WORKERS, reserved=JOB_REALTIME_RESERVED, budgets=None,
+                 grace=JOB_CANCEL_GRACE_SEC, profiles=None):
+        super().__init__()
+        self.classify = classify
+        self.profiles = profiles
+        self.reserved = reserved
+        self.workers = max(workers, reserved + 1)
+        self.budgets = {**JOB_BUDGETS, **(budgets or {})}
+        self.grace = grace
+        self._cond = threading.Condition()
+        self._queue = []  # heap of (class rank, sequence, queued_at, priority, job, run_times)
+        self._seq = itertools.count()
+        self._running = set()
+        self._threads = []
+        self._stopped = True
+        self.stats = {p: {"queued": 0, "max_queued": 0, "running": 0, "completed": 0, "cancelled": 0,
+                          "abandoned": 0, "last_wait_ms": None, "max_wait_ms": 0.0} for p in PRIORITIES}
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        with self._cond:
+            self._stopped = False
+            for _ in range(self.workers):
+                self._spawn()
+        threading.Thread(target=self._watchdog, name="job-watchdog", daemon=True).start()
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._stopped = True
+            self._queue.clear()
+            for stats in self.stats.values():
+                stats["queued"] = 0
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _spawn(self):
+        thread = threading.Thread(target=self._worker, name=f"job-worker-{len(self._threads)}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _do_submit_job(self, job, run_times):
+        priority = self.classify(job.id)
+        with self._cond:
+            heapq.heappush(self._queue, (PRIORITIES.index(priority), next(self._seq), time.monotonic(),
+                                         priority, job, run_times))
+            stats = self.stats[priority]
+            stats["queued"] += 1
+            stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+            self._cond.notify_all()
+
+    def _next(self):
+        """Pops the next runnable job: realtime always, lower classes only outside the reserved workers."""
+        if not self._queue:
+            return None
+        priority = self._queue[0][3]
+        if priority != "realtime":
+            busy = sum(1 for run in self._running if run.priority != "realtime" and not run.abandoned)
+            if busy >= self.workers - self.reserved:
+                return None
+        _, _, queued_at, priority, job, run_times = heapq.heappop(self._queue)
+        stats = self.stats[priority]
+        stats["queued"] -= 1
+        stats["running"] += 1
+        wait_ms = round((time.monotonic() - queued_at) * 1000, 1)
+        stats["last_wait_ms"] = wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        run = _Run(job.id, priority, self.budgets.get(priority))
+        self._running.add(run)
+        return run, job, run_times
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                picked = self._next()
+                while picked is None:
+                    if self._stopped:
+                        self._threads.remove(threading.current_thread())
+                        return
+                    self._cond.wait()
+                    picked = self._next()
+            run, job, run_times = picked
+
+            _local.run = run
+            run.thread = threading.get_ident()
+            try:
+                if self.profiles is not None:
+                    events = self.profiles.run(job.id, run_job, job, job._jobstore_alias, run_times, self._logger.name)
+                else:
+                    events = run_job(job, job._jobstore_alias, run_times, self._logger.name)
+            except BaseException:
+                self._run_job_error(job.id, *sys.exc_info()[1:])
+            else:
+                self._run_job_success(job.id, events)
+            finally:
+                _local.run = None
+
+            with self._cond:
+                self._running.discard(run)
+                stats = self.stats[run.priority]
+                stats["running"] -= 1
+                stats["cancelled" if run.cancelled.is_set() else "completed"] += 1
+                self._cond.notify_all()
+                if run.abandoned:
+                    # A replacement took this worker's place when the run was abandoned
+                    self._threads.remove(threading.current_thread())
+                    return
+
+    def _watchdog(self):
+        """Cancels runs past their budget and abandons those still going after the grace period."""
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                for run in list(self._running):
+                    if run.deadline is None or now < run.deadline:
+                        continue
+                    if not run.cancelled.is_set():
+                        run.cancelled.set()
+                        print(f"[Executor] {run.job_id} exceeded its {run.budget:g}s budget, cancelling")
+                    elif not run.abandoned and now >= run.deadline + self.grace:
+                        run.abandoned = True
+                        self.stats[run.priority]["abandoned"] += 1
+                        print(f"[Executor] {run.job_id} ignored cancellation, replacing its worker")
+                        self._spawn()
+                        self._cond.notify_all()
+            time.sleep(0.1)
+
+    def thread_jobs(self):
+        """{thread ident: job id} of the runs in progress (sampling profiler roots)."""
+        with self._cond:
+            return {run.thread: run.job_id for run in self._running if run.thread is not None}
+
+    def report(self):
+        """Queue depth, waits and outcomes per class plus the runs in progress, for /api/jobs."""
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "workers": self.workers, "reserved_realtime": self.reserved, "budgets": self.budgets,
+                "classes": {p: dict(stats) for p, stats in self.stats.items()},
+                "running": [{
+                    "job": run.job_id, "class": run.priority, "elapsed_sec": round(now - run.started, 1),
+                    "cancelled": run.cancelled.is_set(), "abandoned": run.abandoned,
+                } for run in sorted(self._running, key=lambda r: r.started)],
+            }
@@ -0,0 +1,92 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class LeaderLease:
+    """
+    Lease-based leader election on a SQLite table (same file as the shared store).
+    A replica holds the lease while it keeps renewing it; once the holder stops
+    renewing for `ttl` seconds, the next replica to try takes over.
+
+    is_leader is judged locally: each successful acquire/renew sets a monotonic
+    deadline of (time of the attempt + ttl - margin), and the replica stops
+    counting itself leader once it passes, even if a renewal stalls. The margin
+    makes it step down before a follower, on its own clock, sees the lease expire.
+    """
+
+    def __init__(self, path, name="scheduler", ttl=20.0, margin=None):
+        self.path = path
+        self.name = name
+        self.ttl = ttl
+        self.margin = ttl * 0.2 if margin is None else margin
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._deadline = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leader_lease ("
+            " name TEXT PRIMARY KEY,"
+            " holder TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+
+    @property
+    def is_leader(self):
+        """True until the local deadline of the last successful acquire/renew passes."""
+        return time.monotonic() < self._deadline
+
+    def try_acquire(self):
+        """Acquires or renews the lease. Returns True while this replica is the leader."""
+        now = time.time()
+        started = time.monotonic()
+        with self._lock:
+            try:
+                # BEGIN IMMEDIATE takes the write lock up front so two replicas can't both win
+                self._conn.execute("BEGIN IMMEDIATE")
+                row = self._conn.execute(
+                    "SELECT holder, expires_at FROM leader_lease WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is None or row[0] == self.holder or row[1] < now:
+                    self._conn.execute(
+                        "INSERT INTO leader_lease (name, holder, expires_at) VALUES (?, ?, ?)"
+                        " ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at",
+                        (self.name, self.holder, now + self.ttl),
+                    )
+                    self._conn.execute("COMMIT")
+                    self._deadline = started + self.ttl - self.margin
+                else:
+                    self._conn.execute("COMMIT")
+                    self._deadline = 0.0
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                print(f"[Leader] Lease check failed: {e}")
+                # Can't prove we still hold it: step down rather than risk two leaders
+                self._deadline = 0.0
+            return self.is_leader
+
+    def release(self):
+        """Gives the lease up immediately (graceful shutdown) so a follower takes over at its next try."""
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "DELETE FROM leader_lease WHERE name = ? AND holder = ?", (self.name, self.holder)
+                )
+            except sqlite3.Error as e:
+                print(f"[Leader] Lease release failed: {e}")
+            self._deadline = 0.0
+
+    def current_holder(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT holder, expires_at FROM leader_lease WHERE name = ?", (self.name,)
+            ).fetchone()
+        if not row or row[1] < time.time():
+            return None
+        return row[0]
@@ -1,14 +1,44 @@
 from fastapi import FastAPI
-from fastapi import Response
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 from datetime import datetime, timedelta
 import uvicorn
 import finance_service
-from fastapi.staticfiles import StaticFiles
+from shared_store import SharedStore
+from leader_election import LeaderLease
+from compression import PayloadCache, PublicFiles, asset_response, build_index_assets, encode_json
+import history_codec
+from history_cache import HistoryCache
+import series_store
+from series_store import SeriesStore
+import history_backfill
+from history_backfill import HistoryBackfill
+from market_hours import AdaptivePoller, CLOSED_POLL_SEC
+from event_series import EVENT_SERIES
+from crawler_transport import TRANSPORT
+import source_adapters
+from fetch_cache import FETCH_CACHE
+import quote_engine
+from quote_engine import QuoteEngine
+from quotes import Quote
+from job_executor import PriorityExecutor
+import profiler
+from profiler import JobProfiles
+import snapshot_log
+from snapshot_log import SnapshotLog
+import alert_engine
+from alert_engine import AlertEngine, SseSink, WebhookSink
+from durable_cache import WriteBehindStore
 import os
 import sys
+import json
 import time
+import threading
+import functools
+import hmac
 from dotenv import load_dotenv
 
 # Load .env
@@ -27,13 +57,58 @@ CACHE = {
     "economy": {},
     "rates": {},
     "exchange": {},
-    # [NEW] History Cache
-    "history": {}
+    # [NEW] History Cache (size-bounded, backed by memory-mapped series files: history_cache.py, series_store.py)
+    "history": HistoryCache(),
+    # Economic event release history + surprise metrics (event_series.py)
+    "events": {}
 }
 
+# Bumped whenever a category's content changes; keys the pre-serialized payloads
+CACHE_VERSIONS = {}
+PAYLOADS = PayloadCache()
+
 LAST_UPDATE = { "stocks": None }
 NEXT_UPDATE = { "stocks": None }
 
+# Load testing: run every schedule N times faster (pair with UPSTREAM_BASE_URL)
+SCHEDULE_SPEEDUP = float(os.getenv("SCHEDULE_SPEEDUP", "1"))
+
+def scaled(seconds):
+    """Scales a schedule interval/delay by SCHEDULE_SPEEDUP."""
+    return seconds / SCHEDULE_SPEEDUP
+
+# Per-job run counters and durations (see /api/jobs)
+JOB_STATS = {}
+
+# Deployment role:
+#   standalone (default) - scheduler + in-process cache in a single process
+#   collector            - scheduler only, publishes every cache change to the shared store
+#   api                  - no scheduler, serves the collector's snapshot (any number of workers)
+#   replica              - every instance schedules, only the lease holder runs jobs and publishes;
+#                          followers serve the shared snapshot like api workers
+APP_ROLE = os.getenv("APP_ROLE", "standalone").lower()
+SHARED_STORE_POLL_SEC = float(os.getenv("SHARED_STORE_POLL_SEC", "1"))
+shared_store = SharedStore() if APP_ROLE in ("collector", "api", "replica") else None
+
+# Replica role: lease expires well inside one realtime interval (30s) so failover is quick
+LEADER_LEASE_TTL_SEC = float(os.getenv("LEADER_LEASE_TTL_SEC", scaled(20)))
+LEADER_RENEW_SEC = float(os.getenv("LEADER_RENEW_SEC", scaled(5)))
+leader_lease = LeaderLease(shared_store.path, ttl=LEADER_LEASE_TTL_SEC) if APP_ROLE == "replica" else None
+
+# API workers read the series files the collector writes, never write them
+if APP_ROLE == "api":
+    CACHE["history"] = HistoryCache(store=SeriesStore(read_only=True))
+
+# Processes that run jobs persist cache changes write-behind and reload them on boot (durable_cache.py)
+durable_cache = WriteBehindStore() if APP_ROLE != "api" else None
+
+# API workers: store version loaded per category, and the collector's timer and watchlist quotes
+STORE_VERSIONS = {}
+SHARED_TIMER = {}
+SHARED_QUOTES = {}
+_store_sync_lock = threading.Lock()
+_last_store_sync = 0.0
+
 scheduler = BackgroundScheduler(timezone="Asia/Seoul")
 
 # Enable CORS for frontend access
@@ -45,24 +120,195 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def normalized(entry):
+    """Comparable form of a cache entry (strings stripped) so formatting noise isn't a change."""
+    if isinstance(entry, dict):
+        return {k: normalized(v) for k, v in entry.items()}
+    if isinstance(entry, str):
+        return entry.strip()
+    return entry
+
+def changed_keys(category, new_data):
+    """Keys of new_data whose normalized value differs from what the cache already holds."""
+    current = CACHE[category]
+    return [key for key, value in new_data.items()
+            if key not in current or normalized(current[key]) != normalized(value)]
+
 def safe_update_cache(category, new_data):
-    """Updates the cache category with new keys, preserving existing ones."""
-    if new_data:
-        CACHE[category].update(new_data)
+    """
+    Updates the cache category with new keys, preserving existing ones.
+    Only changed keys are written; the version bump, re-serialization and publish
+    are skipped entirely when nothing changed. Returns the list of changed keys.
+    """
+    if not new_data:
+        return []
+    changed = changed_keys(category, new_data)
+    if changed:
+        changes = {key: new_data[key] for key in changed}
+        CACHE[category].update(changes)
+        persist_change(category, changes)
+        bump_version(category)
+        publish_category(category)
+        archive_change(category, changes)
+        evaluate_alerts(category, changes)
         import gc
         gc.collect() # Force free memory after data update
+    return changed
+
+def wire_data(data):
+    """Plain JSON-able form of a cache category (the history cache hands out a dict snapshot)."""
+    return data.snapshot() if isinstance(data, HistoryCache) else data
+
+def bump_version(category):
+    CACHE_VERSIONS[category] = CACHE_VERSIONS.get(category, 0) + 1
+
+def is_publisher():
+    """True for the process that owns the data: the collector, or the replica holding the lease."""
+    return APP_ROLE == "collector" or (APP_ROLE == "replica" and leader_lease.is_leader)
+
+def serves_shared_snapshot():
+    """True for processes that serve the shared store instead of their own jobs' results."""
+    return APP_ROLE == "api" or (APP_ROLE == "replica" and not leader_lease.is_leader)
+
+def publish_category(category):
+    """Collector / leader: pushes the category snapshot to the shared store for the other workers."""
+    if not is_publisher():
+        return
+    try:
+        shared_store.publish(category, wire_data(CACHE[category]))
+    except Exception as e:
+        print(f"[ERROR] publish_category ({category}): {e}")
+
+def persist_change(category, changes):
+    """Queues a cache change for the write-behind store (the flush happens on its own thread)."""
+    if durable_cache and not serves_shared_snapshot():
+        durable_cache.enqueue(category, changes)
+
+def restore_cache():
+    """Boot: seeds CACHE with the values persisted before the restart (history reloads from the series store)."""
+    try:
+        restored = durable_cache.load()
+    except Exception as e:
+        print(f"[ERROR] restore_cache: {e}")
+        return
+    for category, entries in restored.items():
+        if category not in CACHE or category == "history":
+            continue
+        CACHE[category].update(entries)
+        bump_version(category)
+        publish_category(category)
+    if restored:
+        print(f"[Cache] Restored {sum(len(e) for e in restored.values())} entries from {durable_cache.path}")
+
+def archive_change(category, changes):
+    """Appends a cache change to the snapshot log (/api/finance/at); API workers only read it."""
+    if serves_shared_snapshot():
+        return
+    try:
+        SNAPSHOTS.append(category, changes, lambda: wire_data(CACHE[category]))
+    except Exception as e:
+        print(f"[ERROR] archive_change ({category}): {e}")
+
+def evaluate_alerts(category, changes):
+    """Runs the alert rules on the keys that changed; API workers don't run jobs, so they don't evaluate."""
+    if serves_shared_snapshot():
+        return
+    try:
+        ALERTS.evaluate(category, changes)
+    except Exception as e:
+        print(f"[ERROR] evaluate_alerts ({category}): {e}")
+
+def sync_from_store(force=False):
+    """
+    API workers: reloads categories whose shared-store version moved.
+    Polls at most every SHARED_STORE_POLL_SEC; concurrent requests skip instead of waiting.
+    """
+    global _last_store_sync
+    if not force and time.monotonic() - _last_store_sync < SHARED_STORE_POLL_SEC:
+        return
+    if not _store_sync_lock.acquire(blocking=force):
+        return
+    try:
+        _last_store_sync = time.monotonic()
+        for category, version in shared_store.versions().items():
+            if STORE_VERSIONS.get(category) == version:
+                continue
+            version, data = shared_store.load(category)
+            if category in ("timer", "quotes"):
+                shared = SHARED_TIMER if category == "timer" else SHARED_QUOTES
+                shared.clear()
+                shared.update(data)
+            elif category == "history":
+                CACHE["history"].replace(data)
+                bump_version(category)
+            else:
+                CACHE[category] = data
+                bump_version(category)
+            STORE_VERSIONS[category] = version
+    except Exception as e:
+        print(f"[ERROR] sync_from_store: {e}")
+    finally:
+        _store_sync_lock.release()
+
+def read_cache(category):
+    """Returns a cache category, refreshed from the shared store on API workers."""
+    if serves_shared_snapshot():
+        sync_from_store()
+    return CACHE[category]
+
+def cached_json_response(category, request):
+    """Serves a category from its pre-serialized, pre-compressed payload for the current version."""
+    data = read_cache(category)
+    return asset_response(
+        PAYLOADS.get(category, CACHE_VERSIONS.get(category, 0), data, encoder=lambda d: encode_json(wire_data(d))),
+        request,
+    )
 
 # --- Stocks Jobs ---
 
+REALTIME_STOCKS_SEC = 30
+REALTIME_RATES_SEC = 300
+REALTIME_EXCHANGE_SEC = 300
+
+# Per-instrument trading calendars: each run only fetches instruments whose market
+# trades (or that are due for their slow closed-market poll)
+realtime_poller = AdaptivePoller(
+    {key: (category, calendar) for key, (category, calendar, _) in finance_service.REALTIME_INSTRUMENTS.items()},
+    {"stocks": scaled(REALTIME_STOCKS_SEC), "rates": scaled(REALTIME_RATES_SEC), "exchange": scaled(REALTIME_EXCHANGE_SEC)},
+    closed_sec=scaled(CLOSED_POLL_SEC),
+)
+
+# Every cache change, appended per day for point-in-time reads (/api/finance/at)
+SNAPSHOTS = SnapshotLog()
+
+# Threshold / crossing alerts on the changed keys of each cache update (/api/alerts/*)
+ALERT_SSE = SseSink()
+ALERTS = AlertEngine([ALERT_SSE] + ([WebhookSink()] if alert_engine.ALERT_WEBHOOK_URL else []))
+for _rule in filter(None, (r.strip() for r in alert_engine.ALERT_RULES.split(";"))):
+    ALERTS.add(_rule, sinks=tuple(ALERTS.sinks))
+
+# User watchlists (/api/quotes): one symbol table and upstream batch per interval for all users.
+# With a shared store only the publisher's engine fetches; API workers record leases in the store.
+QUOTE_ENGINE = QuoteEngine(finance_service.fetch_quotes_batch)
+# API workers: (client, symbol) -> when its lease was last written to the store
+_quote_leases = {}
+
+def fetch_due_realtime(category):
+    """Fetches the category's instruments that the poller says are due (nothing if none are)."""
+    keys = realtime_poller.due(category)
+    return finance_service.fetch_realtime(category, keys) if keys else {}
+
 def update_realtime_stocks_job():
     try:
         # print("[JOB] Updating stocks realtime (30 sec)")
-        data = finance_service.get_realtime_stocks()
+        data = fetch_due_realtime("stocks")
         safe_update_cache("stocks", data)
 
         now = datetime.now()
         LAST_UPDATE["stocks"] = now
-        NEXT_UPDATE["stocks"] = now + timedelta(seconds=30)
+        NEXT_UPDATE["stocks"] = now + timedelta(seconds=scaled(REALTIME_STOCKS_SEC))
+        if is_publisher():
+            shared_store.publish("timer", api_timer())
     except Exception as e:
         print("[ERROR] update_realtime_stocks_job:", e)
 
@@ -78,7 +324,7 @@ def update_daily_stocks_job():
 
 def update_realtime_rates_job():
     # print("[JOB] Updating rates realtime (5 min)")
-    data = finance_service.get_realtime_rates()
+    data = fetch_due_realtime("rates")
     safe_update_cache("rates", data)
 
 def update_daily_rates_job():
@@ -90,7 +336,7 @@ def update_daily_rates_job():
 
 def update_realtime_exchange_job():
     # print("[JOB] Updating exchange realtime (5 min)")
-    data = finance_service.get_realtime_exchange()
+    data = fetch_due_realtime("exchange")
     safe_update_cache("exchange", data)
 
 def update_daily_exchange_job():
@@ -112,8 +358,11 @@ HISTORY_TASKS = [
     ("sp_chart", "ES=F", "yf"),
     ("dow_chart", "YM=F", "yf"),
     ("nasdaq_chart", "NQ=F", "yf"),
-    ("cci_chart", "UMCSENT", "fred"),
-    ("unem_chart", "UNRATE", "fred"),
+    # Economic events: the Investing.com pages' release history (also feeds /api/finance/events)
+    ("cci_chart", "cci", "investing"),
+    ("unem_chart", "unemployment", "investing"),
+    ("pmi_chart", "pmi", "investing"),
+    ("non_farm_chart", "non_farm", "investing"),
     ("us10_chart", "DGS10", "fred"),
     ("us2_chart", "DGS2", "fred"),
     ("spread_chart", "T10Y2Y", "fred"),
@@ -121,15 +370,34 @@ HISTORY_TASKS = [
     ("krw_chart", "KRW=X", "yf"),
 ]
 
+# Daily series behind the FRED / Yahoo charts, plus BACKFILL_SERIES, up to BACKFILL_YEARS deep
+BACKFILL_TASKS = [task for task in HISTORY_TASKS if task[2] in history_backfill.FETCHERS] + \
+    history_backfill.parse_series(history_backfill.BACKFILL_SERIES)
+DAILY_SERIES = SeriesStore(history_backfill.DAILY_SERIES_DIR, read_only=APP_ROLE == "api")
+HISTORY_BACKFILL = HistoryBackfill(DAILY_SERIES)
+
+def backfill_history_job():
+    """Backfills the daily series (only the days since the last pass once they are stored)."""
+    print(f"[JOB] Backfilling {len(BACKFILL_TASKS)} daily series")
+    report = HISTORY_BACKFILL.run(BACKFILL_TASKS)
+    failed = [sid for sid, result in report["series"].items() if result["status"] == "failed"]
+    print(f"[JOB] Backfill done in {report['sec']}s ({report.get('written', 0)} written, {len(failed)} failed {failed})")
+
 def update_single_history_job(chart_id, ticker, source):
     """Fetches and updates a single history indicator in CACHE."""
     try:
         print(f"[JOB] Updating history: {chart_id} ({source})")
         data = finance_service.fetch_single_history(ticker, source)
+        if source == "investing":
+            safe_update_cache("events", {ticker: EVENT_SERIES.summary(ticker)})
         if data:
-            if "history" not in CACHE:
-                CACHE["history"] = {}
+            if CACHE["history"].get(chart_id) == data:
+                print(f"[JOB] History unchanged: {chart_id}")
+                return
             CACHE["history"][chart_id] = data
+            bump_version("history")
+            publish_category("history")
+            archive_change("history", {chart_id: data})
             print(f"[JOB] Success history: {chart_id}")
             import gc
             gc.collect() # Immediate free after each history fetch
@@ -151,28 +419,204 @@ def head_health():
     return Response(status_code=200)
 
 @app.get("/api/finance/stocks")
-def api_stocks():
-    return CACHE["stocks"]
+def api_stocks(request: Request):
+    return cached_json_response("stocks", request)
 
 @app.get("/api/finance/economy")
-def api_economy():
-    return CACHE["economy"]
+def api_economy(request: Request):
+    return cached_json_response("economy", request)
 
 @app.get("/api/finance/rates")
-def api_rates():
-    return CACHE["rates"]
+def api_rates(request: Request):
+    return cached_json_response("rates", request)
 
 @app.get("/api/finance/exchange")
-def api_exchange():
-    return CACHE["exchange"]
+def api_exchange(request: Request):
+    return cached_json_response("exchange", request)
+
+@app.get("/api/finance/events")
+def api_events(request: Request):
+    """Release history (actual/forecast/previous) and surprise-vs-forecast metrics per economic event."""
+    return cached_json_response("events", request)
 
 @app.get("/api/finance/history")
-def api_history():
-    """Returns 1-year history data for charts."""
-    return CACHE["history"]
+def api_history(request: Request, format: str = "json"):
+    """Returns 1-year history data for charts (format=columnar for the compact binary encoding)."""
+    if format == "columnar":
+        data = read_cache("history")
+        payload = PAYLOADS.get(
+            "history", CACHE_VERSIONS.get("history", 0), data,
+            encoder=lambda h: history_codec.encode_history(h.snapshot()), media_type=history_codec.MEDIA_TYPE,
+        )
+        return asset_response(payload, request)
+    return cached_json_response("history", request)
+
+@app.get("/api/finance/history/{chart_id}")
+def api_history_series(chart_id: str, start: str = "", end: str = "", format: str = "json", interval: str = "monthly"):
+    """One history series, optionally limited to start..end (YYYY-MM-DD), streamed from its memory-mapped file.
+    interval=daily serves the backfilled daily series (chart ids, or the BACKFILL_SERIES tickers).
+    format=binary streams the raw 12-byte (int32 epoch day, float64 value) little-endian records."""
+    store = DAILY_SERIES if interval == "daily" else read_cache("history").store
+    try:
+        records = store.range(chart_id, start or None, end or None)
+    except KeyError:
+        return Response(
+            content=json.dumps({"error": "unknown series", "id": chart_id}),
+            status_code=404, media_type="application/json",
+        )
+    except ValueError:
+        return Response(
+            content=json.dumps({"error": "start/end must be YYYY-MM-DD"}),
+            status_code=400, media_type="application/json",
+        )
+    if format == "binary":
+        return StreamingResponse(
+            series_store.stream_binary(records), media_type=series_store.BINARY_MEDIA_TYPE,
+            headers={"X-Series-Points": str(len(records))},
+        )
+    return StreamingResponse(series_store.stream_json(chart_id, records), media_type="application/json")
     
+@app.get("/api/finance/at")
+def api_finance_at(ts: str, category: str = ""):
+    """
+    Categories as the dashboard showed them at `ts` (epoch seconds/ms, or ISO 8601; naive times are KST),
+    rebuilt from the snapshot log. `category` limits the answer to one category.
+    """
+    if category and category not in snapshot_log.CATEGORIES:
+        return Response(
+            content=json.dumps({"error": "unknown category", "categories": snapshot_log.CATEGORIES}),
+            status_code=400, media_type="application/json",
+        )
+    try:
+        when = snapshot_log.parse_ts(ts)
+    except ValueError:
+        return Response(
+            content=json.dumps({"error": "ts must be epoch seconds/milliseconds or ISO 8601"}),
+            status_code=400, media_type="application/json",
+        )
+    categories = {}
+    for name in [category] if category else snapshot_log.CATEGORIES:
+        state, as_of = SNAPSHOTS.at(name, when)
+        if state is not None:
+            categories[name] = {"as_of": as_of, "data": state}
+    return {"ts": when, "categories": categories}
+
+@app.get("/api/alerts/rules")
+def api_alert_rules():
+    return {"rules": ALERTS.rules(), "sinks": sorted(ALERTS.sinks)}
+
+def runs_jobs_only(feature):
+    """
+    409 for `feature` on processes that serve the shared snapshot (api workers,
+    replica followers): it lives in the process that runs the jobs. None to proceed.
+    """
+    if not serves_shared_snapshot():
+        return None
+    return Response(
+        content=json.dumps({"error": f"{feature} only runs in the process that runs the jobs", "role": APP_ROLE}),
+        status_code=409, media_type="application/json",
+    )
+
+@app.post("/api/alerts/rules")
+async def api_add_alert_rule(request: Request):
+    """Registers a rule (admin): {"rule": "vix > 30", "sinks": ["sse", "webhook"], "debounce_sec": 300}"""
+    denied = admin_denied(request) or runs_jobs_only("alert evaluation")
+    if denied:
+        return denied
+    try:
+        body = await request.json()
+        rule = ALERTS.add(
+            str(body["rule"]), sinks=tuple(body.get("sinks") or ("sse",)),
+            debounce=float(body.get("debounce_sec", alert_engine.ALERT_DEBOUNCE_SEC)),
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        return Response(
+            content=json.dumps({"error": str(e) if isinstance(e, ValueError) else "body must be {\"rule\": ...}"}),
+            status_code=400, media_type="application/json",
+        )
+    return rule.to_dict()
+
+@app.delete("/api/alerts/rules/{rule_id}")
+def api_remove_alert_rule(request: Request, rule_id: str):
+    denied = admin_denied(request) or runs_jobs_only("alert evaluation")
+    if denied:
+        return denied
+    if not ALERTS.remove(rule_id):
+        return Response(
+            content=json.dumps({"error": "unknown rule", "id": rule_id}),
+            status_code=404, media_type="application/json",
+        )
+    return {"removed": rule_id}
+
+@app.get("/api/alerts/stream")
+def api_alert_stream():
+    """Server-sent events: one `alert` event per fired rule with an sse sink."""
+    denied = runs_jobs_only("alert evaluation")
+    if denied:
+        return denied
+    return StreamingResponse(
+        ALERT_SSE.stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/quotes")
+def api_quotes(request: Request, symbols: str = ""):
+    """Quotes for a user-defined watchlist: /api/quotes?symbols=AAPL,MSFT,005930.KS"""
+    requested, invalid = quote_engine.parse_symbols(symbols)
+    if not requested:
+        return Response(
+            content=json.dumps({"error": "symbols required", "invalid": invalid}),
+            status_code=400, media_type="application/json",
+        )
+    # Polling keeps a client's subscription alive; X-Client-Id lets clients behind one IP count separately
+    client = request.headers.get("X-Client-Id") or (request.client.host if request.client else "anonymous")
+    if serves_shared_snapshot():
+        subscribe_shared_quotes(requested, client)
+        sync_from_store()
+        # New symbols read null until the publisher's next refresh
+        return {"quotes": {symbol: SHARED_QUOTES.get(symbol) for symbol in requested}, "invalid": invalid}
+    quotes = QUOTE_ENGINE.quotes(requested, client)
+    return {
+        "quotes": {symbol: quote.to_dict() if quote else None for symbol, quote in quotes.items()},
+        "invalid": invalid,
+    }
+
+def subscribe_shared_quotes(symbols, client):
+    """API workers: records the client's leases in the shared store, rewriting each at most every half lease."""
+    now = time.monotonic()
+    lease = QUOTE_ENGINE.lease_sec
+    renew = [s for s in symbols if (client, s) not in _quote_leases or now - _quote_leases[(client, s)] >= lease / 2]
+    if not renew:
+        return
+    try:
+        shared_store.subscribe_quotes(renew, client, lease)
+    except Exception as e:
+        print(f"[ERROR] subscribe_shared_quotes: {e}")
+        return
+    for symbol in renew:
+        _quote_leases[(client, symbol)] = now
+    if len(_quote_leases) > 4 * quote_engine.QUOTES_MAX_SYMBOLS:
+        # Forget writes older than a lease; those leases lapsed anyway
+        for key, written in list(_quote_leases.items()):
+            if now - written >= lease:
+                del _quote_leases[key]
+
+def update_realtime_quotes_job():
+    """Publisher: subscribes the engine to the workers' leases, refreshes it and publishes the quotes."""
+    try:
+        for client, symbols in shared_store.quote_subscriptions().items():
+            QUOTE_ENGINE.subscribe(symbols, client)
+        QUOTE_ENGINE.refresh()
+        shared_store.publish("quotes", QUOTE_ENGINE.snapshot())
+    except Exception as e:
+        print("[ERROR] update_realtime_quotes_job:", e)
+
 @app.get("/api/timer")
 def api_timer():
+    if serves_shared_snapshot():
+        sync_from_store()
+        return SHARED_TIMER or {"last_update": None, "next_update": None}
+
     if not LAST_UPDATE["stocks"] or not NEXT_UPDATE["stocks"]:
         return {"last_update": None, "next_update": None}
 
@@ -181,6 +625,126 @@ def api_timer():
         "next_update": int(NEXT_UPDATE["stocks"].timestamp() * 1000)
     }
 
+@app.get("/api/jobs")
+def api_jobs():
+    """Per-job run counts and durations (for load testing / monitoring)."""
+    result = {
+        "role": APP_ROLE, "speedup": SCHEDULE_SPEEDUP,
+        "polling": realtime_poller.report(), "crawler": TRANSPORT.report(),
+        "adapters": source_adapters.report(), "shared_fetches": FETCH_CACHE.report(),
+        "quotes": QUOTE_ENGINE.report(), "executor": JOB_EXECUTOR.report(), "snapshots": SNAPSHOTS.report(),
+        "alerts": ALERTS.report(), "jobs": JOB_STATS,
+        "durable_cache": durable_cache.report() if durable_cache else None,
+        "backfill": HISTORY_BACKFILL.report(),
+    }
+    if leader_lease:
+        result["is_leader"] = leader_lease.is_leader
+        result["leader"] = leader_lease.current_holder()
+    return result
+
+# Admin endpoints answer 404 unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+def is_admin(request):
+    """True when the request carries ADMIN_TOKEN (X-Admin-Token header or Authorization: Bearer)."""
+    token = request.headers.get("X-Admin-Token") or request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def admin_denied(request):
+    """The error response for a non-admin request, or None to proceed."""
+    if not ADMIN_TOKEN:
+        return Response(status_code=404)
+    if not is_admin(request):
+        return Response(status_code=403)
+    return None
+
+@app.get("/api/admin/history")
+def api_admin_history(request: Request):
+    """Estimated bytes per history series: in memory, in the series store only, and as plain Python lists."""
+    denied = admin_denied(request)
+    if denied:
+        return denied
+    return read_cache("history").report()
+
+# One sampling session at a time: concurrent ones would only slow the jobs they measure
+_profile_lock = threading.Lock()
+
+@app.get("/api/admin/profile")
+def api_admin_profile(request: Request, seconds: float = 10, interval_ms: float = profiler.PROFILE_INTERVAL_MS,
+                      threads: str = "jobs"):
+    """
+    Samples the scheduler workers' stacks for `seconds` and returns them in the collapsed
+    format (flamegraph.pl, speedscope), rooted at the running job id. threads=all samples every thread.
+    """
+    denied = admin_denied(request) or runs_jobs_only("job profiling")
+    if denied:
+        return denied
+    if not 0 < seconds <= profiler.PROFILE_MAX_SEC or not 1 <= interval_ms <= 1000 or threads not in ("jobs", "all"):
+        return Response(
+            content=json.dumps({"error": f"seconds must be in (0, {profiler.PROFILE_MAX_SEC:g}], "
+                                         "interval_ms in [1, 1000], threads jobs or all"}),
+            status_code=400, media_type="application/json",
+        )
+    if not _profile_lock.acquire(blocking=False):
+        return Response(
+            content=json.dumps({"error": "a profile is already running"}),
+            status_code=409, media_type="application/json",
+        )
+    try:
+        stacks, rounds = profiler.sample_stacks(
+            seconds, interval_ms / 1000, roots=JOB_EXECUTOR.thread_jobs if threads == "jobs" else None,
+        )
+    finally:
+        _profile_lock.release()
+    return Response(
+        content=profiler.format_collapsed(stacks), media_type="text/plain",
+        headers={"X-Profile-Rounds": str(rounds), "X-Profile-Samples": str(sum(stacks.values()))},
+    )
+
+@app.get("/api/admin/job-profiles")
+def api_admin_job_profiles(request: Request):
+    """Job ids with cProfile capture enabled, and a summary of each one's last captured run."""
+    denied = admin_denied(request) or runs_jobs_only("job profiling")
+    if denied:
+        return denied
+    return JOB_PROFILES.report()
+
+@app.put("/api/admin/job-profiles/{job_id}")
+def api_admin_enable_job_profile(request: Request, job_id: str):
+    """Runs every following run of job_id under cProfile until disabled."""
+    denied = admin_denied(request) or runs_jobs_only("job profiling")
+    if denied:
+        return denied
+    if scheduler.get_job(job_id) is None:
+        return Response(
+            content=json.dumps({"error": "unknown job", "id": job_id}),
+            status_code=404, media_type="application/json",
+        )
+    JOB_PROFILES.enable(job_id)
+    return JOB_PROFILES.report()
+
+@app.delete("/api/admin/job-profiles/{job_id}")
+def api_admin_disable_job_profile(request: Request, job_id: str):
+    denied = admin_denied(request) or runs_jobs_only("job profiling")
+    if denied:
+        return denied
+    JOB_PROFILES.disable(job_id)
+    return JOB_PROFILES.report()
+
+@app.get("/api/admin/job-profiles/{job_id}")
+def api_admin_job_profile(request: Request, job_id: str):
+    """pstats text (cumulative time) of the last profiled run of job_id."""
+    denied = admin_denied(request) or runs_jobs_only("job profiling")
+    if denied:
+        return denied
+    capture = JOB_PROFILES.capture(job_id)
+    if capture is None:
+        return Response(
+            content=json.dumps({"error": "no profiled run yet", "id": job_id}),
+            status_code=404, media_type="application/json",
+        )
+    return Response(content=capture["stats"], media_type="text/plain")
+
 # Startup Jobs Wrapper
 def run_startup_jobs():
     print("[Startup] Executing initial data fetch...")
@@ -191,6 +755,8 @@ def run_startup_jobs():
         if data:
             print(f"  [Data] {category.capitalize()}:")
             for key, val in data.items():
+                if isinstance(val, Quote):
+                    val = val.to_dict()
                 if isinstance(val, dict):
                     v = val.get('value', 'N/A')
                     p = val.get('percent', '')
@@ -202,32 +768,32 @@ def run_startup_jobs():
         print("[Startup] 1/8: Realtime Stocks...")
         update_realtime_stocks_job()
         log_category_data("stocks")
-        time.sleep(2)
+        time.sleep(scaled(2))
         
         print("[Startup] 2/8: Realtime Rates...")
         update_realtime_rates_job()
         log_category_data("rates")
-        time.sleep(2)
+        time.sleep(scaled(2))
         
         print("[Startup] 3/8: Realtime Exchange...")
         update_realtime_exchange_job()
         log_category_data("exchange")
-        time.sleep(2)
+        time.sleep(scaled(2))
         
         print("[Startup] 4/8: Daily Stocks (High Yield, etc)...")
         update_daily_stocks_job()
         log_category_data("stocks") # Updated again
-        time.sleep(2)
+        time.sleep(scaled(2))
         
         print("[Startup] 5/8: Daily Rates (Fed Rate, etc)...")
         update_daily_rates_job()
         log_category_data("rates") # Updated again
-        time.sleep(2)
+        time.sleep(scaled(2))
         
         print("[Startup] 6/8: Daily Exchange (Reserves, etc)...")
         update_daily_exchange_job()
         log_category_data("exchange") # Updated again
-        time.sleep(2)
+        time.sleep(scaled(2))
         
         print("[Startup] 7/8: Daily Economy...")
         update_daily_economy_job()
@@ -251,12 +817,87 @@ job_defaults = {
     'max_instances': 1,         # Prevents multiple instances of same job (Crucial for SegFault)
     'coalesce': True            # Merge pending runs into one
 }
-scheduler = BackgroundScheduler(job_defaults=job_defaults)
+
+def job_priority(job_id):
+    """Executor class of a scheduled job: realtime polls first, then history charts, then daily crawls."""
+    if job_id.startswith("realtime_"):
+        return "realtime"
+    if "_hist_" in job_id:
+        return "history"
+    return "daily"
+
+# Priority queues + per-class wall-clock budgets (job_executor.py) instead of the default thread pool
+# Per-job cProfile capture, toggled on /api/admin/job-profiles/{job_id}
+JOB_PROFILES = JobProfiles()
+JOB_EXECUTOR = PriorityExecutor(job_priority, profiles=JOB_PROFILES)
+scheduler = BackgroundScheduler(job_defaults=job_defaults, executors={"default": JOB_EXECUTOR})
+
+def record_job_event(event):
+    """APScheduler listener: counts runs/errors and seconds from scheduled time to completion."""
+    stats = JOB_STATS.setdefault(event.job_id, {"runs": 0, "errors": 0, "last_sec": None, "total_sec": 0.0})
+    stats["runs"] += 1
+    if event.exception:
+        stats["errors"] += 1
+    elapsed = (datetime.now(event.scheduled_run_time.tzinfo) - event.scheduled_run_time).total_seconds()
+    stats["last_sec"] = round(elapsed, 3)
+    stats["total_sec"] += elapsed
+
+def leader_only(func):
+    """Replica role: the wrapped job is a no-op on followers."""
+    if APP_ROLE != "replica":
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if leader_lease.is_leader:
+            return func(*args, **kwargs)
+    return wrapper
+
+def leadership_loop():
+    """
+    Replica role: renews (or tries to take) the lease every LEADER_RENEW_SEC.
+    Runs on its own thread so busy scheduler workers can't delay a renewal.
+    """
+    while True:
+        was_leader = leader_lease.is_leader
+        is_leader = leader_lease.try_acquire()
+        if is_leader and not was_leader:
+            print(f"[Leader] {leader_lease.holder} acquired the scheduler lease")
+            # Continue from the last published snapshot; jobs merge on top of it
+            sync_from_store(force=True)
+        elif was_leader and not is_leader:
+            print(f"[Leader] {leader_lease.holder} lost the scheduler lease, following")
+        time.sleep(LEADER_RENEW_SEC)
+
+def add_daily_job(func, job_id, args=None, **cron):
+    """Schedules a daily cron job, or an equivalent interval when SCHEDULE_SPEEDUP is set."""
+    func = leader_only(func)
+    if SCHEDULE_SPEEDUP != 1:
+        scheduler.add_job(func, "interval", seconds=scaled(24 * 3600), args=args, id=job_id)
+    else:
+        scheduler.add_job(func, "cron", args=args, id=job_id, **cron)
 
 @app.on_event("startup")
 def start_scheduler():
+    if APP_ROLE == "api":
+        print("[Main] APP_ROLE=api: scheduler disabled, serving the shared snapshot")
+        return
+
+    scheduler.add_listener(record_job_event, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+
+    if APP_ROLE == "replica":
+        # Decide leadership before the first job fires
+        leader_lease.try_acquire()
+        if leader_lease.is_leader:
+            print(f"[Leader] {leader_lease.holder} acquired the scheduler lease")
+        threading.Thread(target=leadership_loop, name="leader-lease", daemon=True).start()
+
+    # Last known values first, so the dashboard isn't empty while the startup fetch runs
+    if not serves_shared_snapshot():
+        restore_cache()
+
     # 1. Core data jobs (Sequential startup)
-    scheduler.add_job(run_startup_jobs)
+    scheduler.add_job(leader_only(run_startup_jobs), id="startup")
     
     # 2. History Jobs (Spacing: 20 seconds apart)
     # Start quickly (10s delay) to beat Render restart cycles
@@ -264,25 +905,36 @@ def start_scheduler():
         delay_sec = 10 + (i * 20) # 10s, 30s, 50s, ...
         # Initial delayed run
         scheduler.add_job(
-            update_single_history_job, 
-            next_run_time=datetime.now() + timedelta(seconds=delay_sec),
+            leader_only(update_single_history_job), 
+            next_run_time=datetime.now() + timedelta(seconds=scaled(delay_sec)),
             args=[cid, ticker, src],
             id=f"init_hist_{cid}"
         )
         # Recurring Cron (01:10+i)
-        scheduler.add_job(
-            update_single_history_job, 
-            "cron", hour=1, minute=10+i, 
-            args=[cid, ticker, src],
-            id=f"cron_hist_01_{cid}"
+        add_daily_job(
+            update_single_history_job, f"cron_hist_01_{cid}",
+            hour=1, minute=10+i, 
+            args=[cid, ticker, src]
         )
 
+    # Daily series backfill, once the staggered chart fetches above are done
+    scheduler.add_job(
+        leader_only(backfill_history_job),
+        next_run_time=datetime.now() + timedelta(seconds=scaled(10 + len(HISTORY_TASKS) * 20)),
+        id="init_hist_backfill",
+    )
+    add_daily_job(backfill_history_job, "cron_hist_backfill", hour=1, minute=40)
+
     # 3. Realtime Jobs
     # 30초: Stocks Realtime
-    scheduler.add_job(update_realtime_stocks_job, "interval", seconds=30)
+    scheduler.add_job(leader_only(update_realtime_stocks_job), "interval", seconds=scaled(REALTIME_STOCKS_SEC), id="realtime_stocks")
     # 5분: Rates & Exchange Realtime
-    scheduler.add_job(update_realtime_rates_job, "interval", minutes=5)
-    scheduler.add_job(update_realtime_exchange_job, "interval", minutes=5)
+    scheduler.add_job(leader_only(update_realtime_rates_job), "interval", seconds=scaled(REALTIME_RATES_SEC), id="realtime_rates")
+    scheduler.add_job(leader_only(update_realtime_exchange_job), "interval", seconds=scaled(REALTIME_EXCHANGE_SEC), id="realtime_exchange")
+    # Watchlist quotes the API workers subscribed to (QUOTES_REFRESH_SEC is already sped up)
+    if shared_store:
+        scheduler.add_job(leader_only(update_realtime_quotes_job), "interval", seconds=quote_engine.QUOTES_REFRESH_SEC,
+                          id="realtime_quotes")
 
     # 4. Daily Category Updates (00:00, 12:00)
     daily_jobs = [
@@ -292,21 +944,53 @@ def start_scheduler():
         update_daily_economy_job
     ]
     for job in daily_jobs:
-        scheduler.add_job(job, "cron", hour=0, minute=0)
-        scheduler.add_job(job, "cron", hour=12, minute=0)
+        add_daily_job(job, f"{job.__name__}_00", hour=0, minute=0)
+        add_daily_job(job, f"{job.__name__}_12", hour=12, minute=0)
 
 
     scheduler.start()
 
+@app.on_event("shutdown")
+def release_leadership():
+    # Hand over immediately instead of waiting for the lease to expire
+    if leader_lease and leader_lease.is_leader:
+        leader_lease.release()
+
+@app.on_event("shutdown")
+def flush_durable_cache():
+    if durable_cache:
+        durable_cache.close()
+
 # Serve Static Files (Frontend)
+static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# index.html with hashed, pre-compressed CSS/JS, built once at startup
+try:
+    STATIC_ASSETS = build_index_assets(os.path.join(static_dir, "index.html"))
+except Exception as e:
+    print(f"Failed to build static assets: {e}")
+    STATIC_ASSETS = {}
+
+def static_asset(request: Request):
+    asset = STATIC_ASSETS.get(request.url.path)
+    if asset is None:
+        return Response(status_code=404)
+    return asset_response(asset, request)
+
+# Registered before the StaticFiles mount so they take precedence; plain files are the fallback
+if STATIC_ASSETS:
+    for path in ("/", "/index.html", "/assets/{name}"):
+        app.add_api_route(path, static_asset, methods=["GET"], include_in_schema=False)
+
 try:
-    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-    app.mount("/", StaticFiles(directory=static_dir, html=True), name="static")
+    app.mount("/", PublicFiles(directory=static_dir, html=True), name="static")
 except Exception as e:
     print(f"Failed to mount static files: {e}")
 
 if __name__ == "__main__":
     is_prod = os.getenv("PROD", "false").lower() == "true"
-    print(f"[Main] Starting server (PROD={is_prod})")
+    # Only api workers / lease-gated replicas may be multiplied; other roles run every job
+    workers = int(os.getenv("WEB_CONCURRENCY", "1")) if APP_ROLE in ("api", "replica") else 1
+    print(f"[Main] Starting server (PROD={is_prod}, ROLE={APP_ROLE}, workers={workers})")
     # Bind to 0.0.0.0 for Render compatibility
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=not is_prod)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=not is_prod, workers=workers)
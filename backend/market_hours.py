@@ -0,0 +1,224 @@
+"""
+Trading calendars and the adaptive realtime poller.
+
+Each realtime instrument (finance_service.REALTIME_INSTRUMENTS) is tied to a
+calendar. While its market trades it is polled at the category's open
+interval; while closed only every CLOSED_POLL_SEC, and immediately again once
+the market reopens.
+
+    python backend/market_hours.py     # planned vs fixed upstream requests per day
+"""
+import os
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+MON, TUE, WED, THU, FRI, SAT, SUN = range(7)
+WEEK_MINUTES = 7 * 24 * 60
+
+# Full-day closures. Update yearly: a calendar past its last listed year warns once and
+# then trades through holidays.
+US_HOLIDAYS = {
+    "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+    "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19",
+    "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+}
+KRX_HOLIDAYS = {
+    "2025-01-01", "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30", "2025-03-03",
+    "2025-05-05", "2025-05-06", "2025-06-03", "2025-06-06", "2025-08-15", "2025-10-03",
+    "2025-10-06", "2025-10-07", "2025-10-08", "2025-10-09", "2025-12-25", "2025-12-31",
+    "2026-01-01", "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02", "2026-05-01",
+    "2026-05-05", "2026-05-25", "2026-06-03", "2026-08-17", "2026-09-24", "2026-09-25",
+    "2026-10-05", "2026-10-09", "2026-12-25", "2026-12-31",
+}
+JPX_HOLIDAYS = {
+    "2025-01-01", "2025-01-02", "2025-01-03", "2025-01-13", "2025-02-11", "2025-02-24",
+    "2025-03-20", "2025-04-29", "2025-05-05", "2025-05-06", "2025-07-21", "2025-08-11",
+    "2025-09-15", "2025-09-23", "2025-10-13", "2025-11-03", "2025-11-24", "2025-12-31",
+    "2026-01-01", "2026-01-02", "2026-01-12", "2026-02-11", "2026-02-23", "2026-03-20",
+    "2026-04-29", "2026-05-04", "2026-05-05", "2026-05-06", "2026-07-20", "2026-08-11",
+    "2026-09-21", "2026-09-22", "2026-09-23", "2026-10-12", "2026-11-03", "2026-11-23",
+    "2026-12-31",
+}
+
+
+def _minute(weekday, hhmm):
+    hours, minutes = map(int, hhmm.split(":"))
+    return (weekday * 24 + hours) * 60 + minutes
+
+
+class TradingCalendar:
+    """
+    Weekly sessions in the exchange's local time plus full-day holidays.
+    Sessions are (weekday, "HH:MM", weekday, "HH:MM") and may wrap past midnight
+    (e.g. Globex's Sunday 17:00 open). A holiday closes the session whose trade
+    date (the local date it closes on) falls on it.
+    """
+
+    def __init__(self, name, tz, sessions, holidays=()):
+        self.name = name
+        self.tz = ZoneInfo(tz)
+        self.holidays = {date.fromisoformat(d) for d in holidays}
+        # Last year the holiday list covers (None: no holidays kept, e.g. FX)
+        self.holidays_until = max(d.year for d in self.holidays) if self.holidays else None
+        self._warned = False
+        self.sessions = []
+        for open_day, open_at, close_day, close_at in sessions:
+            start, end = _minute(open_day, open_at), _minute(close_day, close_at)
+            if end <= start:
+                end += WEEK_MINUTES
+            self.sessions.append((start, end))
+        self._last = (None, False)
+
+    def is_open(self, ts):
+        # Sessions change on whole minutes; instruments sharing a calendar reuse the answer
+        minute = int(ts // 60)
+        # One read of the (minute, answer) pair: job threads may replace it concurrently
+        last = self._last
+        if last[0] != minute:
+            last = self._last = (minute, self._is_open(ts))
+        return last[1]
+
+    def _is_open(self, ts):
+        local = datetime.fromtimestamp(ts, self.tz)
+        if self.holidays_until is not None and local.year > self.holidays_until and not self._warned:
+            self._warned = True
+            print(f"[Calendar] {self.name}: no holidays listed after {self.holidays_until}; "
+                  "update market_hours.py (treating every weekday as a trading day)")
+        now = (local.weekday() * 24 + local.hour) * 60 + local.minute
+        for start, end in self.sessions:
+            # Check this week's and last week's occurrence (for sessions wrapping Sunday -> Monday)
+            for offset in (0, WEEK_MINUTES):
+                if start <= now + offset < end:
+                    closes = local + timedelta(minutes=end - (now + offset))
+                    return closes.date() not in self.holidays
+        return False
+
+
+def _weekdays(open_at, close_at):
+    return [(day, open_at, day, close_at) for day in (MON, TUE, WED, THU, FRI)]
+
+
+CALENDARS = {
+    cal.name: cal for cal in (
+        # CME Globex (equity index, crude, Treasury futures): Sun-Fri 17:00-16:00 CT, daily 1h halt
+        TradingCalendar("cme_globex", "America/Chicago",
+                        [(day - 1 if day else SUN, "17:00", day, "16:00") for day in (MON, TUE, WED, THU, FRI)],
+                        US_HOLIDAYS),
+        # NYSE / Cboe cash session (Russell 2000, VIX, CNN Fear & Greed)
+        TradingCalendar("us_equity", "America/New_York", _weekdays("09:30", "16:15"), US_HOLIDAYS),
+        # Spot FX / ICE dollar index: Sunday 17:00 to Friday 17:00 ET
+        TradingCalendar("fx", "America/New_York", [(SUN, "17:00", FRI, "17:00")]),
+        # KRX Treasury bond market
+        TradingCalendar("krx", "Asia/Seoul", _weekdays("09:00", "15:30"), KRX_HOLIDAYS),
+        # JGB cash / JPX day session
+        TradingCalendar("jgb", "Asia/Tokyo", _weekdays("08:45", "15:45"), JPX_HOLIDAYS),
+        # FRED daily series land after the US close; poll fast only around the release
+        TradingCalendar("fred_release", "America/New_York", _weekdays("15:30", "19:00"), US_HOLIDAYS),
+    )
+}
+
+# Poll interval for an instrument whose market is closed (catches settlements and revisions)
+CLOSED_POLL_SEC = float(os.getenv("CLOSED_POLL_SEC", "3600"))
+
+
+class AdaptivePoller:
+    """
+    Decides per instrument whether a realtime job run should fetch it.
+    `instruments` is { key: (category, calendar name) }; `open_intervals` is
+    { category: seconds } (the category's job interval).
+    """
+
+    def __init__(self, instruments, open_intervals, closed_sec=CLOSED_POLL_SEC, calendars=CALENDARS):
+        self.instruments = instruments
+        self.open_intervals = open_intervals
+        self.closed_sec = closed_sec
+        self.calendars = calendars
+        self.next_due = {}
+        self.was_open = {}
+        self.fetches = {}
+        self.fetch_day = None
+        self._planned = (None, None)
+
+    def interval(self, key, is_open):
+        category = self.instruments[key][0]
+        return self.open_intervals[category] if is_open else max(self.closed_sec, self.open_intervals[category])
+
+    def due(self, category, now=None):
+        """Returns the keys of `category` to fetch on this run and schedules their next poll."""
+        now = time.time() if now is None else now
+        keys = []
+        for key, (cat, calendar) in self.instruments.items():
+            if cat != category:
+                continue
+            is_open = self.calendars[calendar].is_open(now)
+            # Job runs drift by a few ms; 10% slack keeps a 30s instrument on every 30s run
+            slack = 0.1 * self.open_intervals[cat]
+            reopened = is_open and not self.was_open.get(key, False)
+            if reopened or now + slack >= self.next_due.get(key, 0):
+                keys.append(key)
+                self.next_due[key] = now + self.interval(key, is_open)
+            self.was_open[key] = is_open
+        self._count(keys, now)
+        return keys
+
+    def _count(self, keys, now):
+        today = date.fromtimestamp(now)
+        if today != self.fetch_day:
+            self.fetch_day = today
+            self.fetches = {}
+        for key in keys:
+            self.fetches[key] = self.fetches.get(key, 0) + 1
+
+    def planned_requests(self, day):
+        """Simulates one local day of job runs: { key: requests } with the adaptive policy."""
+        start = datetime.combine(day, datetime.min.time()).timestamp()
+        sim = AdaptivePoller(self.instruments, self.open_intervals, self.closed_sec, self.calendars)
+        counts = dict.fromkeys(self.instruments, 0)
+        for category, step in self.open_intervals.items():
+            t = start
+            while t < start + 86400:
+                for key in sim.due(category, t):
+                    counts[key] += 1
+                t += step
+        return counts
+
+    def report(self, day=None):
+        """Upstream requests per day: fixed schedule vs adaptive plan, and fetches so far today."""
+        day = day or date.today()
+        if self._planned[0] != day:
+            self._planned = (day, self.planned_requests(day))
+        planned = self._planned[1]
+        fixed = {key: int(86400 / self.open_intervals[cat]) for key, (cat, _) in self.instruments.items()}
+        return {
+            "date": day.isoformat(),
+            "fixed_per_day": sum(fixed.values()),
+            "planned_per_day": sum(planned.values()),
+            "saved_per_day": sum(fixed.values()) - sum(planned.values()),
+            "fetched_today": sum(self.fetches.values()),
+            "instruments": {
+                key: {
+                    "calendar": calendar,
+                    "open": self.was_open.get(key),
+                    "fixed": fixed[key],
+                    "planned": planned[key],
+                    "fetched_today": self.fetches.get(key, 0),
+                }
+                for key, (_, calendar) in self.instruments.items()
+            },
+        }
+
+
+if __name__ == "__main__":
+    import finance_service
+
+    instruments = {key: (cat, cal) for key, (cat, cal, _) in finance_service.REALTIME_INSTRUMENTS.items()}
+    poller = AdaptivePoller(instruments, {"stocks": 30, "rates": 300, "exchange": 300})
+    print(f"{'date':<12}{'fixed':>8}{'planned':>9}{'saved':>8}")
+    total_saved = 0
+    for i in range(7):
+        r = poller.report(date.today() + timedelta(days=i))
+        total_saved += r["saved_per_day"]
+        print(f"{r['date']:<12}{r['fixed_per_day']:>8}{r['planned_per_day']:>9}{r['saved_per_day']:>8}")
+    print(f"Average saved per day: {total_saved / 7:.0f} upstream requests")
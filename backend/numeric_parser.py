@@ -0,0 +1,156 @@
+"""
+Table-driven parser for the numbers the crawlers scrape.
+
+Handles, in any combination:
+    thousands/decimal separators   6,012.25   1.234,56   3,5   1\u00a0234,5
+    signs                          +0.21  -0.21  −0.21 (U+2212)
+    accounting negatives           (1.5)  -> -1.5   ("(+0.21%)" keeps its explicit sign)
+    magnitude suffixes             64K  1.2M  430.71B  2bn
+    Korean units, also compound    898.0조  1조 2,345억  3,500만
+    units                          %  ％  %p  bp
+    currency marks                 $  ₩  €  ¥  £  원
+
+parse_number() returns ParsedNumber(value, scale, unit, decimals) with the
+value in base units (64K -> 64000.0), or None. Results are memoized: the same
+page text is seen on every poll.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Suffix text -> (normalized scale, multiplier)
+SUFFIXES = {
+    "K": ("K", 1e3), "k": ("K", 1e3),
+    "M": ("M", 1e6), "mn": ("M", 1e6),
+    "B": ("B", 1e9), "bn": ("B", 1e9),
+    "T": ("T", 1e12), "tn": ("T", 1e12),
+    "천": ("천", 1e3), "만": ("만", 1e4), "억": ("억", 1e8), "조": ("조", 1e12),
+}
+
+# Normalized scale -> multiplier (what Quote.format_value divides by)
+SCALES = {"": 1.0, **{scale: mult for scale, mult in SUFFIXES.values()}}
+
+# Trailing unit text -> normalized unit (longest match first)
+UNITS = [("%p", "%p"), ("％", "%"), ("%", "%"), ("bp", "bp")]
+
+SIGNS = {"+": 1, "-": -1, "−": -1, "–": -1}
+CURRENCY_PREFIXES = "$₩€¥£"
+CURRENCY_SUFFIXES = ("원", "달러")
+
+# One "<number><suffix>" group; compound Korean amounts are several groups
+_GROUP = re.compile(
+    r"\s*(?P<num>\d[\d.,'\u00a0\u202f]*)\s*(?P<suffix>"
+    + "|".join(sorted(map(re.escape, SUFFIXES), key=len, reverse=True))
+    + r")?\s*"
+)
+_GROUPED = {
+    ".": re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"),
+    ",": re.compile(r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:,\d+)?"),
+}
+_THOUSANDS_COMMA = re.compile(r"\d{1,3}(?:,\d{3})+")
+
+
+class ParsedNumber(NamedTuple):
+    value: float     # base units
+    scale: str       # normalized magnitude suffix ("" if none), a SCALES key
+    unit: str        # "%", "%p", "bp" or ""
+    decimals: int    # digits after the decimal separator, in `scale`
+
+
+class NumberParseError(ValueError):
+    pass
+
+
+def _decimal_separator(num):
+    """Guesses the decimal separator of a digit string (Korean/US '1,234.5' wins ties)."""
+    commas, dots = num.count(","), num.count(".")
+    if commas and dots:
+        return "," if num.rfind(",") > num.rfind(".") else "."
+    if commas:
+        # "1,234" / "12,345,678" are grouping; "3,5" / "1,25" are decimal commas
+        return "." if _THOUSANDS_COMMA.fullmatch(num) else ","
+    if dots > 1:
+        return ","  # "1.234.567"
+    return "."
+
+
+def _to_float(num):
+    """Returns (value, decimals) for one digit string, or None if its separators don't make sense."""
+    num = num.replace("'", "").replace("\u00a0", "").replace("\u202f", "").rstrip(".,")
+    decimal = _decimal_separator(num)
+    if not _GROUPED[decimal].fullmatch(num):
+        return None
+    group = "," if decimal == "." else "."
+    integer, _, fraction = num.replace(group, "").partition(decimal)
+    return float(f"{integer}.{fraction or 0}"), len(fraction)
+
+
+@lru_cache(maxsize=4096)
+def parse_number(text):
+    """Parses scraped number text into a ParsedNumber, or None if it isn't a number."""
+    if not text:
+        return None
+    s = text.strip()
+
+    sign = 1
+    if s.startswith("(") and s.endswith(")"):
+        s = s[1:-1].strip()
+        sign = -1
+    if s[:1] in SIGNS:
+        # An explicit sign inside parentheses wins: Investing shows "(+0.21%)"
+        sign = SIGNS[s[0]]
+        s = s[1:].lstrip()
+    s = s.lstrip(CURRENCY_PREFIXES).strip()
+
+    unit = ""
+    for suffix, normalized in UNITS:
+        if s.endswith(suffix):
+            unit, s = normalized, s[:-len(suffix)].rstrip()
+            break
+    for suffix in CURRENCY_SUFFIXES:
+        if s.endswith(suffix):
+            s = s[:-len(suffix)].rstrip()
+            break
+    if not s:
+        return None
+
+    groups = []
+    pos = 0
+    while pos < len(s):
+        match = _GROUP.match(s, pos)
+        if not match or match.end() == pos:
+            return None
+        parsed = _to_float(match.group("num"))
+        if parsed is None:
+            return None
+        groups.append((parsed, SUFFIXES.get(match.group("suffix"), ("", 1.0))))
+        pos = match.end()
+
+    if len(groups) > 1:
+        # Compound amounts ("1조 2,345억") need a unit on every part, largest first
+        multipliers = [mult for _, (scale, mult) in groups]
+        if not all(scale for _, (scale, _) in groups) or multipliers != sorted(multipliers, reverse=True):
+            return None
+
+    (_, first_decimals), (scale, first_mult) = groups[0]
+    value = sum(number * mult for (number, _), (_, mult) in groups)
+    decimals = first_decimals
+    if len(groups) > 1:
+        (_, last_decimals), (_, last_mult) = groups[-1]
+        decimals = round(math.log10(first_mult / last_mult)) + last_decimals
+    return ParsedNumber(sign * value, scale, unit, decimals)
+
+
+def parse_float(text):
+    """parse_number's value only (None when the text isn't numeric)."""
+    parsed = parse_number(text)
+    return parsed.value if parsed else None
+
+
+def require_number(text):
+    """Like parse_number, but raises NumberParseError naming the offending text."""
+    parsed = parse_number(text)
+    if parsed is None:
+        raise NumberParseError(f"Not a number: {text!r}")
+    return parsed
@@ -0,0 +1,147 @@
+"""
+Profiling hooks for live scheduler jobs (admin endpoints only).
+
+Both tools look at the process they run in, so the endpoints answer 409 on
+processes that serve the shared snapshot (api workers, replica followers):
+they only work where the jobs run and HTTP is served, i.e. standalone or on
+the replica leader. The collector serves no HTTP.
+
+Two tools, for the two questions a slow job raises:
+    - sample_stacks(): a sampling profiler. The calling thread (the admin
+      request's) reads every job worker's current stack
+      (sys._current_frames) each interval for N seconds and counts
+      identical stacks, rooted at the job id running on that worker. The
+      result is the collapsed format flamegraph.pl, speedscope and inferno
+      read: one "root;caller;...;leaf count" line per distinct stack. It
+      observes from outside, so it costs the jobs nothing but the GIL
+      hand-offs, and shows where wall time goes, network waits included.
+    - JobProfiles: per-job cProfile capture, toggled by job id. While a job
+      id is enabled every run of it executes under cProfile (deterministic,
+      with its overhead) and the last run's stats are kept as pstats text,
+      sorted by cumulative time.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_MAX_SEC = float(os.getenv("PROFILE_MAX_SEC", "60"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+# Lines of pstats output kept per captured job run
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "40"))
+
+
+def frame_label(code):
+    """'function (file.py:line)'; ';' is the collapsed format's separator, so it can't appear."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse(frame):
+    """The stack ending at `frame`, outermost first, as collapsed-format labels."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def sample_round(stacks, roots=None, skip=None):
+    """Adds one sample per target thread to `stacks` (see sample_stacks; `skip` is the sampler's ident)."""
+    if roots is None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        targets = {ident: names.get(ident, str(ident)) for ident in sys._current_frames() if ident != skip}
+    else:
+        targets = roots()
+    frames = sys._current_frames()
+    for ident, root in targets.items():
+        frame = frames.get(ident)
+        if frame is not None:
+            stacks[";".join([root.replace(";", ":")] + collapse(frame))] += 1
+
+
+def sample_stacks(seconds, interval=PROFILE_INTERVAL_MS / 1000, roots=None):
+    """
+    Samples stacks for `seconds`; roots() returns {thread ident: root label} of
+    the threads to sample at that moment (every other thread when None).
+    Returns (Counter of collapsed stacks, number of sampling rounds).
+    """
+    stacks = Counter()
+    me = threading.get_ident()
+    rounds = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        sample_round(stacks, roots, skip=me)
+        rounds += 1
+        time.sleep(interval)
+    return stacks, rounds
+
+
+def format_collapsed(stacks):
+    """Collapsed-format text, heaviest stacks first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class JobProfiles:
+    """Job ids to run under cProfile, and the stats of each one's last profiled run."""
+
+    def __init__(self, top=PROFILE_TOP):
+        self.top = top
+        self._lock = threading.Lock()
+        self._enabled = set()
+        self._captures = {}
+
+    def enable(self, job_id):
+        with self._lock:
+            self._enabled.add(job_id)
+
+    def disable(self, job_id):
+        with self._lock:
+            self._enabled.discard(job_id)
+
+    def run(self, job_id, func, *args):
+        """func(*args), under cProfile when job_id is enabled (executor hook)."""
+        with self._lock:
+            enabled = job_id in self._enabled
+        if not enabled:
+            return func(*args)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already owns this interpreter (sys.monitoring on 3.12+): run unprofiled
+            return func(*args)
+        started = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            profile.disable()
+            self._store(job_id, profile, time.monotonic() - started)
+
+    def _store(self, job_id, profile, elapsed):
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        with self._lock:
+            self._captures[job_id] = {
+                "captured_at": time.time(), "sec": round(elapsed, 3),
+                "calls": stats.total_calls, "stats": out.getvalue(),
+            }
+
+    def capture(self, job_id):
+        """The last profiled run of job_id (with its pstats text), or None."""
+        with self._lock:
+            return self._captures.get(job_id)
+
+    def report(self):
+        """Enabled job ids and a summary of each capture, for the admin endpoint."""
+        with self._lock:
+            return {
+                "enabled": sorted(self._enabled),
+                "captures": {job_id: {k: v for k, v in capture.items() if k != "stats"}
+                             for job_id, capture in self._captures.items()},
+            }
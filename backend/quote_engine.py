@@ -0,0 +1,277 @@
+"""
+Shared quote engine behind /api/quotes (user-defined watchlists).
+
+Every dashboard asks for its own symbols, but the engine keeps one table of
+symbols for all of them:
+    - a request subscribes its client to each symbol for QUOTES_LEASE_SEC;
+      a symbol's refcount is the number of clients with a live lease
+    - symbols nobody has quoted yet are fetched right away, up to
+      QUOTES_COLD_PER_CLIENT of them per client per QUOTES_REFRESH_SEC (the
+      rest wait for the next refresh); a symbol already being fetched for
+      another client is waited on, not fetched again
+    - once per QUOTES_REFRESH_SEC the first request to notice kicks off a
+      background refresh of every subscribed symbol, QUOTES_BATCH_SIZE symbols
+      per upstream batch; everyone else is answered from the table
+    - symbols without subscribers go idle and are dropped after
+      QUOTES_IDLE_TTL_SEC, or least-recently-used first to make room for a
+      new one beyond QUOTES_MAX_SYMBOLS. A symbol with a live lease is never
+      evicted: when only those are left, new symbols are rejected, as are a
+      client's new symbols beyond QUOTES_MAX_PER_CLIENT live leases
+So a thousand users watching overlapping symbols cost one upstream batch per
+interval per QUOTES_BATCH_SIZE distinct symbols, not one per user, and a
+client cycling through random tickers can neither push other users'
+subscriptions out nor add more than its own cold-fetch allowance of calls.
+
+With a shared store (APP_ROLE=collector/api/replica) only the publisher runs
+an engine: API workers record each request's subscriptions in the store and
+answer from the published `quotes` category, and the publisher's
+realtime_quotes job subscribes the engine to them, refreshes it and
+publishes snapshot(), so N workers still cost one batch per interval.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+SPEEDUP = float(os.getenv("SCHEDULE_SPEEDUP", "1"))
+QUOTES_REFRESH_SEC = float(os.getenv("QUOTES_REFRESH_SEC", "30")) / SPEEDUP
+QUOTES_LEASE_SEC = float(os.getenv("QUOTES_LEASE_SEC", "120")) / SPEEDUP
+QUOTES_IDLE_TTL_SEC = float(os.getenv("QUOTES_IDLE_TTL_SEC", "600")) / SPEEDUP
+QUOTES_MAX_SYMBOLS = int(os.getenv("QUOTES_MAX_SYMBOLS", "500"))
+QUOTES_MAX_PER_REQUEST = int(os.getenv("QUOTES_MAX_PER_REQUEST", "50"))
+QUOTES_BATCH_SIZE = int(os.getenv("QUOTES_BATCH_SIZE", "20"))
+QUOTES_MAX_PER_CLIENT = int(os.getenv("QUOTES_MAX_PER_CLIENT", "100"))
+# Symbols a client may have fetched on the spot per QUOTES_REFRESH_SEC (one batch)
+QUOTES_COLD_PER_CLIENT = int(os.getenv("QUOTES_COLD_PER_CLIENT", str(QUOTES_BATCH_SIZE)))
+
+# Yahoo symbols: AAPL, BRK-B, 005930.KS, ^GSPC, KRW=X, ES=F
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9.=\-^]{0,19}$")
+# Longest a request waits on another client's fetch of the same symbol
+PENDING_WAIT_SEC = 15
+
+
+def parse_symbols(raw, limit=QUOTES_MAX_PER_REQUEST):
+    """'aapl, MSFT,,005930.ks' -> (['AAPL', 'MSFT', '005930.KS'], invalid), de-duplicated, at most `limit`."""
+    symbols, invalid = [], []
+    for part in raw.split(","):
+        symbol = part.strip().upper()
+        if not symbol or symbol in symbols:
+            continue
+        if SYMBOL_PATTERN.match(symbol):
+            symbols.append(symbol)
+        else:
+            invalid.append(part.strip())
+    return symbols[:limit], invalid
+
+
+class _Symbol:
+    __slots__ = ("quote", "fetched_at", "last_access", "clients")
+
+    def __init__(self):
+        self.quote = None
+        self.fetched_at = None
+        self.last_access = 0.0
+        self.clients = {}  # client id -> lease expiry
+
+
+class QuoteEngine:
+    """Refcounted, LRU+TTL-bounded symbol table refreshed in upstream batches by fetch_batch(symbols) -> {symbol: Quote}."""
+
+    def __init__(self, fetch_batch, refresh_sec=QUOTES_REFRESH_SEC, lease_sec=QUOTES_LEASE_SEC,
+                 idle_ttl=QUOTES_IDLE_TTL_SEC, max_symbols=QUOTES_MAX_SYMBOLS, batch_size=QUOTES_BATCH_SIZE,
+                 max_per_client=QUOTES_MAX_PER_CLIENT, cold_per_client=QUOTES_COLD_PER_CLIENT):
+        self.fetch_batch = fetch_batch
+        self.refresh_sec = refresh_sec
+        self.lease_sec = lease_sec
+        self.idle_ttl = idle_ttl
+        self.max_symbols = max_symbols
+        self.batch_size = batch_size
+        self.max_per_client = max_per_client
+        self.cold_per_client = cold_per_client
+        self._lock = threading.Lock()
+        self._symbols = OrderedDict()  # least recently used first
+        self._pending = {}  # symbol -> Event set when its first fetch lands
+        self._by_client = {}  # client -> symbols it holds (possibly lapsed) leases on
+        self._cold = {}  # client -> (window start, symbols fetched on the spot in that window)
+        self._refreshing = False
+        self._last_refresh = 0.0
+        self.counts = {"requests": 0, "batches": 0, "symbols_fetched": 0, "refreshes": 0, "evicted": 0,
+                       "rejected": 0, "deferred": 0}
+        self.last_batch_ms = None
+
+    def _subscribe(self, symbols, client, now):
+        """Leases `symbols` to `client`; returns the ones rejected (table full of live leases, or client at its cap)."""
+        held = self._by_client.setdefault(client, set())
+        live = sum(1 for s in held if self._symbols[s].clients.get(client, 0) > now)
+        rejected = []
+        for symbol in symbols:
+            entry = self._symbols.get(symbol)
+            if entry is None or entry.clients.get(client, 0) <= now:
+                if live >= self.max_per_client or (entry is None and not self._make_room(now)):
+                    rejected.append(symbol)
+                    continue
+                live += 1
+            if entry is None:
+                entry = self._symbols[symbol] = _Symbol()
+            entry.clients[client] = now + self.lease_sec
+            entry.last_access = now
+            held.add(symbol)
+            self._symbols.move_to_end(symbol)
+        if not held:
+            del self._by_client[client]
+        self.counts["rejected"] += len(rejected)
+        return rejected
+
+    def subscribe(self, symbols, client):
+        """Leases `symbols` to `client` without fetching (the next refresh() picks new ones up)."""
+        with self._lock:
+            return self._subscribe(symbols, client, time.monotonic())
+
+    def _cold_allowance(self, client, now):
+        """Symbols `client` may still have fetched on the spot in the current refresh window."""
+        started, used = self._cold.get(client, (now, 0))
+        if now - started >= self.refresh_sec:
+            started, used = now, 0
+        self._cold[client] = (started, used)
+        return max(0, self.cold_per_client - used)
+
+    def quotes(self, symbols, client):
+        """{ symbol: Quote or None } for `symbols`, subscribing `client` to them (None for rejected ones too)."""
+        now = time.monotonic()
+        with self._lock:
+            self.counts["requests"] += 1
+            rejected = set(self._subscribe(symbols, client, now))
+            # Never fetched, or idle long enough that the refresh skipped it
+            stale = [s for s in symbols if s not in rejected and s not in self._pending and (
+                self._symbols[s].fetched_at is None or now - self._symbols[s].fetched_at > 2 * self.refresh_sec)]
+            allowance = self._cold_allowance(client, now)
+            if len(stale) > allowance:
+                # The rest are subscribed: the next refresh fetches them with everyone else's
+                self.counts["deferred"] += len(stale) - allowance
+                stale = stale[:allowance]
+            started, used = self._cold[client]
+            self._cold[client] = (started, used + len(stale))
+            waiting = [self._pending[s] for s in symbols if s in self._pending]
+            for symbol in stale:
+                self._pending[symbol] = threading.Event()
+            refresh_due = not self._refreshing and now - self._last_refresh >= self.refresh_sec
+            if refresh_due:
+                self._refreshing = True
+                self._last_refresh = now
+
+        if stale:
+            self._fetch(stale)
+        for event in waiting:
+            event.wait(PENDING_WAIT_SEC)
+        if refresh_due:
+            threading.Thread(target=self._refresh, daemon=True).start()
+
+        with self._lock:
+            return {s: self._symbols[s].quote if s in self._symbols else None for s in symbols}
+
+    def _fetch(self, symbols):
+        """Fetches `symbols` in upstream batches and stores the results (also for symbols that got none)."""
+        for i in range(0, len(symbols), self.batch_size):
+            batch = symbols[i:i + self.batch_size]
+            start = time.monotonic()
+            try:
+                fetched = self.fetch_batch(batch)
+            except Exception as e:
+                print(f"[Quotes] Batch of {len(batch)} failed: {e}")
+                fetched = {}
+            now = time.monotonic()
+            with self._lock:
+                self.counts["batches"] += 1
+                self.counts["symbols_fetched"] += len(batch)
+                self.last_batch_ms = round((now - start) * 1000, 1)
+                for symbol in batch:
+                    entry = self._symbols.get(symbol)
+                    if entry is not None:
+                        if symbol in fetched:
+                            entry.quote = fetched[symbol]
+                        entry.fetched_at = now
+                    event = self._pending.pop(symbol, None)
+                    if event is not None:
+                        event.set()
+
+    def refresh(self):
+        """Refreshes every subscribed symbol now (the publisher's job); False if a refresh is already running."""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            self._last_refresh = time.monotonic()
+        self._refresh()
+        return True
+
+    def snapshot(self):
+        """{ symbol: Quote } of every symbol with a quote, for publishing."""
+        with self._lock:
+            return {symbol: entry.quote for symbol, entry in self._symbols.items() if entry.quote is not None}
+
+    def _refresh(self):
+        """Refresh of every subscribed symbol; drops lapsed leases and idle symbols first."""
+        try:
+            with self._lock:
+                self.counts["refreshes"] += 1
+                now = time.monotonic()
+                self._expire(now)
+                # Symbols first fetched moments ago (by a request) wait for the next round
+                active = [s for s, entry in self._symbols.items() if entry.clients and s not in self._pending
+                          and (entry.fetched_at is None or now - entry.fetched_at >= self.refresh_sec / 2)]
+            if active:
+                self._fetch(active)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _expire(self, now):
+        for symbol, entry in list(self._symbols.items()):
+            for client, expires in list(entry.clients.items()):
+                if expires <= now:
+                    del entry.clients[client]
+                    self._release(client, symbol)
+            if not entry.clients and now - entry.last_access >= self.idle_ttl and symbol not in self._pending:
+                del self._symbols[symbol]
+                self.counts["evicted"] += 1
+        for client, (started, _) in list(self._cold.items()):
+            if now - started >= self.refresh_sec:
+                del self._cold[client]
+
+    def _release(self, client, symbol):
+        held = self._by_client.get(client)
+        if held is not None:
+            held.discard(symbol)
+            if not held:
+                del self._by_client[client]
+
+    def _make_room(self, now):
+        """Room for one more symbol: True if under max_symbols, or once the least recently used idle one is dropped."""
+        if len(self._symbols) < self.max_symbols:
+            return True
+        for symbol, entry in self._symbols.items():
+            if symbol not in self._pending and not any(expires > now for expires in entry.clients.values()):
+                for client in entry.clients:
+                    self._release(client, symbol)
+                del self._symbols[symbol]
+                self.counts["evicted"] += 1
+                return True
+        return False
+
+    def refcount(self, symbol):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._symbols.get(symbol)
+            return sum(expires > now for expires in entry.clients.values()) if entry else 0
+
+    def report(self):
+        """Table size, subscriptions and upstream batches, for /api/jobs."""
+        now = time.monotonic()
+        with self._lock:
+            subscriptions = sum(sum(e > now for e in entry.clients.values()) for entry in self._symbols.values())
+            active = sum(any(e > now for e in entry.clients.values()) for entry in self._symbols.values())
+            return {
+                "symbols": len(self._symbols), "active_symbols": active, "subscriptions": subscriptions,
+                "last_batch_ms": self.last_batch_ms, **self.counts,
+            }
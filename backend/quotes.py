@@ -0,0 +1,96 @@
+"""
+Typed quote / observation model produced by every fetcher.
+
+Values are kept as floats in base units (64K -> 64000.0, 898.0조 -> 8.98e14);
+display strings are produced once, when a cache category is serialized
+(to_wire), in the same { value, change, percent, date, ... } shape the
+dashboard has always received.
+"""
+from dataclasses import dataclass
+
+from numeric_parser import SCALES
+
+
+@dataclass(slots=True)
+class Quote:
+    """A live price, yield or index level."""
+
+    value: float
+    change: float | None = None     # absolute change, base units
+    percent: float | None = None    # relative change in %
+    unit: str = ""                  # "%" for rates quoted in percent
+    scale: str = ""                 # display magnitude suffix, a SCALES key
+    decimals: int = 2               # display precision of value
+    timestamp: str | None = None    # observation date (ISO) when not live
+    label: str | None = None        # reading shown in place of the percent (e.g. Fear & Greed rating)
+    url: str | None = None          # source link when it differs from the default card link
+
+    def format_value(self):
+        return f"{self.value / SCALES[self.scale]:,.{self.decimals}f}{self.scale}{self.unit}"
+
+    def format_change(self):
+        if self.change is None:
+            return "-"
+        return f"{self.change / SCALES[self.scale]:+,.{max(self.decimals, 2)}f}"
+
+    def format_percent(self):
+        if self.label is not None:
+            return self.label
+        if self.percent is None:
+            return "-"
+        return f"{self.percent:+,.2f}%"
+
+    def to_dict(self):
+        wire = {
+            "value": self.format_value(),
+            "change": self.format_change(),
+            "percent": self.format_percent(),
+            # Unformatted numbers for charts / client-side math
+            "raw_value": self.value,
+            "raw_change": self.change,
+            "raw_percent": self.percent,
+        }
+        if self.timestamp is not None:
+            wire["date"] = self.timestamp
+        if self.url is not None:
+            wire["url"] = self.url
+        return wire
+
+
+@dataclass(slots=True)
+class Observation(Quote):
+    """A periodic release (economic calendar, statistics table) with its next release date."""
+
+    next_date: str | None = None
+
+    def to_dict(self):
+        wire = Quote.to_dict(self)
+        wire["date"] = self.timestamp or ""
+        wire["next_date"] = self.next_date or ""
+        return wire
+
+
+@dataclass(slots=True)
+class Release:
+    """One row of an economic event's release history (values in base units, None when blank)."""
+
+    date: str                       # release date (ISO)
+    actual: float | None
+    forecast: float | None = None
+    previous: float | None = None
+
+
+def with_change(cls, value, previous, **fields):
+    """Builds a Quote/Observation whose change and percent are computed against `previous`."""
+    change = percent = None
+    if previous is not None and previous == previous:  # skip NaN
+        change = value - previous
+        percent = change / previous * 100 if previous != 0 else 0.0
+    return cls(value, change, percent, **fields)
+
+
+def to_wire(obj):
+    """json.dumps `default` hook: serializes model objects at the edge."""
+    if isinstance(obj, Quote):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,127 @@
+"""
+On-disk storage for time series: one fixed-width binary file per series.
+
+A file is a bare run of 12-byte little-endian records (int32 days since
+1970-01-01, float64 value), sorted by day, under SERIES_STORE_DIR. Reads go
+through a read-only np.memmap of the file, so
+    - a date range is two binary searches over the mapped day column and a
+      slice of the map: no copy, no parse, nothing loaded that isn't read
+    - responses stream straight out of the mapped pages in fixed-size chunks,
+      so memory stays flat however many years a series holds
+Writes replace the whole file atomically (temp file + rename); open maps of
+the old file stay valid until their readers let go of them. A read_only store
+(API workers reading the collector's directory) refuses write() and delete().
+"""
+import json
+import os
+import tempfile
+import threading
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+SERIES_DTYPE = np.dtype([("day", "<i4"), ("value", "<f8")])
+SERIES_STORE_DIR = os.getenv("SERIES_STORE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "series"))
+SUFFIX = ".bin"
+
+# Records per streamed chunk (48 KB of binary records)
+STREAM_CHUNK_POINTS = 4096
+BINARY_MEDIA_TYPE = "application/x-usa-invest-series"
+
+
+def epoch_day(iso_date):
+    """'YYYY-MM-DD' -> days since 1970-01-01."""
+    return int(np.datetime64(iso_date[:10], "D").astype("<i4"))
+
+
+class SeriesStore:
+    """Directory of series files with cached read-only maps."""
+
+    def __init__(self, root=SERIES_STORE_DIR, read_only=False):
+        self.root = root
+        self.read_only = read_only
+        self._maps = {}  # series id -> (file identity, memmap)
+        self._lock = threading.Lock()
+
+    def _path(self, series_id):
+        return os.path.join(self.root, quote(series_id, safe="") + SUFFIX)
+
+    def ids(self):
+        """Ids of every stored series."""
+        if not os.path.isdir(self.root):
+            return []
+        return [unquote(name[:-len(SUFFIX)]) for name in sorted(os.listdir(self.root)) if name.endswith(SUFFIX)]
+
+    def _check_writable(self):
+        if self.read_only:
+            raise PermissionError(f"series store {self.root} is read-only")
+
+    def write(self, series_id, records):
+        """Replaces a series with `records` (SERIES_DTYPE, sorted here if they aren't)."""
+        self._check_writable()
+        records = np.asarray(records, dtype=SERIES_DTYPE)
+        if len(records) > 1 and np.any(np.diff(records["day"]) < 0):
+            records = records[np.argsort(records["day"], kind="stable")]
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(records.tobytes())
+        os.replace(tmp, self._path(series_id))
+
+    def delete(self, series_id):
+        self._check_writable()
+        with self._lock:
+            self._maps.pop(series_id, None)
+        try:
+            os.remove(self._path(series_id))
+        except FileNotFoundError:
+            pass
+
+    def open(self, series_id):
+        """Read-only map of the series' records (KeyError if it isn't stored)."""
+        path = self._path(series_id)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise KeyError(series_id) from None
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._maps.get(series_id)
+            if cached is not None and cached[0] == identity:
+                return cached[1]
+            if st.st_size == 0:
+                mapped = np.empty(0, dtype=SERIES_DTYPE)
+            else:
+                mapped = np.memmap(path, dtype=SERIES_DTYPE, mode="r")
+            self._maps[series_id] = (identity, mapped)
+            return mapped
+
+    def file_bytes(self, series_id):
+        return os.path.getsize(self._path(series_id))
+
+    def range(self, series_id, start=None, end=None):
+        """Records with start <= date <= end (ISO dates, either open), as a zero-copy view of the map."""
+        mapped = self.open(series_id)
+        days = mapped["day"]
+        lo = int(np.searchsorted(days, epoch_day(start), "left")) if start else 0
+        hi = int(np.searchsorted(days, epoch_day(end), "right")) if end else len(mapped)
+        return mapped[lo:hi]
+
+
+def stream_binary(records, chunk_points=STREAM_CHUNK_POINTS):
+    """Yields the raw 12-byte records as memoryviews of the mapped pages."""
+    for i in range(0, len(records), chunk_points):
+        yield memoryview(records[i:i + chunk_points]).cast("B")
+
+
+def stream_json(series_id, records, chunk_points=STREAM_CHUNK_POINTS):
+    """Yields {"id", "dates", "values"} JSON for `records`, converting one chunk at a time."""
+    yield f'{{"id":{json.dumps(series_id)},"dates":['.encode()
+    for i in range(0, len(records), chunk_points):
+        dates = records["day"][i:i + chunk_points].astype("datetime64[D]").astype("U10")
+        yield (("," if i else "") + ",".join(f'"{d}"' for d in dates)).encode()
+    yield b'],"values":['
+    for i in range(0, len(records), chunk_points):
+        values = records["value"][i:i + chunk_points].tolist()
+        yield (("," if i else "") + ",".join(map(repr, values))).encode()
+    yield b"]}"
@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from quotes import to_wire
+
+# Default location of the shared snapshot database (override with SHARED_STORE_PATH)
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "shared_cache.db")
+
+
+class SharedStore:
+    """
+    SQLite (WAL) snapshot store shared between one collector process and N API workers.
+    The collector publishes whole categories; workers poll the cheap version column
+    and only reload/deserialize a category when its version moved.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SHARED_STORE_PATH", DEFAULT_STORE_PATH)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot ("
+            " category TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        # Watchlist leases recorded by API workers, refreshed by the publisher's quote engine
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS quote_subscription ("
+            " client TEXT NOT NULL,"
+            " symbol TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " PRIMARY KEY (client, symbol)) WITHOUT ROWID"
+        )
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, category, data):
+        """Writes a full category snapshot and bumps its version."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO snapshot (category, version, payload, updated_at) VALUES (?, 1, ?, ?)"
+            " ON CONFLICT(category) DO UPDATE SET version = version + 1,"
+            " payload = excluded.payload, updated_at = excluded.updated_at",
+            (category, json.dumps(data, ensure_ascii=False, default=to_wire), time.time()),
+        )
+        conn.commit()
+
+    def versions(self):
+        """Returns { category: version } without reading any payloads."""
+        return dict(self._conn().execute("SELECT category, version FROM snapshot").fetchall())
+
+    def load(self, category):
+        """Returns (version, data) for a category, or (0, None) if never published."""
+        row = self._conn().execute(
+            "SELECT version, payload FROM snapshot WHERE category = ?", (category,)
+        ).fetchone()
+        if not row:
+            return 0, None
+        return row[0], json.loads(row[1])
+
+    def subscribe_quotes(self, symbols, client, lease_sec):
+        """Records (or extends) `client`'s lease on each symbol for lease_sec."""
+        expires_at = time.time() + lease_sec
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO quote_subscription (client, symbol, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(client, symbol) DO UPDATE SET expires_at = excluded.expires_at",
+            [(client, symbol, expires_at) for symbol in symbols],
+        )
+        conn.commit()
+
+    def quote_subscriptions(self):
+        """Returns { client: [symbols] } of live leases, dropping the lapsed ones."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM quote_subscription WHERE expires_at <= ?", (now,))
+        conn.commit()
+        subscriptions = {}
+        for client, symbol in conn.execute("SELECT client, symbol FROM quote_subscription ORDER BY client"):
+            subscriptions.setdefault(client, []).append(symbol)
+        return subscriptions
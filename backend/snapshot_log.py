@@ -0,0 +1,208 @@
+"""
+Append-only archive of every cache change, for point-in-time reads
+(/api/finance/at): audits of what the dashboard showed, and alert backtests.
+
+One segment per UTC day under SNAPSHOT_LOG_DIR:
+    YYYY-MM-DD.seg  blocks, one per cache update of one category: a 6-byte
+                    header (b"SB" + uint32 length) and zlib-compressed JSON
+                    holding the update column-wise, {"keys": [...], "values": [...]}
+    YYYY-MM-DD.idx  the sparse time index: one fixed-width INDEX_DTYPE record
+                    per block (time, offset, length, category, keyframe)
+A category's first block in a segment, and every SNAPSHOT_KEYFRAME_EVERY-th
+one after it, is a keyframe holding the whole category; the rest hold only
+the changed keys. at(category, ts) binary-searches the day's index for the
+last keyframe at or before ts and replays the deltas after it, reading just
+those blocks: one index read plus at most SNAPSHOT_KEYFRAME_EVERY blocks,
+however long the log is.
+
+Blocks are written before their index records, so a crash can orphan a block
+but never leave an index record pointing at a partial one.
+"""
+import bisect
+import calendar
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from quotes import to_wire
+
+SNAPSHOT_LOG_DIR = os.getenv("SNAPSHOT_LOG_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "snapshots"))
+SNAPSHOT_KEYFRAME_EVERY = int(os.getenv("SNAPSHOT_KEYFRAME_EVERY", "64"))
+# Segments older than this many days are deleted at day rollover (0 keeps everything)
+SNAPSHOT_RETENTION_DAYS = int(os.getenv("SNAPSHOT_RETENTION_DAYS", "90"))
+
+CATEGORIES = ("stocks", "economy", "rates", "exchange", "history", "events")
+INDEX_DTYPE = np.dtype([
+    ("ts", "<f8"), ("offset", "<u8"), ("length", "<u4"), ("category", "u1"), ("keyframe", "u1"), ("pad", "V2"),
+])
+BLOCK_MAGIC = b"SB"
+BLOCK_HEADER = struct.Struct("<2sI")
+# Day indexes kept parsed in memory (today's is re-read when it grows)
+INDEX_CACHE_DAYS = 8
+# Naive ISO times in ?ts= are Korea time, like the scheduler's cron
+KST = timezone(timedelta(hours=9))
+
+
+def day_of(ts):
+    """UTC day (segment name) of an epoch timestamp."""
+    return time.strftime("%Y-%m-%d", time.gmtime(ts))
+
+
+def parse_ts(text):
+    """?ts= value -> epoch seconds: epoch seconds or milliseconds, or ISO 8601 (naive = KST)."""
+    try:
+        value = float(text)
+    except ValueError:
+        when = datetime.fromisoformat(text.strip())
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=KST)
+        return when.timestamp()
+    return value / 1000 if value > 1e11 else value
+
+
+class SnapshotLog:
+    """Day segments of cache change blocks plus their time index."""
+
+    def __init__(self, root=SNAPSHOT_LOG_DIR, keyframe_every=SNAPSHOT_KEYFRAME_EVERY,
+                 retention_days=SNAPSHOT_RETENTION_DAYS):
+        self.root = root
+        self.keyframe_every = keyframe_every
+        self.retention_days = retention_days
+        self._lock = threading.RLock()
+        self._deltas = {}  # (day, category) -> delta blocks since the last keyframe
+        self._indexes = OrderedDict()  # day -> (index file size, records)
+        self.counts = {"blocks": 0, "keyframes": 0, "bytes": 0, "lookups": 0, "blocks_read": 0}
+
+    def _path(self, day, ext):
+        return os.path.join(self.root, f"{day}.{ext}")
+
+    def days(self):
+        """Days with a segment, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.root) if name.endswith(".idx"))
+
+    # --- Writing ---
+
+    def append(self, category, changes, state, ts=None):
+        """Logs `changes` ({key: value}) to `category`; state() returns the whole category when a keyframe is due."""
+        with self._lock:
+            ts = time.time() if ts is None else ts
+            day = day_of(ts)
+            since = self._deltas.get((day, category))
+            keyframe = since is None or since + 1 >= self.keyframe_every
+            data = state() if keyframe else changes
+            body = zlib.compress(json.dumps(
+                {"keys": list(data), "values": list(data.values())}, ensure_ascii=False, default=to_wire,
+            ).encode("utf-8"))
+            block = BLOCK_HEADER.pack(BLOCK_MAGIC, len(body)) + body
+
+            segment = self._path(day, "seg")
+            if not os.path.exists(segment):
+                self._roll_over(day)
+            with open(segment, "ab") as f:
+                offset = f.tell()
+                f.write(block)
+            entry = np.zeros(1, dtype=INDEX_DTYPE)
+            entry[0]["ts"], entry[0]["offset"], entry[0]["length"] = ts, offset, len(block)
+            entry[0]["category"], entry[0]["keyframe"] = CATEGORIES.index(category), keyframe
+            with open(self._path(day, "idx"), "ab") as f:
+                f.write(entry.tobytes())
+
+            self._deltas[(day, category)] = 0 if keyframe else since + 1
+            self.counts["blocks"] += 1
+            self.counts["keyframes"] += keyframe
+            self.counts["bytes"] += len(block)
+
+    def _roll_over(self, day):
+        """First block of a new day: forgets the old days' keyframe counters and drops expired segments."""
+        os.makedirs(self.root, exist_ok=True)
+        self._deltas = {key: n for key, n in self._deltas.items() if key[0] == day}
+        if not self.retention_days:
+            return
+        cutoff = day_of(calendar.timegm(time.strptime(day, "%Y-%m-%d")) - self.retention_days * 86400)
+        for old in self.days():
+            if old < cutoff:
+                for ext in ("seg", "idx"):
+                    try:
+                        os.remove(self._path(old, ext))
+                    except FileNotFoundError:
+                        pass
+                self._indexes.pop(old, None)
+
+    # --- Reading ---
+
+    def _index(self, day):
+        path = self._path(day, "idx")
+        size = os.path.getsize(path)
+        cached = self._indexes.get(day)
+        if cached is not None and cached[0] == size:
+            self._indexes.move_to_end(day)
+            return cached[1]
+        # A record still being written is left for the next read
+        records = np.fromfile(path, dtype=INDEX_DTYPE, count=size // INDEX_DTYPE.itemsize)
+        self._indexes[day] = (size, records)
+        while len(self._indexes) > INDEX_CACHE_DAYS:
+            self._indexes.popitem(last=False)
+        return records
+
+    def _read_blocks(self, day, entries):
+        blocks = []
+        with open(self._path(day, "seg"), "rb") as f:
+            for entry in entries:
+                f.seek(int(entry["offset"]))
+                raw = f.read(int(entry["length"]))
+                magic, length = BLOCK_HEADER.unpack_from(raw)
+                if magic != BLOCK_MAGIC:
+                    raise ValueError(f"corrupt snapshot block in {day} at {int(entry['offset'])}")
+                columns = json.loads(zlib.decompress(raw[BLOCK_HEADER.size:BLOCK_HEADER.size + length]))
+                blocks.append((bool(entry["keyframe"]), dict(zip(columns["keys"], columns["values"]))))
+        return blocks
+
+    def at(self, category, ts):
+        """(state, as_of) of `category` as of epoch time `ts`; (None, None) before its first logged change."""
+        category_id = CATEGORIES.index(category)
+        with self._lock:
+            self.counts["lookups"] += 1
+            days = self.days()
+            pos = bisect.bisect_right(days, day_of(ts))
+            while pos > 0:
+                pos -= 1
+                day = days[pos]
+                index = self._index(day)
+                # Blocks are appended in time order: everything up to ts is a prefix of the index
+                prefix = index[:np.searchsorted(index["ts"], ts, side="right")]
+                mine = np.flatnonzero(prefix["category"] == category_id)
+                if not len(mine):
+                    continue
+                keyframes = mine[prefix["keyframe"][mine] == 1]
+                if len(keyframes):
+                    state, replay = {}, mine[mine >= keyframes[-1]]
+                else:
+                    # Keyframe lost (crash between block and index write): continue from the previous day
+                    day_start = calendar.timegm(time.strptime(day, "%Y-%m-%d"))
+                    state, replay = self.at(category, day_start - 1e-6)[0] or {}, mine
+                entries = prefix[replay]
+                for keyframe, columns in self._read_blocks(day, entries):
+                    if keyframe:
+                        state = columns
+                    else:
+                        state.update(columns)
+                self.counts["blocks_read"] += len(entries)
+                return state, float(entries["ts"][-1])
+            return None, None
+
+    def report(self):
+        """Blocks written and read, and the log's size on disk, for /api/jobs."""
+        with self._lock:
+            days = self.days()
+            disk = sum(os.path.getsize(self._path(day, ext)) for day in days for ext in ("seg", "idx")
+                       if os.path.exists(self._path(day, ext)))
+            return {**self.counts, "days": len(days), "first_day": days[0] if days else None, "disk_bytes": disk}
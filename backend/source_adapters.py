@@ -0,0 +1,176 @@
+"""
+JSON quote adapters for sources otherwise scraped from full HTML pages.
+
+An adapter turns a quote page URL into a request for the lightweight JSON
+endpoint the site's own front end polls, and parses the answer into the same
+Quote the HTML scraper returns. crawler_service tries a source's adapters
+first and falls back to the HTML scraper when an adapter has nothing (unknown
+instrument, endpoint error, unexpected payload); the scraper's page then
+teaches the adapter what it was missing (e.g. Investing's pair id).
+
+    investing       api.investing.com daily chart bars     ~2 KB vs ~60 KB page
+    google_finance  batchexecute quote RPC                  ~1 KB vs ~1 MB page
+
+QUOTE_JSON_ADAPTERS=false disables them (HTML scrapers only).
+"""
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from quotes import with_change, Quote
+
+QUOTE_JSON_ADAPTERS = os.getenv("QUOTE_JSON_ADAPTERS", "true").lower() == "true"
+# After a failed JSON fetch, that page goes straight to the HTML scraper for this long
+ADAPTER_RETRY_SEC = float(os.getenv("ADAPTER_RETRY_SEC", "600"))
+
+
+class SourceAdapter:
+    """Base: request() builds (method, url, requests kwargs) or None; parse() returns a Quote or None."""
+
+    name = "adapter"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failed_until = {}
+        self.counts = {"json": 0, "failed": 0}
+
+    def available(self, page_url):
+        with self._lock:
+            return time.monotonic() >= self._failed_until.get(page_url, 0)
+
+    def request(self, page_url):
+        return None
+
+    def parse(self, page_url, body):
+        return None
+
+    def learn(self, page_url, html, quote):
+        """Called with the HTML fallback's page and result."""
+
+    def succeeded(self, page_url):
+        with self._lock:
+            self.counts["json"] += 1
+
+    def failed(self, page_url):
+        with self._lock:
+            self.counts["failed"] += 1
+            self._failed_until[page_url] = time.monotonic() + ADAPTER_RETRY_SEC
+
+
+class InvestingChartAdapter(SourceAdapter):
+    """
+    Investing.com quote pages -> api.investing.com/api/financialdata/<pair id>/historical/chart.
+    The last daily bar's close is the live price and the one before it the
+    previous close. The pair id and display precision come from the first
+    HTML fetch of each page.
+    """
+
+    name = "investing_chart"
+    CHART_URL = "https://api.investing.com/api/financialdata/{pair_id}/historical/chart/"
+    # Next.js page data / legacy markup
+    PAIR_ID_PATTERNS = [
+        re.compile(r'"instrument"\s*:\s*\{\s*"base"\s*:\s*\{\s*"id"\s*:\s*(\d+)'),
+        re.compile(r'data-pair-id="(\d+)"'),
+        re.compile(r'"pair_id"\s*:\s*"?(\d+)'),
+    ]
+
+    def __init__(self):
+        super().__init__()
+        self.instruments = {}  # page url -> (pair id, Quote display fields)
+
+    def request(self, page_url):
+        known = self.instruments.get(page_url)
+        if known is None:
+            return None
+        return "GET", self.CHART_URL.format(pair_id=known[0]), {
+            "params": {"interval": "P1D", "pointscount": "60"},
+            "headers": {"Accept": "application/json", "Referer": page_url},
+        }
+
+    def parse(self, page_url, body):
+        bars = json.loads(body).get("data") or []
+        closes = [bar[4] for bar in bars if len(bar) > 4 and bar[4] is not None]
+        if not closes:
+            return None
+        fields = self.instruments[page_url][1]
+        quote = with_change(Quote, float(closes[-1]), float(closes[-2]) if len(closes) > 1 else None, **fields)
+        if quote.change is not None:
+            # Same precision the page shows, so a JSON quote equals the scraped one
+            quote.change = round(quote.change, fields["decimals"] if fields["decimals"] is not None else 2)
+            quote.percent = round(quote.percent, 2)
+        return quote
+
+    def learn(self, page_url, html, quote):
+        for pattern in self.PAIR_ID_PATTERNS:
+            match = pattern.search(html)
+            if match:
+                self.instruments[page_url] = (match.group(1), {"unit": quote.unit, "scale": quote.scale, "decimals": quote.decimals})
+                with self._lock:
+                    self._failed_until.pop(page_url, None)
+                return
+
+
+class GoogleFinanceRpcAdapter(SourceAdapter):
+    """
+    Google Finance quote pages (/finance/quote/<SYMBOL>:<EXCHANGE>) -> the
+    batchexecute quote RPC the page itself calls. The answer is an anti-XSSI
+    prefixed envelope; the quote entry carries [price, change, percent, ...].
+    """
+
+    name = "google_finance_rpc"
+    RPC_URL = "https://www.google.com/finance/_/GoogleFinanceUi/data/batchexecute"
+    RPC_ID = "xh8wxf"
+
+    def request(self, page_url):
+        path = urlsplit(page_url).path
+        if "/finance/quote/" not in path:
+            return None
+        symbol, _, exchange = path.rsplit("/", 1)[-1].partition(":")
+        if not exchange:
+            return None
+        inner = json.dumps([[[None, [symbol, exchange]]], 1], separators=(",", ":"))
+        freq = json.dumps([[[self.RPC_ID, inner, None, "generic"]]], separators=(",", ":"))
+        return "POST", self.RPC_URL, {
+            "params": {"rpcids": self.RPC_ID, "hl": "ko"},
+            "data": {"f.req": freq},
+            "headers": {"Content-Type": "application/x-www-form-urlencoded;charset=UTF-8", "Referer": page_url},
+        }
+
+    def parse(self, page_url, body):
+        text = body.decode("utf-8") if isinstance(body, bytes) else body
+        for line in text.splitlines():
+            if not line.startswith('[["wrb.fr"'):
+                continue
+            for entry in json.loads(line):
+                if entry[0] != "wrb.fr" or entry[1] != self.RPC_ID or not entry[2]:
+                    continue
+                try:
+                    quote = json.loads(entry[2])[0][0][0]
+                    price, change, percent = quote[5][:3]
+                except (IndexError, TypeError, ValueError):
+                    return None
+                if price is None:
+                    return None
+                return Quote(float(price), change, percent)
+        return None
+
+
+ADAPTERS = {
+    "investing": [InvestingChartAdapter()],
+    "google_finance": [GoogleFinanceRpcAdapter()],
+}
+
+
+def adapters_for(source):
+    """The enabled JSON adapters of a source, in the order to try them."""
+    if not QUOTE_JSON_ADAPTERS:
+        return []
+    return ADAPTERS.get(source, [])
+
+
+def report():
+    """JSON hits vs failures (served by the HTML scraper instead) per adapter, for /api/jobs."""
+    return {adapter.name: dict(adapter.counts) for adapters in ADAPTERS.values() for adapter in adapters}
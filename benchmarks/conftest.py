@@ -0,0 +1,82 @@
+import atexit
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "backend"))
+sys.path.append(BENCH_DIR)
+
+# Benchmarks loop on the stand-in as fast as they can; crawler_transport's pacing is measured separately
+os.environ.setdefault("CRAWLER_RATE_PER_MIN", "0")
+
+# Keep the stores that main.py and the module-level singletons open out of the repository's data/
+DATA_DIR = tempfile.mkdtemp(prefix="bench-data-")
+atexit.register(shutil.rmtree, DATA_DIR, ignore_errors=True)
+for name, default in (
+    ("SERIES_STORE_DIR", "series"),
+    ("DAILY_SERIES_DIR", "daily"),
+    ("EVENT_SERIES_DIR", "events"),
+    ("SNAPSHOT_LOG_DIR", "snapshots"),
+    ("DURABLE_CACHE_PATH", "cache.db"),
+    ("SHARED_STORE_PATH", "shared_cache.db"),
+):
+    os.environ.setdefault(name, os.path.join(DATA_DIR, default))
+
+import crawler_service  # noqa: E402  (imports fear_and_greed, which installs requests_cache)
+import requests_cache  # noqa: E402
+
+from upstream_server import FIXTURE_DIR, load_manifest, local_url, start_server  # noqa: E402
+
+# fear_and_greed installs a global 1-minute requests cache on import.
+# Disable it so end-to-end benchmarks measure real round trips to the stand-in.
+requests_cache.uninstall_cache()
+
+MANIFEST = {entry["name"]: entry for entry in load_manifest()}
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, MANIFEST[name]["file"]), encoding="utf-8") as f:
+        return f.read()
+
+
+def read_fixture_json(name):
+    return json.loads(read_fixture(name))
+
+
+def record_allocations(benchmark, func, *args):
+    """Runs func once under tracemalloc and stores peak/net bytes in the benchmark report."""
+    tracemalloc.start()
+    try:
+        func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["alloc_peak_bytes"] = peak
+    benchmark.extra_info["alloc_retained_bytes"] = current
+
+
+@pytest.fixture(scope="session")
+def upstream():
+    """Base URL of the local stand-in server serving the recorded fixtures."""
+    server, base_url = start_server()
+    yield base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def upstream_url(upstream):
+    """Maps a fixture name to its URL on the stand-in server."""
+    return lambda name: local_url(upstream, MANIFEST[name]["url"])
+
+
+@pytest.fixture(scope="session")
+def app_main():
+    """backend/main.py imported (scheduler not started), its stores under DATA_DIR."""
+    import main
+    return main
@@ -0,0 +1,139 @@
+"""
+Hammers the dashboard API routes while the scheduler pipeline runs against
+the local stand-in upstream, then reports API latency percentiles and job
+throughput.
+
+Typical run (three terminals):
+    python benchmarks/upstream_server.py --port 9000 --latency-ms 150 --jitter-ms 100 --rate-limit 5
+    UPSTREAM_BASE_URL=http://127.0.0.1:9000 SCHEDULE_SPEEDUP=20 CRAWLER_RATE_PER_MIN=0 PROD=true FRED_API_KEY=x python backend/main.py
+    python benchmarks/load_driver.py --duration 60 --concurrency 32 --upstream http://127.0.0.1:9000
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+DEFAULT_ROUTES = [
+    "/api/finance/stocks",
+    "/api/finance/economy",
+    "/api/finance/rates",
+    "/api/finance/exchange",
+    "/api/finance/history",
+    "/api/timer",
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class LoadResult:
+    def __init__(self, routes):
+        self.latencies = {route: [] for route in routes}
+        self.errors = dict.fromkeys(routes, 0)
+        self._lock = threading.Lock()
+
+    def add(self, route, elapsed, ok):
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            if not ok:
+                self.errors[route] += 1
+
+
+def worker(base_url, routes, deadline, result, offset):
+    session = requests.Session()
+    i = offset
+    while time.monotonic() < deadline:
+        route = routes[i % len(routes)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            ok = session.get(base_url + route, timeout=10).status_code == 200
+        except requests.RequestException:
+            ok = False
+        result.add(route, time.perf_counter() - start, ok)
+
+
+def get_json(url):
+    try:
+        return requests.get(url, timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def run(base_url, routes, duration, concurrency):
+    result = LoadResult(routes)
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=worker, args=(base_url, routes, deadline, result, n), daemon=True)
+        for n in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return result
+
+
+def report(result, duration, jobs_before, jobs_after, upstream_stats):
+    print(f"\n{'route':<26}{'count':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    all_latencies = []
+    for route, values in result.latencies.items():
+        values.sort()
+        all_latencies.extend(values)
+        print(f"{route:<26}{len(values):>8}{result.errors[route]:>6}{len(values) / duration:>9.1f}"
+              f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+              f"{percentile(values, 99) * 1000:>9.1f}{(values[-1] if values else 0) * 1000:>9.1f}")
+    all_latencies.sort()
+    print(f"{'ALL':<26}{len(all_latencies):>8}{sum(result.errors.values()):>6}{len(all_latencies) / duration:>9.1f}"
+          f"{percentile(all_latencies, 50) * 1000:>9.1f}{percentile(all_latencies, 95) * 1000:>9.1f}"
+          f"{percentile(all_latencies, 99) * 1000:>9.1f}")
+
+    if jobs_after:
+        before = (jobs_before or {}).get("jobs", {})
+        print(f"\n{'job':<40}{'runs':>6}{'errors':>8}{'avg sec':>9}")
+        for job_id, stats in sorted(jobs_after["jobs"].items()):
+            prev = before.get(job_id, {"runs": 0, "errors": 0, "total_sec": 0.0})
+            runs = stats["runs"] - prev["runs"]
+            if runs <= 0:
+                continue
+            avg = (stats["total_sec"] - prev["total_sec"]) / runs
+            print(f"{job_id:<40}{runs:>6}{stats['errors'] - prev['errors']:>8}{avg:>9.2f}")
+
+    executor = (jobs_after or {}).get("executor")
+    if executor:
+        print(f"\n{'class':<12}{'done':>6}{'cancel':>8}{'queued':>8}{'max q':>7}{'max wait ms':>13}")
+        for priority, stats in executor["classes"].items():
+            print(f"{priority:<12}{stats['completed']:>6}{stats['cancelled']:>8}{stats['queued']:>8}"
+                  f"{stats['max_queued']:>7}{stats['max_wait_ms']:>13.1f}")
+
+    if upstream_stats:
+        totals = upstream_stats["totals"]
+        print(f"\nUpstream: {totals['served']} served, {totals['errors']} injected errors, "
+              f"{totals['throttled']} throttled, {totals['missing']} missing fixtures "
+              f"({totals['served'] / duration:.1f} req/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load driver for the dashboard API.")
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--route", action="append", dest="routes", help="route to hit (repeatable)")
+    parser.add_argument("--upstream", help="stand-in upstream base URL, to report its counters")
+    args = parser.parse_args()
+
+    routes = args.routes or DEFAULT_ROUTES
+    if args.upstream:
+        requests.post(args.upstream.rstrip("/") + "/__reset", timeout=5)
+    jobs_before = get_json(args.base + "/api/jobs")
+
+    print(f"[Load] {args.concurrency} workers x {args.duration:.0f}s against {args.base}")
+    result = run(args.base, routes, args.duration, args.concurrency)
+
+    upstream_stats = get_json(args.upstream.rstrip("/") + "/__stats") if args.upstream else None
+    report(result, args.duration, jobs_before, get_json(args.base + "/api/jobs"), upstream_stats)
@@ -0,0 +1,79 @@
+"""
+Re-records the fixtures listed in fixtures/manifest.json from the live sites.
+
+Run this only when a site layout changes; benchmark numbers are comparable
+across commits only while the fixtures stay the same.
+
+Usage:
+    FRED_API_KEY=... python benchmarks/record_fixtures.py [name ...]
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from crawler_service import USER_AGENTS, CALENDAR_COUNTRIES, CALENDAR_DAYS_BACK, CALENDAR_DAYS_AHEAD
+from upstream_server import FIXTURE_DIR, load_manifest
+
+
+def live_url(entry):
+    url = entry["url"]
+    if "api.stlouisfed.org" in url:
+        url += "&" + urlencode({"api_key": os.environ.get("FRED_API_KEY", "")})
+    elif "newyorkfed.org" in url:
+        end = datetime.now()
+        url += "&" + urlencode({
+            "startDate": (end - timedelta(days=7)).strftime("%Y-%m-%d"),
+            "endDate": end.strftime("%Y-%m-%d"),
+        })
+    return url
+
+
+def live_form(entry):
+    """Form body for POST entries (the Investing calendar listing: a window around today)."""
+    end = datetime.now()
+    return [("country[]", c) for c in CALENDAR_COUNTRIES] + [
+        ("dateFrom", (end - timedelta(days=CALENDAR_DAYS_BACK)).strftime("%Y-%m-%d")),
+        ("dateTo", (end + timedelta(days=CALENDAR_DAYS_AHEAD)).strftime("%Y-%m-%d")),
+        ("currentTab", "custom"),
+        ("limit_from", "0"),
+    ]
+
+
+def record(entry):
+    headers = {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Referer": "https://www.google.com/",
+    }
+    if entry.get("method") == "POST":
+        headers["X-Requested-With"] = "XMLHttpRequest"
+        resp = requests.post(live_url(entry), data=live_form(entry), headers=headers, timeout=15)
+    else:
+        resp = requests.get(live_url(entry), headers=headers, timeout=15)
+    if resp.status_code != 200:
+        print(f"[Record] {entry['name']}: status {resp.status_code}, kept old fixture")
+        return False
+    with open(os.path.join(FIXTURE_DIR, entry["file"]), "wb") as f:
+        f.write(resp.content)
+    print(f"[Record] {entry['name']}: {len(resp.content):,} bytes")
+    return True
+
+
+if __name__ == "__main__":
+    wanted = set(sys.argv[1:])
+    for entry in load_manifest():
+        if wanted and entry["name"] not in wanted:
+            continue
+        if "same_as" in entry:
+            # Served from another entry's recording; give it its own "file" to record it
+            continue
+        if entry.get("synthetic"):
+            # Hand-built to agree with the recordings (JSON adapter payloads, a page with a pair id)
+            continue
+        record(entry)
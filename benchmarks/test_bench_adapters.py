@@ -0,0 +1,138 @@
+"""
+JSON quote adapters (source_adapters.py) vs the HTML scrapers they front:
+parse cost and payload size per quote, and the fetch path end to end against
+the stand-in server (HTML first, pair id learned, JSON after; HTML again when
+the JSON endpoint is missing; HTML only for a page without a pair id).
+
+The recorded Investing pages carry no pair id, so the learning path runs on
+investing_quote_synthetic_8839, a hand-built page with the S&P 500 futures
+price and Next.js page data; the chart/RPC payloads are synthetic too.
+"""
+import pytest
+
+import crawler_service
+import source_adapters
+from conftest import MANIFEST, read_fixture, record_allocations
+from upstream_server import FIXTURE_DIR
+
+INVESTING_PAIRS = {
+    "investing_quote_sp_futures": "8839",
+    "investing_quote_us_2y": "23701",
+    "investing_quote_kr_10y": "29292",
+}
+SYNTHETIC_PAGE = "investing_quote_synthetic_8839"
+
+
+@pytest.fixture
+def adapters(monkeypatch, upstream):
+    """Fresh adapters (nothing learned yet), with live upstream URLs redirected to the stand-in."""
+    fresh = {
+        "investing": [source_adapters.InvestingChartAdapter()],
+        "google_finance": [source_adapters.GoogleFinanceRpcAdapter()],
+    }
+    monkeypatch.setattr(source_adapters, "ADAPTERS", fresh)
+    monkeypatch.setattr(source_adapters, "QUOTE_JSON_ADAPTERS", True)
+    monkeypatch.setenv("UPSTREAM_BASE_URL", upstream)
+    return fresh
+
+
+def fixture_bytes(name):
+    with open(f"{FIXTURE_DIR}/{MANIFEST[name]['file']}", "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", list(INVESTING_PAIRS))
+def test_parse_investing_chart_json(benchmark, name):
+    """Same Quote as the HTML page, from a fraction of the bytes."""
+    url = MANIFEST[name]["url"]
+    html = read_fixture(name)
+    expected = crawler_service.parse_investing_price(html, name)
+    adapter = source_adapters.InvestingChartAdapter()
+    # What learn() would keep from a page that had the pair id
+    adapter.instruments[url] = (INVESTING_PAIRS[name],
+                                {"unit": expected.unit, "scale": expected.scale, "decimals": expected.decimals})
+
+    body = fixture_bytes(f"investing_chart_{INVESTING_PAIRS[name]}")
+    record_allocations(benchmark, adapter.parse, url, body)
+    benchmark.extra_info["json_bytes"] = len(body)
+    benchmark.extra_info["html_bytes"] = len(html.encode())
+    result = benchmark(adapter.parse, url, body)
+    assert result == expected
+
+
+def test_parse_google_finance_rpc(benchmark):
+    url = MANIFEST["google_finance_rut"]["url"]
+    html = read_fixture("google_finance_rut")
+    body = fixture_bytes("google_finance_rpc_rut")
+    adapter = source_adapters.GoogleFinanceRpcAdapter()
+    record_allocations(benchmark, adapter.parse, url, body)
+    benchmark.extra_info["json_bytes"] = len(body)
+    benchmark.extra_info["html_bytes"] = len(html.encode())
+    result = benchmark(adapter.parse, url, body)
+    expected = crawler_service.parse_google_finance(html)
+    assert (result.value, result.change, result.percent) == (expected.value, expected.change, expected.percent)
+
+
+def test_investing_learns_then_uses_json(adapters):
+    url = MANIFEST[SYNTHETIC_PAGE]["url"]
+    adapter = adapters["investing"][0]
+    first = crawler_service.fetch_investing_price(url, SYNTHETIC_PAGE)
+    assert adapter.counts == {"json": 0, "failed": 0}
+    assert adapter.instruments[url][0] == "8839"
+
+    second = crawler_service.fetch_investing_price(url, SYNTHETIC_PAGE)
+    assert adapter.counts == {"json": 1, "failed": 0}
+    assert second == first
+    assert second.to_dict().keys() == first.to_dict().keys()
+
+
+@pytest.mark.parametrize("name", list(INVESTING_PAIRS))
+def test_page_without_pair_id_stays_on_html(adapters, name):
+    """None of the PAIR_ID_PATTERNS match a recorded page: nothing is learned and no JSON request is made."""
+    html = read_fixture(name)
+    assert not any(pattern.search(html) for pattern in source_adapters.InvestingChartAdapter.PAIR_ID_PATTERNS)
+    url = MANIFEST[name]["url"]
+    adapter = adapters["investing"][0]
+    first = crawler_service.fetch_investing_price(url, name)
+    assert first is not None and crawler_service.fetch_investing_price(url, name) == first
+    assert adapter.instruments == {}
+    assert adapter.counts == {"json": 0, "failed": 0}
+
+
+def test_investing_falls_back_when_json_missing(adapters):
+    """A stale pair id 404s on the stand-in: HTML answers and re-teaches the id, and JSON takes over again."""
+    url = MANIFEST[SYNTHETIC_PAGE]["url"]
+    adapter = adapters["investing"][0]
+    adapter.instruments[url] = ("1", {"unit": "", "scale": "", "decimals": 2})
+
+    result = crawler_service.fetch_investing_price(url, SYNTHETIC_PAGE)
+    assert result.value == 6012.25
+    assert adapter.counts == {"json": 0, "failed": 1}
+    assert adapter.instruments[url][0] == "8839"
+
+    assert crawler_service.fetch_investing_price(url, SYNTHETIC_PAGE) == result
+    assert adapter.counts == {"json": 1, "failed": 1}
+
+
+def test_failed_page_skips_json_until_retry(adapters):
+    """A page whose JSON failed and that taught nothing new goes straight to HTML."""
+    url = MANIFEST["google_finance_rut"]["url"]
+    adapter = adapters["google_finance"][0]
+    adapter.failed(url)
+    assert crawler_service.fetch_google_finance(url, "RUT").value == 2481.93
+    assert adapter.counts == {"json": 0, "failed": 1}
+
+
+def test_fetch_google_finance_json(benchmark, adapters):
+    url = MANIFEST["google_finance_rut"]["url"]
+    result = benchmark(crawler_service.fetch_google_finance, url, "RUT")
+    assert result.value == 2481.93
+    assert adapters["google_finance"][0].counts["failed"] == 0
+
+
+def test_fetch_investing_json(benchmark, adapters):
+    url = MANIFEST[SYNTHETIC_PAGE]["url"]
+    crawler_service.fetch_investing_price(url, SYNTHETIC_PAGE)
+    result = benchmark(crawler_service.fetch_investing_price, url, SYNTHETIC_PAGE)
+    assert result.value == 6012.25
+    assert adapters["investing"][0].counts["failed"] == 0
@@ -0,0 +1,191 @@
+"""
+alert_engine.AlertEngine: rule parsing, threshold / crossing / debounce
+semantics, evaluation limited to the changed keys' rules, webhook delivery to
+the stand-in server and SSE fan-out; the rule endpoints are admin-only and
+answer 409 on processes that don't evaluate. Evaluation cost per cache
+update is benchmarked with a realistic rule count.
+"""
+import asyncio
+import random
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from alert_engine import AlertEngine, SseSink, WebhookSink, compile_rule
+from finance_service import REALTIME_INSTRUMENTS
+from quotes import Quote
+
+
+class ListSink:
+    name = "list"
+
+    def __init__(self):
+        self.alerts = []
+
+    def deliver(self, alert):
+        self.alerts.append(alert)
+
+    def report(self):
+        return {"delivered": len(self.alerts)}
+
+
+@pytest.fixture
+def sink():
+    return ListSink()
+
+
+@pytest.fixture
+def engine(sink):
+    return AlertEngine([sink])
+
+
+def feed(engine, key, values, field="value", start=0.0, step=60.0):
+    """Evaluates one update per value; returns the values that fired."""
+    fired = []
+    for i, value in enumerate(values):
+        quote = Quote(**{"value": 1.0, "change": 0.0, "percent": 0.0, field: value})
+        fired += [a["value"] for a in engine.evaluate("rates", {key: quote}, now=start + i * step)]
+    return fired
+
+
+def test_compile_rule():
+    rule = compile_rule("  usd_krw  change%>1 ", "r1")
+    assert (rule.key, rule.field, rule.op, rule.threshold, rule.text) == ("usd_krw", "percent", ">", 1.0, "usd_krw change% > 1")
+    assert compile_rule("us_10_2_spread < -0.25", "r2").threshold == -0.25
+    assert compile_rule("us_10y crosses  above 4.5", "r3").op == "crosses above"
+    for bad in ("vix >", "vix ~ 30", "vix > thirty", "> 30", "vix > 30; drop"):
+        with pytest.raises(ValueError):
+            compile_rule(bad, "r")
+
+
+def test_threshold_fires_on_entering(engine, sink):
+    engine.add("us_10_2_spread < 0", sinks=("list",), debounce=0)
+    assert feed(engine, "us_10_2_spread", [0.2, -0.1, -0.2, 0.1, -0.05]) == [-0.1, -0.05]
+    assert [a["previous"] for a in sink.alerts] == [0.2, 0.1]
+
+
+def test_crossing_needs_a_previous_value(engine):
+    engine.add("vix crosses above 30", sinks=("list",), debounce=0)
+    engine.add("vix crosses 20", sinks=("list",), debounce=0)
+    # 31 first: nothing to cross from
+    assert feed(engine, "vix", [31, 29, 30, 25, 19, 21]) == [30, 19, 21]
+
+
+def test_change_percent_field(engine):
+    engine.add("usd_krw change% > 1", sinks=("list",), debounce=0)
+    assert feed(engine, "usd_krw", [0.4, 1.2, 1.5, 0.3, 1.1], field="percent") == [1.2, 1.1]
+
+
+def test_debounce_suppresses_flapping(engine):
+    engine.add("vix > 30", sinks=("list",), debounce=300)
+    # One update a minute flapping around 30: fires, then again only once the window passed
+    assert feed(engine, "vix", [31, 29, 31, 29, 31, 29, 31]) == [31, 31]
+    assert engine.report()["debounced"] == 2
+
+
+def test_only_changed_keys_are_evaluated(engine):
+    for i in range(50):
+        engine.add(f"vix > {20 + i}", sinks=("list",))
+    engine.add("dxy > 100", sinks=("list",))
+    engine.evaluate("rates", {"dxy": Quote(101.0, 0.1, 0.1), "us_10y": Quote(4.2, 0.0, 0.0)})
+    assert engine.report()["evaluated"] == 1
+    engine.evaluate("stocks", {"vix": Quote(25.0, 0.0, 0.0)})
+    assert engine.report()["evaluated"] == 51
+    # Non-quote values (history series, event summaries) are ignored
+    engine.evaluate("events", {"vix": {"points": []}})
+    assert engine.report()["evaluated"] == 51
+
+
+def test_add_remove_and_limits(sink):
+    engine = AlertEngine([sink], max_rules=2)
+    first = engine.add("vix > 30", sinks=("list",))
+    engine.add("vix < 12", sinks=("list",))
+    with pytest.raises(ValueError):
+        engine.add("dxy > 100", sinks=("list",))
+    with pytest.raises(ValueError):
+        engine.add("dxy > 100", sinks=("email",))
+    assert engine.remove(first.id) and not engine.remove(first.id)
+    assert [r["rule"] for r in engine.rules()] == ["vix < 12"]
+    assert engine.report()["keys"] == 1
+
+
+def test_webhook_delivery(upstream):
+    webhook = WebhookSink(f"{upstream}/__webhook", timeout=2)
+    engine = AlertEngine([webhook])
+    rule = engine.add("kr_10y crosses below 2.9", sinks=("webhook",), debounce=0)
+    feed(engine, "kr_10y", [3.0, 2.8, 3.1, 2.85])
+    assert webhook.flush(timeout=5)
+    received = [a for a in requests.get(f"{upstream}/__webhook", timeout=5).json() if a["rule_id"] == rule.id]
+    assert [a["value"] for a in received] == [2.8, 2.85]
+    assert webhook.report()["sent"] == 2
+
+
+def test_webhook_failures_are_counted(upstream):
+    webhook = WebhookSink(f"{upstream}/no.such.host/hook", timeout=2)
+    engine = AlertEngine([webhook])
+    engine.add("vix > 30", sinks=("webhook",))
+    feed(engine, "vix", [35])
+    assert webhook.flush(timeout=5)
+    assert webhook.report()["failed"] == 1
+
+
+def test_sse_stream():
+    sse = SseSink(max_queue=2, keepalive_sec=0.05)
+    engine = AlertEngine([sse])
+    engine.add("vix > 30", debounce=0)
+
+    async def client():
+        stream = sse.stream()
+        received = [await stream.__anext__()]
+        # Delivered from a scheduler-like thread while the client waits
+        await asyncio.to_thread(feed, engine, "vix", [29, 31])
+        received.append(await stream.__anext__())
+        received.append(await stream.__anext__())  # nothing pending: keepalive
+        await stream.aclose()
+        return received
+
+    received = asyncio.run(client())
+    assert received[0] == ": connected\n\n"
+    assert received[1].startswith("event: alert\ndata: ") and '"value": 31' in received[1]
+    assert received[2] == ": keepalive\n\n"
+    assert sse.report()["subscribers"] == 0
+
+
+def test_rule_endpoints_admin_and_role(app_main, monkeypatch):
+    monkeypatch.setattr(app_main, "ALERTS", AlertEngine([SseSink()]))
+    monkeypatch.setattr(app_main, "ADMIN_TOKEN", "secret")
+    client = TestClient(app_main.app)
+    admin = {"X-Admin-Token": "secret"}
+    body = {"rule": "vix > 30"}
+
+    assert client.post("/api/alerts/rules", json=body).status_code == 403
+    added = client.post("/api/alerts/rules", json=body, headers=admin)
+    assert added.status_code == 200
+    rule_id = added.json()["id"]
+    assert client.delete(f"/api/alerts/rules/{rule_id}").status_code == 403
+
+    # API workers serve the collector's snapshot and never evaluate rules
+    monkeypatch.setattr(app_main, "APP_ROLE", "api")
+    refused = client.post("/api/alerts/rules", json=body, headers=admin)
+    assert refused.status_code == 409 and refused.json()["role"] == "api"
+    assert client.delete(f"/api/alerts/rules/{rule_id}", headers=admin).status_code == 409
+    assert client.get("/api/alerts/stream").status_code == 409
+
+    monkeypatch.setattr(app_main, "APP_ROLE", "standalone")
+    assert client.delete(f"/api/alerts/rules/{rule_id}", headers=admin).json() == {"removed": rule_id}
+
+
+def test_bench_evaluate(benchmark, sink):
+    """One realtime update (3 changed quotes) against 200 rules spread over the realtime keys."""
+    engine = AlertEngine([sink], max_rules=200)
+    keys = list(REALTIME_INSTRUMENTS)
+    rng = random.Random(47)
+    for i in range(200):
+        op = rng.choice(["<", ">", "crosses"])
+        engine.add(f"{keys[i % len(keys)]} {op} {rng.uniform(90, 110):.2f}", sinks=("list",), debounce=0)
+    updates = [{key: Quote(rng.uniform(90, 110), 0.0, 0.0) for key in rng.sample(keys, 3)} for _ in range(1000)]
+    it = iter(updates * 1000)
+    benchmark(lambda: engine.evaluate("stocks", next(it)))
+    report = engine.report()
+    benchmark.extra_info["rules_per_update"] = round(report["evaluated"] / report["updates"], 1)
@@ -0,0 +1,40 @@
+"""
+main.changed_keys: only keys whose normalized value moved count as changed,
+so formatting noise (padding in scraped strings) doesn't bump versions or
+republish. Diffing a full stocks fetch against the cache is benchmarked.
+"""
+from quotes import Quote
+
+
+def test_normalized_strips_strings_recursively(app_main):
+    entry = {"price": " 2,500.00 ", "meta": {"name": "KOSPI\n", "rank": 1}, "raw": 2500.0}
+    assert app_main.normalized(entry) == {"price": "2,500.00", "meta": {"name": "KOSPI", "rank": 1}, "raw": 2500.0}
+    quote = Quote(2500.0, 1.5, 0.06)
+    assert app_main.normalized(quote) is quote
+
+
+def test_changed_keys(app_main, monkeypatch):
+    monkeypatch.setitem(app_main.CACHE, "stocks", {
+        "kospi": {"price": "2,500.00", "change": "+1.00"},
+        "vix": Quote(15.2, -0.3, -1.93),
+        "nasdaq": {"price": "18,000.00"},
+    })
+    new_data = {
+        "kospi": {"price": " 2,500.00", "change": "+1.00\n"},   # whitespace only
+        "vix": Quote(15.2, -0.3, -1.93),                         # equal model
+        "nasdaq": {"price": "18,010.00"},                        # moved
+        "sp500": {"price": "5,000.00"},                          # new key
+    }
+    assert app_main.changed_keys("stocks", new_data) == ["nasdaq", "sp500"]
+    assert app_main.changed_keys("stocks", {"vix": Quote(15.3, -0.2, -1.29)}) == ["vix"]
+    assert app_main.changed_keys("stocks", {}) == []
+
+
+def test_bench_changed_keys(benchmark, app_main, monkeypatch):
+    """200 keys, 10 of them changed, against a populated category."""
+    current = {f"s{i}": {"price": f"{i},000.00", "change": "+1.00", "name": f"Stock {i}"} for i in range(200)}
+    monkeypatch.setitem(app_main.CACHE, "stocks", current)
+    new_data = {key: dict(value, price=value["price"] + " ") for key, value in current.items()}
+    for i in range(10):
+        new_data[f"s{i}"]["change"] = "+2.00"
+    assert len(benchmark(app_main.changed_keys, "stocks", new_data)) == 10
@@ -0,0 +1,123 @@
+"""
+compression: Accept-Encoding negotiation, ETag revalidation (If-None-Match
+lists, weak tags, '*'), PayloadCache invalidation by category version, the
+index.html asset pipeline, and the static mount keeping runtime data and
+dotfiles private. Serving a cached payload is benchmarked.
+"""
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+import compression
+from compression import (IMMUTABLE, REVALIDATE, EncodedAsset, PayloadCache, PublicFiles, accepted_encodings,
+                         asset_response, build_index_assets, etag_matches)
+
+
+def make_request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/",
+                    "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+
+@pytest.fixture
+def asset():
+    return EncodedAsset(b'{"kospi": "2,500.00"}' * 100, "application/json")
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, GZIP;q=0.5") == {"gzip"}
+    assert accepted_encodings("gzip;q=1.2.3, identity;q=0.001") == {"identity"}
+    assert accepted_encodings(None) == set() and accepted_encodings("") == set()
+
+
+def test_asset_response_negotiates_and_revalidates(asset):
+    plain = asset_response(asset, make_request())
+    assert plain.body == asset.body and plain.headers["etag"] == asset.etag
+    assert plain.headers["vary"] == "Accept-Encoding" and "content-encoding" not in plain.headers
+
+    zipped = asset_response(asset, make_request(accept_encoding="gzip"))
+    assert zipped.headers["content-encoding"] == "gzip" and gzip.decompress(zipped.body) == asset.body
+    if compression.brotli is not None:
+        assert asset_response(asset, make_request(accept_encoding="gzip, br")).headers["content-encoding"] == "br"
+
+    for if_none_match in (asset.etag, f"W/{asset.etag}", f'"stale", {asset.etag}', '"a",W/"b", ' + asset.etag, "*"):
+        not_modified = asset_response(asset, make_request(if_none_match=if_none_match))
+        assert not_modified.status_code == 304 and not_modified.body == b"", if_none_match
+        assert not_modified.headers["etag"] == asset.etag
+    for if_none_match in ('"stale"', '"stale", W/"older"', asset.etag.strip('"'), ""):
+        assert asset_response(asset, make_request(if_none_match=if_none_match)).status_code == 200, if_none_match
+
+
+def test_etag_matches_needs_quoted_tags():
+    assert etag_matches('W/"abc" , "def"', '"def"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_payload_cache_rebuilds_on_version_change():
+    cache, calls = PayloadCache(), []
+
+    def encoder(data):
+        calls.append(data)
+        return str(data).encode()
+    first = cache.get("stocks", 1, {"v": 1}, encoder=encoder)
+    assert cache.get("stocks", 1, {"v": "ignored"}, encoder=encoder) is first
+    second = cache.get("stocks", 2, {"v": 2}, encoder=encoder)
+    assert second is not first and second.body == b"{'v': 2}" and second.etag != first.etag
+    # Categories and media types are cached separately
+    assert cache.get("rates", 2, {"v": 2}, encoder=encoder) is not second
+    assert cache.get("stocks", 2, {"v": 2}, encoder=encoder, media_type="application/octet-stream") is not second
+    assert len(calls) == 4
+
+
+def test_build_index_assets(tmp_path):
+    index = tmp_path / "index.html"
+    index.write_text("<html><head><style>body { color: red; }</style></head>"
+                     "<body><script>console.log('hi')</script></body></html>", encoding="utf-8")
+    assets = build_index_assets(str(index))
+    css = next(path for path in assets if path.endswith(".css"))
+    js = next(path for path in assets if path.endswith(".js"))
+    assert assets[css].body == b"body { color: red; }" and assets[css].cache_control == IMMUTABLE
+    assert assets[js].body == b"console.log('hi')" and assets[js].content_type.startswith("application/javascript")
+    page = assets["/"]
+    assert assets["/index.html"] is page and page.cache_control == REVALIDATE
+    html = page.body.decode()
+    assert f'<link rel="stylesheet" href="{css}">' in html and f'<script src="{js}"></script>' in html
+    assert "<style>" not in html and "console.log" not in html
+    # Content-hashed: an unchanged file builds the same URLs
+    assert set(build_index_assets(str(index))) == set(assets)
+
+
+@pytest.fixture
+def site(tmp_path):
+    for rel, body in {"index.html": "<h1>home</h1>", "docs/guide.html": "guide", ".env": "FRED_API_KEY=x",
+                      "data/shared_cache.db": "sqlite", "backend/data/cache.db": "sqlite"}.items():
+        path = tmp_path / rel
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_text(body)
+    app = FastAPI()
+    app.mount("/", PublicFiles(directory=str(tmp_path), html=True), name="static")
+    return TestClient(app)
+
+
+def test_static_mount_hides_data_and_dotfiles(site):
+    assert site.get("/").text == "<h1>home</h1>"
+    assert site.get("/docs/guide.html").status_code == 200
+    for path in ("/data/shared_cache.db", "/backend/data/cache.db", "/data/", "/.env", "/docs/../data/shared_cache.db"):
+        assert site.get(path).status_code == 404, path
+
+
+def test_bench_cached_payload(benchmark):
+    """A request for an unchanged category: cache hit plus variant selection."""
+    cache = PayloadCache()
+    data = {f"s{i}": {"value": f"{i},000.00", "change": "+1.00"} for i in range(200)}
+    request = make_request(accept_encoding="gzip, br")
+
+    def serve():
+        return asset_response(cache.get("stocks", 7, data), request)
+    response = benchmark(serve)
+    assert response.headers["content-encoding"] in ("gzip", "br")
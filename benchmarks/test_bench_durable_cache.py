@@ -0,0 +1,115 @@
+"""
+durable_cache.WriteBehindStore: values round-trip through SQLite with their
+model types, changes between flushes coalesce, the writer thread flushes on
+its own and a new store reloads everything; an unserializable value is
+dropped without holding back the rest of its batch. The update hot path (enqueue) is
+benchmarked against a synchronous commit per update.
+"""
+import sqlite3
+import time
+
+import pytest
+
+from durable_cache import WriteBehindStore
+from quotes import Observation, Quote
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WriteBehindStore(str(tmp_path / "cache.db"), flush_sec=60)
+    yield store
+    store.close()
+
+
+def test_round_trip_keeps_types(store):
+    quote = Quote(5123.5, -12.25, -0.24, timestamp="2026-03-02", url="https://example.com")
+    observation = Observation(3.1, 0.1, 3.3, unit="%", timestamp="2026-02-12", next_date="2026-03-12")
+    summary = {"dates": ["2026-01-14"], "actual": [3.1], "forecast": [None], "surprise": {"last": 0.2}}
+    store.enqueue("stocks", {"sp_futures": quote})
+    store.enqueue("economy", {"cpi": observation})
+    store.enqueue("events", {"CPI": summary})
+    assert store.flush() == 3
+    loaded = store.load()
+    assert loaded["stocks"]["sp_futures"] == quote
+    assert type(loaded["economy"]["cpi"]) is Observation and loaded["economy"]["cpi"] == observation
+    assert loaded["events"]["CPI"] == summary
+
+
+def test_changes_coalesce_between_flushes(store):
+    for i in range(100):
+        store.enqueue("stocks", {"vix": Quote(20.0 + i), "dxy": Quote(100.0)})
+    assert store.report()["pending"] == 2
+    assert store.flush() == 2
+    assert store.load()["stocks"]["vix"].value == 119.0
+    assert store.report()["rows"] == 2 and store.report()["enqueued"] == 200
+
+
+def test_writer_thread_flushes(tmp_path):
+    store = WriteBehindStore(str(tmp_path / "cache.db"), flush_sec=0.05, batch_max=1000)
+    store.enqueue("rates", {"us_10y": Quote(4.2, unit="%")})
+    assert wait_for(lambda: store.report()["flushes"] == 1)
+    # A full batch wakes the writer without waiting for the interval
+    store.flush_sec = 60
+    time.sleep(0.1)
+    store.batch_max = 10
+    store.enqueue("rates", {f"k{i}": Quote(float(i)) for i in range(10)})
+    assert wait_for(lambda: store.report()["rows"] == 11, timeout=2)
+    store.close()
+
+
+def test_reload_after_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = WriteBehindStore(path, flush_sec=60)
+    first.enqueue("exchange", {"usd_krw": Quote(1432.5, 3.5, 0.25)})
+    first.close()  # shutdown flushes what is pending
+    second = WriteBehindStore(path)
+    assert second.load() == {"exchange": {"usd_krw": Quote(1432.5, 3.5, 0.25)}}
+    second.close()
+
+
+def test_failed_flush_keeps_batch(store, monkeypatch):
+    store.enqueue("stocks", {"vix": Quote(30.0)})
+
+    def broken():
+        raise sqlite3.OperationalError("disk I/O error")
+    monkeypatch.setattr(store, "_conn", broken)
+    assert store.flush() == 0
+    store.enqueue("stocks", {"dxy": Quote(101.0)})
+    monkeypatch.undo()
+    assert store.flush() == 2 and store.report()["failed"] == 1
+
+
+def test_bad_value_is_dropped_alone(store, tmp_path):
+    store.enqueue("stocks", {"vix": Quote(30.0), "broken": {1, 2}, "opaque": object()})
+    store.enqueue("economy", {"cpi": {"actual": "3.1%"}})
+    assert store.flush() == 2
+    assert store.report()["dropped"] == 2 and store.report()["pending"] == 0
+    reloaded = WriteBehindStore(str(tmp_path / "cache.db")).load()
+    assert reloaded == {"stocks": {"vix": Quote(30.0)}, "economy": {"cpi": {"actual": "3.1%"}}}
+
+
+def test_bench_enqueue(benchmark, store):
+    """Hot path: one realtime update (3 changed quotes) handed to the write-behind queue."""
+    quotes = {"sp_futures": Quote(5000.0, 1.0, 0.02), "vix": Quote(18.5), "dxy": Quote(104.2)}
+    benchmark(store.enqueue, "stocks", quotes)
+
+
+def test_bench_synchronous_commit(benchmark, tmp_path):
+    """Baseline: the same update written and committed before returning."""
+    store = WriteBehindStore(str(tmp_path / "cache.db"), flush_sec=60)
+    quotes = {"sp_futures": Quote(5000.0, 1.0, 0.02), "vix": Quote(18.5), "dxy": Quote(104.2)}
+
+    def write_through():
+        store.enqueue("stocks", quotes)
+        store.flush()
+    benchmark(write_through)
+    store.close()
@@ -0,0 +1,178 @@
+"""
+history_backfill.HistoryBackfill: per-source concurrency caps, retries with
+jittered backoff (and which errors are final), incremental passes, and a
+real pass against the stand-in server. A pass over dozens of multi-year
+series is benchmarked, with its peak traced memory in extra_info.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+import requests
+
+from conftest import record_allocations
+import history_backfill
+from history_backfill import HistoryBackfill, parse_series, today
+from series_store import SERIES_DTYPE, SeriesStore
+
+
+def daily_records(start_day, end_day, seed=0):
+    days = np.arange(start_day, end_day + 1)
+    records = np.empty(len(days), dtype=SERIES_DTYPE)
+    records["day"] = days
+    records["value"] = 100 + np.random.default_rng(seed).standard_normal(len(days)).cumsum()
+    return records
+
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class FakeSource:
+    """Fetcher returning synthetic daily records, with a delay and scripted failures per ticker."""
+
+    def __init__(self, delay=0.0, failures=None):
+        self.delay = delay
+        self.failures = failures or {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker, start_day):
+        with self._lock:
+            self.calls.append((ticker, start_day))
+            failures = self.failures.get(ticker)
+            error = failures.pop(0) if failures else None
+        time.sleep(self.delay)
+        if error:
+            raise error
+        return daily_records(start_day, today(), seed=hash(ticker) % 1000)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SeriesStore(str(tmp_path))
+
+
+def test_per_source_caps_and_parallelism(store):
+    fred, yf = FakeSource(delay=0.1), FakeSource(delay=0.1)
+    backfill = HistoryBackfill(store, {"fred": fred, "yf": yf}, {"fred": 2, "yf": 4}, years=2)
+    tasks = [(f"f{i}", f"F{i}", "fred") for i in range(6)] + [(f"y{i}", f"Y{i}", "yf") for i in range(8)]
+    started = time.monotonic()
+    report = backfill.run(tasks)
+    elapsed = time.monotonic() - started
+    assert report["written"] == 14
+    assert report["max_in_flight"] == {"fred": 2, "yf": 4}
+    # fred: 3 waves, yf: 2 waves, side by side (sequentially this would take 1.4s)
+    assert elapsed < 0.6
+    assert len(store.open("f0")) == 2 * 365 + 1
+
+
+def test_retries_transient_errors_only(store):
+    fred = FakeSource(failures={
+        "FLAKY": [requests.ConnectionError("reset"), http_error(503)],
+        "GONE": [http_error(400)],
+        "DOWN": [http_error(502)] * 5,
+    })
+    backfill = HistoryBackfill(store, {"fred": fred}, {"fred": 2}, retries=2, backoff=0.01)
+    report = backfill.run([("flaky", "FLAKY", "fred"), ("gone", "GONE", "fred"), ("down", "DOWN", "fred"),
+                           ("other", "X", "investing")])
+    series = report["series"]
+    assert (series["flaky"]["status"], series["flaky"]["attempts"]) == ("written", 3)
+    assert (series["gone"]["status"], series["gone"]["attempts"]) == ("failed", 1)
+    assert (series["down"]["status"], series["down"]["attempts"]) == ("failed", 3)
+    assert series["other"]["status"] == "skipped"
+    assert report["retries"] == 4
+    assert store.ids() == ["flaky"]
+
+
+def test_backoff_is_jittered_and_honors_retry_after(store):
+    backfill = HistoryBackfill(store, {}, {}, backoff=1, backoff_max=30)
+    delays = [backfill.backoff_delay(3) for _ in range(200)]
+    assert 0 <= min(delays) < 2 and 6 < max(delays) <= 8
+    assert len(set(delays)) > 150
+    assert backfill.backoff_delay(0, http_error(429, {"Retry-After": "7"})) >= 7
+    assert backfill.backoff_delay(0, http_error(429, {"Retry-After": "600"})) <= 30
+
+
+class Upstream:
+    """One fixed daily series; a fetch returns its days from start_day on."""
+
+    def __init__(self, records):
+        self.records = records
+        self.calls = []
+
+    def __call__(self, ticker, start_day):
+        self.calls.append((ticker, start_day))
+        return self.records[self.records["day"] >= start_day].copy()
+
+
+def test_incremental_pass(store):
+    yf = Upstream(daily_records(today() - 400, today()))
+    backfill = HistoryBackfill(store, {"yf": yf}, {"yf": 1}, years=1, overlap=3)
+    store.write("dxy", yf.records[yf.records["day"] <= today() - 10])
+    report = backfill.run([("dxy", "DX-Y.NYB", "yf")])
+    # From three days before the last stored one, that day included
+    assert yf.calls == [("DX-Y.NYB", today() - 13)]
+    assert report["series"]["dxy"]["new"] == 10 and report["series"]["dxy"]["revised"] == 0
+    assert np.array_equal(store.open("dxy"), yf.records)
+    # The overlap is refetched every pass; unchanged, the file is left alone
+    mtime = os.stat(store._path("dxy")).st_mtime_ns
+    assert backfill.run([("dxy", "DX-Y.NYB", "yf")])["series"]["dxy"]["status"] == "current"
+    assert yf.calls[-1] == ("DX-Y.NYB", today() - 3)
+    assert os.stat(store._path("dxy")).st_mtime_ns == mtime
+
+
+def test_incremental_pass_replaces_unclosed_bar(store):
+    """Today's bar was stored intraday; the next pass overwrites it with the close."""
+    yf = Upstream(daily_records(today() - 30, today()))
+    intraday = yf.records.copy()
+    intraday["value"][-1] += 1.5
+    store.write("spx", intraday)
+    backfill = HistoryBackfill(store, {"yf": yf}, {"yf": 1}, overlap=0)
+    result = backfill.run([("spx", "^GSPC", "yf")])["series"]["spx"]
+    assert yf.calls == [("^GSPC", today())]
+    assert result["status"] == "written" and result["new"] == 0 and result["revised"] == 1
+    assert np.array_equal(store.open("spx"), yf.records)
+
+
+def test_parse_series():
+    assert parse_series(" fred:DGS5, yf:^GSPC ,") == [("DGS5", "DGS5", "fred"), ("^GSPC", "^GSPC", "yf")]
+    with pytest.raises(ValueError):
+        parse_series("DGS5")
+
+
+def test_pass_against_stand_in(store, upstream, monkeypatch):
+    monkeypatch.setenv("UPSTREAM_BASE_URL", upstream)
+    monkeypatch.setenv("FRED_API_KEY", "benchmark")
+    backfill = HistoryBackfill(store, concurrency={"fred": 2, "yf": 2}, retries=0)
+    report = backfill.run([("us10_chart", "DGS10", "fred"), ("krw_chart", "KRW=X", "yf"),
+                           ("tnx", "^TNX", "yf"), ("missing", "NOPE", "yf")])
+    assert report["series"]["missing"]["status"] == "failed"
+    for series_id in ("us10_chart", "krw_chart", "tnx"):
+        assert report["series"][series_id]["status"] in ("written", "empty")
+    assert "us10_chart" in store.ids()
+
+
+def test_bench_backfill_pass(benchmark, tmp_path):
+    """48 series x 10 years of daily points (24 FRED, 24 Yahoo) into an empty store."""
+    tasks = [(f"f{i}", f"F{i}", "fred") for i in range(24)] + [(f"y{i}", f"Y{i}", "yf") for i in range(24)]
+    counter = iter(range(1000))
+
+    def run_pass():
+        store = SeriesStore(str(tmp_path / str(next(counter))))
+        backfill = HistoryBackfill(store, {"fred": FakeSource(0.005), "yf": FakeSource(0.005)}, {"fred": 2, "yf": 4})
+        return backfill.run(tasks)
+
+    report = benchmark.pedantic(run_pass, rounds=3)
+    assert report["written"] == 48
+    record_allocations(benchmark, run_pass)
+    peak = benchmark.extra_info["alloc_peak_bytes"]
+    series_bytes = (history_backfill.BACKFILL_YEARS * 365 + 1) * SERIES_DTYPE.itemsize
+    # About one series per worker in flight (plus a copy while trimming), not all 48
+    assert peak < 6 * 3 * series_bytes
+    benchmark.extra_info["all_series_kb"] = round(48 * series_bytes / 1024)
@@ -0,0 +1,137 @@
+"""
+history_cache.HistoryCache: round trip of the recorded chart series, the
+memory budget (LRU eviction to the memory-mapped series store and
+promotion back), reload from the store after a restart, an API worker's
+read-only view of the collector's files, and hot vs cold read cost. Memory per series is stored in extra_info.
+"""
+import tracemalloc
+from datetime import date, timedelta
+
+import pytest
+
+import finance_service
+from conftest import read_fixture_json
+from history_cache import HistoryCache, SERIES_DTYPE
+from series_store import SeriesStore
+
+YAHOO_TICKERS = ["ES=F", "^RUT", "^TNX", "KRW=X", "YM=F", "NQ=F", "DX-Y.NYB"]
+
+
+def daily_series(years, seed=1.0):
+    start = date(2000, 1, 3)
+    days = years * 365
+    return {
+        "dates": [(start + timedelta(days=i)).isoformat() for i in range(days)],
+        "values": [seed + i * 0.01 for i in range(days)],
+    }
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HistoryCache(max_bytes=64 * 1024, store=SeriesStore(str(tmp_path)))
+
+
+def test_round_trip_recorded_series(cache):
+    for ticker in YAHOO_TICKERS:
+        chart = read_fixture_json(f"yahoo_chart_{ticker}")["chart"]["result"][0]
+        series = finance_service.parse_yahoo_chart_series(chart)
+        cache[ticker] = series
+        assert cache[ticker] == series
+    assert set(cache) == set(YAHOO_TICKERS)
+
+
+def test_budget_evicts_lru_to_disk(cache):
+    # 10 years of daily points = 43.8 KB each: only one fits the 64 KB budget
+    for i in range(4):
+        cache[f"s{i}"] = daily_series(10, seed=i)
+    report = cache.report()
+    assert report["memory_bytes"] <= cache.max_bytes
+    assert [sid for sid, s in report["series"].items() if s["tier"] == "memory"] == ["s3"]
+    assert report["series"]["s0"]["file_bytes"] >= 3650 * SERIES_DTYPE.itemsize
+
+    # A cold read comes back intact and becomes the hot one
+    assert cache["s0"] == daily_series(10, seed=0)
+    report = cache.report()
+    assert report["series"]["s0"]["tier"] == "memory"
+    assert report["series"]["s3"]["tier"] == "disk"
+    assert report["disk_reads"] == 1
+
+    # Snapshots read cold series without promoting them
+    snapshot = cache.snapshot()
+    assert snapshot["s1"] == daily_series(10, seed=1)
+    assert cache.report()["series"]["s1"]["tier"] == "disk"
+
+
+def test_overwrite_and_delete_update_store(cache, tmp_path):
+    for i in range(3):
+        cache[f"s{i}"] = daily_series(10, seed=i)
+    cache["s0"] = daily_series(1)
+    del cache["s1"]
+    assert sorted(cache.store.ids()) == ["s0", "s2"]
+    assert cache.store.file_bytes("s0") == 365 * SERIES_DTYPE.itemsize
+    assert "s1" not in cache and len(cache) == 2
+    cache.replace({"s2": daily_series(1)})
+    assert list(cache) == ["s2"]
+    assert cache.store.ids() == ["s2"]
+
+
+def test_reloads_store_after_restart(cache, tmp_path):
+    for i in range(3):
+        cache[f"s{i}"] = daily_series(10, seed=i)
+    restarted = HistoryCache(max_bytes=64 * 1024, store=SeriesStore(str(tmp_path)))
+    assert sorted(restarted) == ["s0", "s1", "s2"]
+    assert restarted.report()["memory_bytes"] == 0
+    assert restarted["s1"] == daily_series(10, seed=1)
+
+
+def test_read_only_replace_leaves_collector_files(cache, tmp_path):
+    cache["s0"] = daily_series(1, seed=0)
+    cache["s1"] = daily_series(1, seed=1)
+    worker = HistoryCache(store=SeriesStore(str(tmp_path), read_only=True))
+    assert worker["s0"] == daily_series(1, seed=0)
+
+    # The collector rewrites s1 and drops s0, then publishes; the worker re-reads without writing
+    cache["s1"] = daily_series(2, seed=5)
+    del cache["s0"]
+    written = (tmp_path / "s1.bin").stat().st_ino
+    worker.replace({"s1": daily_series(2, seed=5)})
+    assert list(worker) == ["s1"] and worker["s1"] == daily_series(2, seed=5)
+    assert (tmp_path / "s1.bin").stat().st_ino == written
+    assert cache.store.ids() == ["s1"]
+
+    with pytest.raises(PermissionError):
+        worker["s2"] = daily_series(1)
+    with pytest.raises(PermissionError):
+        del worker["s1"]
+    assert cache.store.ids() == ["s1"]
+
+
+def test_memory_vs_lists(tmp_path):
+    """Ten years of daily points: records vs the {'dates', 'values'} lists they replace."""
+    series = daily_series(10)
+    tracemalloc.start()
+    as_lists = daily_series(10)
+    list_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    cache = HistoryCache(store=SeriesStore(str(tmp_path)))
+    cache["s"] = series
+    reported = cache.report()["series"]["s"]
+    assert reported["bytes"] * 6 < list_bytes
+    assert reported["list_bytes"] == pytest.approx(list_bytes, rel=0.3)
+    del as_lists
+
+
+@pytest.mark.parametrize("tier", ["memory", "disk"])
+def test_bench_read(benchmark, tmp_path, tier):
+    series = daily_series(10)
+    if tier == "memory":
+        cache = HistoryCache(store=SeriesStore(str(tmp_path)))
+        cache["s"] = series
+        read = lambda: cache["s"]  # noqa: E731
+    else:
+        cache = HistoryCache(max_bytes=0, store=SeriesStore(str(tmp_path)))
+        cache["s"] = series
+        cache["other"] = daily_series(1)  # pushes "s" out
+        read = lambda: cache.snapshot()["s"]  # noqa: E731
+    benchmark.extra_info["memory_bytes"] = cache.report()["memory_bytes"]
+    assert benchmark(read) == series
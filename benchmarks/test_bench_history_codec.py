@@ -0,0 +1,54 @@
+"""
+JSON vs columnar (history_codec) encoding of the /api/finance/history payload,
+built from the recorded Yahoo chart and FRED fixtures. Payload sizes (raw and
+gzip) are stored in the benchmark report's extra_info.
+"""
+import gzip
+import json
+
+import pytest
+
+import finance_service
+import history_codec
+from conftest import read_fixture_json
+
+YAHOO_TICKERS = ["ES=F", "^RUT", "^TNX", "KRW=X", "YM=F", "NQ=F", "DX-Y.NYB"]
+FRED_SERIES = ["UNRATE", "UMCSENT", "DGS10", "DGS2", "T10Y2Y"]
+
+
+@pytest.fixture(scope="module")
+def history():
+    data = {}
+    for ticker in YAHOO_TICKERS:
+        chart = read_fixture_json(f"yahoo_chart_{ticker}")["chart"]["result"][0]
+        data[ticker] = finance_service.parse_yahoo_chart_series(chart)
+    for series_id in FRED_SERIES:
+        data[series_id] = finance_service.parse_fred_history(read_fixture_json(f"fred_{series_id}_history"))
+    return data
+
+
+def encode_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@pytest.mark.parametrize("encoder", [encode_json, history_codec.encode_history], ids=["json", "columnar"])
+def test_encode_history(benchmark, history, encoder):
+    payload = benchmark(encoder, history)
+    benchmark.extra_info["payload_bytes"] = len(payload)
+    benchmark.extra_info["gzip_bytes"] = len(gzip.compress(payload, mtime=0))
+
+
+@pytest.mark.parametrize("encoder, decoder", [
+    (encode_json, json.loads),
+    (history_codec.encode_history, history_codec.decode_history),
+], ids=["json", "columnar"])
+def test_decode_history(benchmark, history, encoder, decoder):
+    decoded = benchmark(decoder, encoder(history))
+    assert decoded.keys() == history.keys()
+    for cid, series in history.items():
+        assert decoded[cid]["dates"] == series["dates"]
+        assert decoded[cid]["values"] == pytest.approx(series["values"], rel=1e-6)
+
+
+def test_columnar_is_smaller(history):
+    assert len(history_codec.encode_history(history)) * 3 < len(encode_json(history))
@@ -0,0 +1,199 @@
+"""
+job_executor.PriorityExecutor under a real BackgroundScheduler: realtime jobs
+start on time while daily and history work fills the pool, budgets cancel at
+checkpoints (and cap request timeouts), even through a crawler fetcher's
+`except Exception` fallback, and a job that ignores cancellation
+loses its worker. Realtime start latency under load is benchmarked.
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
+
+import crawler_service
+from conftest import MANIFEST
+from crawler_transport import CrawlerTransport
+from job_executor import JobCancelled, PriorityExecutor, budget_timeout, checkpoint
+
+
+def classify(job_id):
+    return job_id.split(":")[0]
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(**kwargs):
+        executor = PriorityExecutor(classify, **kwargs)
+        scheduler = BackgroundScheduler(executors={"default": executor})
+        scheduler.start()
+        schedulers.append(scheduler)
+        return scheduler, executor
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown(wait=False)
+
+
+def run_now(scheduler, job_id, func, *args):
+    scheduler.add_job(func, id=job_id, args=args, next_run_time=datetime.now())
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_realtime_runs_while_pool_is_busy(make_scheduler):
+    scheduler, executor = make_scheduler(workers=3, reserved=1)
+    release = threading.Event()
+    started = {}
+
+    def slow(name):
+        started[name] = time.monotonic()
+        release.wait(5)
+
+    for i in range(4):
+        run_now(scheduler, f"daily:{i}", slow, f"daily{i}")
+    run_now(scheduler, "history:0", slow, "history0")
+    assert wait_for(lambda: len(started) == 2)
+    time.sleep(0.1)
+    # Two non-realtime jobs hold the unreserved workers; the rest queue
+    assert len(started) == 2
+    assert executor.report()["classes"]["daily"]["queued"] + executor.report()["classes"]["history"]["queued"] == 3
+
+    queued_at = time.monotonic()
+    run_now(scheduler, "realtime:stocks", slow, "realtime")
+    assert wait_for(lambda: "realtime" in started, timeout=1)
+    assert started["realtime"] - queued_at < 0.5
+    release.set()
+    assert wait_for(lambda: len(started) == 6)
+
+
+def test_history_goes_before_daily(make_scheduler):
+    scheduler, executor = make_scheduler(workers=2, reserved=1)
+    release = threading.Event()
+    order = []
+
+    def job(name):
+        order.append(name)
+        release.wait(5)
+
+    run_now(scheduler, "daily:first", job, "daily-first")
+    assert wait_for(lambda: order == ["daily-first"])
+    run_now(scheduler, "daily:second", job, "daily-second")
+    run_now(scheduler, "history:chart", job, "history")
+    time.sleep(0.05)
+    release.set()
+    assert wait_for(lambda: len(order) == 3)
+    assert order == ["daily-first", "history", "daily-second"]
+    assert executor.report()["classes"]["daily"]["max_queued"] == 1
+
+
+def test_budget_cancels_at_checkpoint(make_scheduler):
+    scheduler, executor = make_scheduler(budgets={"daily": 0.2})
+    outcome = {}
+
+    def crawl():
+        timeouts = [budget_timeout(10)]
+        try:
+            while True:
+                checkpoint()
+                time.sleep(0.02)
+        except JobCancelled as e:
+            outcome["error"] = str(e)
+        outcome["timeouts"] = timeouts
+
+    run_now(scheduler, "daily:crawl", crawl)
+    assert wait_for(lambda: executor.report()["classes"]["daily"]["cancelled"] == 1)
+    assert "daily:crawl exceeded its 0.2s budget" == outcome["error"]
+    assert outcome["timeouts"] == [1.0]  # capped to the budget, but never under MIN_REQUEST_TIMEOUT_SEC
+    assert budget_timeout(10) == 10 and budget_timeout((3, 10)) == (3, 10)  # outside jobs
+
+
+def test_transport_stops_cancelled_job(make_scheduler, upstream, upstream_url):
+    scheduler, executor = make_scheduler(budgets={"history": 0.3})
+    transport = CrawlerTransport(rate_per_min=0)
+    url = upstream_url("yahoo_chart_^TNX")
+    outcome = {"requests": 0}
+
+    def history():
+        try:
+            while True:
+                transport.get(url, timeout=10)
+                outcome["requests"] += 1
+                time.sleep(0.05)
+        except JobCancelled:
+            outcome["cancelled"] = True
+
+    run_now(scheduler, "history:tnx", history)
+    assert wait_for(lambda: executor.report()["classes"]["history"]["cancelled"] == 1)
+    assert outcome["cancelled"] and outcome["requests"] >= 2
+    assert transport.get(url, timeout=10).status_code == 200  # outside jobs: untouched
+
+
+def test_cancellation_passes_through_crawler_fetch(make_scheduler, upstream, monkeypatch):
+    monkeypatch.setenv("UPSTREAM_BASE_URL", upstream)
+    scheduler, executor = make_scheduler(budgets={"daily": 0.3})
+    url = MANIFEST["investing_quote_us_2y"]["url"]
+    outcome = {"fetched": 0}
+
+    def daily():
+        # Same shape as the daily crawl jobs: fetch after fetch, each behind `except Exception`
+        try:
+            while True:
+                crawler_service.fetch_investing_price(url, "US 2Y")
+                outcome["fetched"] += 1
+                time.sleep(0.05)
+        except JobCancelled:
+            outcome["cancelled"] = True
+
+    run_now(scheduler, "daily:investing", daily)
+    assert wait_for(lambda: executor.report()["classes"]["daily"]["cancelled"] == 1)
+    assert outcome.get("cancelled") and outcome["fetched"] >= 2
+    # Outside jobs the same fetch still works
+    assert crawler_service.fetch_investing_price(url, "US 2Y") is not None
+
+
+def test_ignored_cancellation_replaces_worker(make_scheduler):
+    scheduler, executor = make_scheduler(workers=2, reserved=1, budgets={"daily": 0.1}, grace=0.1)
+    release = threading.Event()
+    ran = []
+
+    run_now(scheduler, "daily:stuck", lambda: release.wait(5))
+    assert wait_for(lambda: executor.report()["classes"]["daily"]["abandoned"] == 1)
+    # The stuck run no longer holds the only unreserved worker
+    run_now(scheduler, "daily:next", lambda: ran.append("daily"))
+    assert wait_for(lambda: ran == ["daily"], timeout=2)
+    assert [r["job"] for r in executor.report()["running"]] == ["daily:stuck"]
+    # ...and still counts against max_instances until it really returns
+    assert executor._instances["daily:stuck"] == 1
+    release.set()
+    assert wait_for(lambda: not executor.report()["running"])
+    assert executor.report()["classes"]["daily"]["cancelled"] == 1
+    assert len(executor._threads) == executor.workers
+
+
+def test_bench_realtime_start_latency(benchmark, make_scheduler):
+    """Queue-to-start latency of a realtime job while every unreserved worker runs a slow daily job."""
+    scheduler, executor = make_scheduler(workers=3, reserved=1)
+    release = threading.Event()
+    for i in range(6):
+        run_now(scheduler, f"daily:{i}", release.wait, 10)
+    assert wait_for(lambda: executor.report()["classes"]["daily"]["running"] == 2)
+
+    def realtime_round_trip():
+        done = threading.Event()
+        run_now(scheduler, "realtime:stocks", done.set)
+        assert done.wait(2)
+        assert wait_for(lambda: executor.report()["classes"]["realtime"]["running"] == 0)
+
+    benchmark.pedantic(realtime_round_trip, rounds=20)
+    benchmark.extra_info["max_wait_ms"] = executor.report()["classes"]["realtime"]["max_wait_ms"]
+    release.set()
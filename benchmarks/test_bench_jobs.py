@@ -0,0 +1,129 @@
+"""
+End-to-end fetch + parse benchmarks against the local stand-in server.
+Measures the same code paths the scheduler jobs run, minus the public internet.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import crawler_service
+import finance_service
+import source_adapters
+from fetch_cache import FETCH_CACHE
+from conftest import MANIFEST, read_fixture_json, record_allocations
+from upstream_server import local_url
+
+
+@pytest.mark.parametrize("name", ["investing_quote_sp_futures", "investing_quote_us_2y"])
+def test_fetch_investing_price(benchmark, upstream_url, monkeypatch, name):
+    """HTML scrape path; the JSON adapters are measured in test_bench_adapters.py."""
+    monkeypatch.setattr(source_adapters, "QUOTE_JSON_ADAPTERS", False)
+    url = upstream_url(name)
+    result = benchmark(crawler_service.fetch_investing_price, url, name)
+    assert result and result.value is not None
+
+
+def test_fetch_investing_calendar(benchmark, upstream_url):
+    url = upstream_url("investing_calendar_168")
+    result = benchmark(crawler_service.fetch_investing_calendar_actual, url, 168, "FedRate")
+    assert result and result.value is not None
+
+
+def test_fetch_indexergo(benchmark, upstream_url):
+    result = benchmark(crawler_service.fetch_indexergo_data, upstream_url("indexergo_high_yield"))
+    assert result and result.value is not None
+
+
+def test_fetch_enara(benchmark, upstream_url, monkeypatch):
+    monkeypatch.setenv("ENARA_FOREIGN_BOND_URL", upstream_url("enara_1086"))
+    result = benchmark(crawler_service.fetch_enara_foreign_holding)
+    assert result and result.value is not None
+
+
+def test_fetch_ny_fed_sofr(benchmark, upstream, monkeypatch):
+    monkeypatch.setattr(crawler_service, "NY_FED_SOFR_URL", local_url(upstream, crawler_service.NY_FED_SOFR_URL))
+    result = benchmark(crawler_service.fetch_ny_fed_sofr)
+    assert result and result.value is not None
+
+
+def test_fetch_fred_latest(benchmark, upstream, monkeypatch):
+    monkeypatch.setattr(finance_service, "FRED_OBSERVATIONS_URL", local_url(upstream, finance_service.FRED_OBSERVATIONS_URL))
+    monkeypatch.setattr(finance_service, "FRED_API_KEY", "benchmark")
+    result = benchmark(finance_service.get_fred_data, "DFF", "percent")
+    assert result and result.value is not None
+
+
+def test_fetch_investing_calendar_bulk(benchmark, upstream, monkeypatch):
+    """One listing request for all eight tracked events (vs. eight test_fetch_investing_calendar)."""
+    monkeypatch.setattr(crawler_service, "INVESTING_CALENDAR_DATA_URL", local_url(upstream, crawler_service.INVESTING_CALENDAR_DATA_URL))
+    event_ids = [event_id for event_id, _, _, _ in finance_service.CALENDAR_EVENTS.values()]
+    result = benchmark(crawler_service.fetch_investing_calendar_bulk, event_ids)
+    assert set(result) == set(event_ids)
+
+
+def test_daily_economy_job(benchmark, upstream, monkeypatch):
+    """Full get_daily_economy() cycle: one calendar listing + IndexerGo."""
+    for env, name in [
+        ("INVESTING_CCI_URL", "investing_calendar_48"),
+        ("INVESTING_UNEMPLOYMENT_URL", "investing_calendar_300"),
+        ("INVESTING_NFP_URL", "investing_calendar_227"),
+        ("INVESTING_PMI_URL", "investing_calendar_173"),
+        ("INDEXERGO_HIGH_YIELD_URL", "indexergo_high_yield"),
+    ]:
+        monkeypatch.setenv(env, local_url(upstream, MANIFEST[name]["url"]))
+    monkeypatch.setattr(crawler_service, "INVESTING_CALENDAR_DATA_URL", local_url(upstream, crawler_service.INVESTING_CALENDAR_DATA_URL))
+    # Every round is a fresh cycle
+    monkeypatch.setattr(finance_service, "CALENDAR_BATCH_TTL_SEC", 0)
+    monkeypatch.setattr(finance_service, "SHARED_DAILY_MAX_AGE_SEC", 0)
+
+    record_allocations(benchmark, finance_service.get_daily_economy)
+    result = benchmark.pedantic(finance_service.get_daily_economy, rounds=10, iterations=1)
+    assert set(result) == {"cci", "unemployment", "non_farm", "pmi", "high_yield"}
+
+
+def served(upstream, host):
+    return requests.get(f"{upstream}/__stats").json()["hosts"].get(host, {}).get("served", 0)
+
+
+def test_daily_jobs_share_high_yield(upstream, monkeypatch):
+    """get_daily_stocks and get_daily_economy run on the same cron: one IndexerGo request between them."""
+    monkeypatch.setenv("INDEXERGO_HIGH_YIELD_URL", local_url(upstream, MANIFEST["indexergo_high_yield"]["url"]))
+    monkeypatch.setattr(crawler_service, "INVESTING_CALENDAR_DATA_URL", local_url(upstream, crawler_service.INVESTING_CALENDAR_DATA_URL))
+    FETCH_CACHE.clear()
+    before = served(upstream, "www.indexergo.com")
+    with ThreadPoolExecutor(2) as pool:
+        stocks, economy = pool.map(lambda job: job(), [finance_service.get_daily_stocks, finance_service.get_daily_economy])
+    assert served(upstream, "www.indexergo.com") - before == 1
+    assert stocks["high_yield"] is economy["high_yield"]
+
+
+def test_realtime_quote_reuses_fresh_chart_fetch(upstream, monkeypatch):
+    """A USD/KRW quote right after krw_chart reads the chart's daily Yahoo series; alone it fetches 5 days."""
+    monkeypatch.setenv("UPSTREAM_BASE_URL", upstream)
+    ranges = []
+    fetch_chart = finance_service.fetch_yahoo_chart
+    monkeypatch.setattr(finance_service, "fetch_yahoo_chart",
+                        lambda ticker, range_, interval: ranges.append(range_) or fetch_chart(ticker, range_, interval))
+    FETCH_CACHE.clear()
+    chart = finance_service.fetch_single_history("KRW=X", "yf")
+    quote = finance_service.get_ticker_data("KRW=X")
+    assert ranges == ["1y"]
+    assert quote.value == chart["values"][-1]
+
+    FETCH_CACHE.clear()
+    assert finance_service.get_ticker_data("KRW=X").value == quote.value
+    assert ranges == ["1y", "5d"]
+
+
+def test_realtime_spread_fetches_latest_observations(upstream, monkeypatch):
+    """The realtime 10-2 spread asks FRED for the latest observations, not the chart's 400 days."""
+    monkeypatch.setenv("UPSTREAM_BASE_URL", upstream)
+    monkeypatch.setenv("FRED_API_KEY", "benchmark")
+    FETCH_CACHE.clear()
+    latest = [o for o in read_fixture_json("fred_T10Y2Y_latest")["observations"] if o["value"] != "."]
+    spread = finance_service.get_fred_latest_two("T10Y2Y", "US10Y2Y")
+    assert spread.value == float(latest[0]["value"])
+    assert spread.change == pytest.approx(float(latest[0]["value"]) - float(latest[1]["value"]))
+    assert "fred_latest:T10Y2Y" in FETCH_CACHE.report()["entries"]
+    assert "fred:T10Y2Y" not in FETCH_CACHE.report()["entries"]
@@ -0,0 +1,61 @@
+"""
+leader_election.LeaderLease: leadership lapses locally at its deadline even
+without a renewal, a follower takes over an expired lease, and release()
+hands it over at once. A renewal is benchmarked.
+"""
+import time
+
+import pytest
+
+from leader_election import LeaderLease
+
+
+@pytest.fixture
+def lease_path(tmp_path):
+    return str(tmp_path / "shared.db")
+
+
+def test_leadership_expires_locally_without_renewal(lease_path):
+    lease = LeaderLease(lease_path, ttl=0.4, margin=0.2)
+    assert not lease.is_leader
+    assert lease.try_acquire() and lease.is_leader
+    time.sleep(0.1)
+    assert lease.is_leader
+    # Past ttl - margin: no longer leader, though the row hasn't expired for other replicas yet
+    time.sleep(0.15)
+    assert not lease.is_leader
+    assert lease.current_holder() == lease.holder
+    # Renewing restores it
+    assert lease.try_acquire() and lease.is_leader
+
+
+def test_follower_takes_over_expired_lease(lease_path):
+    leader = LeaderLease(lease_path, ttl=0.3, margin=0.1)
+    follower = LeaderLease(lease_path, ttl=0.3, margin=0.1)
+    assert leader.try_acquire()
+    assert not follower.try_acquire() and not follower.is_leader
+    time.sleep(0.35)
+    # The old leader stepped down on its own before the follower could take over
+    assert not leader.is_leader
+    assert follower.try_acquire() and follower.is_leader
+    assert follower.current_holder() == follower.holder
+    assert not leader.try_acquire() and not leader.is_leader
+
+
+def test_release_hands_over_immediately(lease_path):
+    leader = LeaderLease(lease_path, ttl=30)
+    follower = LeaderLease(lease_path, ttl=30)
+    assert leader.try_acquire()
+    assert not follower.try_acquire()
+    leader.release()
+    assert not leader.is_leader and leader.current_holder() is None
+    assert follower.try_acquire() and follower.is_leader
+    # Releasing a lease it doesn't hold leaves the holder alone
+    leader.release()
+    assert follower.current_holder() == follower.holder
+
+
+def test_bench_renew(benchmark, lease_path):
+    """One renewal by the current leader (BEGIN IMMEDIATE + upsert + commit)."""
+    lease = LeaderLease(lease_path, ttl=30)
+    assert benchmark(lease.try_acquire)
@@ -0,0 +1,125 @@
+"""
+market_hours: trading calendars (sessions wrapping midnight and the week,
+holidays by trade date, the holiday-list expiry warning) and the adaptive
+poller's per-instrument schedule. A poll decision over every realtime
+instrument is benchmarked.
+"""
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import finance_service
+from market_hours import CALENDARS, SUN, AdaptivePoller, TradingCalendar
+
+
+def ts(tz, text):
+    return datetime.fromisoformat(text).replace(tzinfo=ZoneInfo(tz)).timestamp()
+
+
+def ct(text):
+    return ts("America/Chicago", text)
+
+
+def et(text):
+    return ts("America/New_York", text)
+
+
+def test_globex_sessions_wrap_overnight_and_weekend():
+    globex = CALENDARS["cme_globex"]
+    assert not globex.is_open(ct("2025-06-14 12:00"))     # Saturday
+    assert not globex.is_open(ct("2025-06-15 16:30"))     # Sunday before the open
+    assert globex.is_open(ct("2025-06-15 17:30"))         # Sunday evening: Monday's session
+    assert globex.is_open(ct("2025-06-16 02:00"))         # past midnight, same session
+    assert not globex.is_open(ct("2025-06-16 16:30"))     # daily halt
+    assert globex.is_open(ct("2025-06-16 17:00"))         # Tuesday's session opens
+    assert not globex.is_open(ct("2025-06-20 16:00"))     # Friday close
+    fx = CALENDARS["fx"]
+    assert fx.is_open(et("2025-06-18 03:00")) and not fx.is_open(et("2025-06-21 12:00"))
+
+
+def test_holidays_close_the_session_of_their_trade_date():
+    us = CALENDARS["us_equity"]
+    assert us.is_open(et("2025-07-03 10:00")) and not us.is_open(et("2025-07-04 10:00"))
+    globex = CALENDARS["cme_globex"]
+    # Opens Thursday evening but trades for July 4th: closed
+    assert not globex.is_open(ct("2025-07-03 18:00"))
+    # Sunday evening before MLK day (Monday 2025-01-20) stays closed too
+    assert not globex.is_open(ct("2025-01-19 17:30"))
+    assert globex.is_open(ct("2025-01-20 17:30"))
+    krx = CALENDARS["krx"]
+    assert not krx.is_open(ts("Asia/Seoul", "2025-10-06 10:00"))
+    assert krx.is_open(ts("Asia/Seoul", "2025-10-10 10:00"))
+
+
+def test_warns_once_when_holidays_run_out(capsys):
+    calendar = TradingCalendar("test", "America/New_York", [(day, "09:30", day, "16:00") for day in range(5)],
+                               ["2025-12-25"])
+    assert calendar.holidays_until == 2025
+    calendar.is_open(et("2025-12-24 10:00"))
+    assert capsys.readouterr().out == ""
+    assert calendar.is_open(et("2027-01-04 10:00"))
+    calendar.is_open(et("2027-01-05 10:00"))
+    out = capsys.readouterr().out
+    assert out.count("no holidays listed after 2025") == 1
+    # Calendars without holidays (spot FX) never warn
+    assert TradingCalendar("fx", "America/New_York", [(SUN, "17:00", 4, "17:00")]).holidays_until is None
+
+
+def test_is_open_memo_is_consistent_across_threads():
+    us = TradingCalendar("us", "America/New_York", [(day, "09:30", day, "16:00") for day in range(5)])
+    open_ts, closed_ts = et("2025-06-18 10:00"), et("2025-06-18 10:01") + 8 * 3600
+    wrong = []
+
+    def hammer(ts_value, expected):
+        for i in range(2000):
+            if us.is_open(ts_value + i % 2) != expected:
+                wrong.append(ts_value)
+    threads = [threading.Thread(target=hammer, args=args) for args in [(open_ts, True), (closed_ts, False)] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wrong == []
+
+
+class Switch:
+    """Calendar stand-in opened and closed by the test."""
+
+    def __init__(self, open=True):
+        self.open = open
+
+    def is_open(self, ts):
+        return self.open
+
+
+def test_adaptive_poller_due():
+    us, kr = Switch(open=True), Switch(open=False)
+    poller = AdaptivePoller({"spx": ("stocks", "us"), "kospi": ("stocks", "kr"), "krw": ("exchange", "us")},
+                            {"stocks": 30, "exchange": 300}, closed_sec=3600, calendars={"us": us, "kr": kr})
+    t = 1_750_000_000
+    # First run fetches everything in the category, open or not
+    assert poller.due("stocks", t) == ["spx", "kospi"]
+    assert poller.due("stocks", t + 30) == ["spx"]
+    # A run a few ms early still counts (10% slack)
+    assert poller.due("stocks", t + 59.9) == ["spx"]
+    assert poller.due("stocks", t + 90) == ["spx"]
+    # The closed market comes back as soon as it opens, not at its next hourly poll
+    kr.open = True
+    assert poller.due("stocks", t + 120) == ["spx", "kospi"]
+    # Once closed, the run it was due on fetches it a last time, then it waits out closed_sec
+    us.open = False
+    assert poller.due("stocks", t + 150) == ["spx", "kospi"]
+    assert poller.due("stocks", t + 180) == ["kospi"]
+    assert "spx" not in poller.due("stocks", t + 150 + 1800)
+    assert "spx" in poller.due("stocks", t + 150 + 3600)
+    assert poller.due("exchange", t) == ["krw"]
+    assert poller.fetches["spx"] >= 5
+
+
+def test_bench_poll_decision(benchmark):
+    """One due() call for the stocks category over the real instrument table and calendars."""
+    instruments = {key: (cat, cal) for key, (cat, cal, _) in finance_service.REALTIME_INSTRUMENTS.items()}
+    poller = AdaptivePoller(instruments, {"stocks": 30, "rates": 300, "exchange": 300})
+    clock = iter(range(1_750_000_000, 1_750_000_000 + 30 * 10**7, 30))
+    benchmark(lambda: poller.due("stocks", next(clock)))
+    assert sum(poller.fetches.values()) > 0
@@ -0,0 +1,131 @@
+"""
+numeric_parser: known scraped formats, a seeded round-trip fuzz over random
+numbers rendered in every supported style, and parse throughput (cold and
+memoized).
+"""
+import random
+import string
+
+import pytest
+
+import numeric_parser
+from numeric_parser import ParsedNumber, parse_number
+from conftest import read_fixture
+
+CALENDAR_EVENTS = [48, 300, 227, 173, 168, 164, 473, 1889]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("6,012.25", ParsedNumber(6012.25, "", "", 2)),
+    ("3.482", ParsedNumber(3.482, "", "", 3)),
+    ("+0.21%", ParsedNumber(0.21, "", "%", 2)),
+    ("(+0.21%)", ParsedNumber(0.21, "", "%", 2)),
+    ("(1.5)", ParsedNumber(-1.5, "", "", 1)),
+    ("−0.021", ParsedNumber(-0.021, "", "", 3)),
+    ("64K", ParsedNumber(64000.0, "K", "", 0)),
+    ("850k", ParsedNumber(850000.0, "K", "", 0)),
+    ("1.2M", ParsedNumber(1200000.0, "M", "", 1)),
+    ("430.71B", ParsedNumber(430710000000.0, "B", "", 2)),
+    ("898.0조", ParsedNumber(898e12, "조", "", 1)),
+    ("1조 2,345억", ParsedNumber(1.2345e12, "조", "", 4)),
+    ("3,500만", ParsedNumber(3.5e7, "만", "", 0)),
+    ("1.234,56", ParsedNumber(1234.56, "", "", 2)),
+    ("3,5", ParsedNumber(3.5, "", "", 1)),
+    ("1\u00a0234,5", ParsedNumber(1234.5, "", "", 1)),
+    ("₩1,234원", ParsedNumber(1234.0, "", "", 0)),
+    ("0.25%p", ParsedNumber(0.25, "", "%p", 2)),
+])
+def test_known_formats(text, expected):
+    parsed = parse_number(text)
+    assert parsed is not None
+    assert parsed.value == pytest.approx(expected.value)
+    assert parsed[1:] == expected[1:]
+
+
+@pytest.mark.parametrize("text", ["", "-", "\xa0", "N/A", "abc", "nan", "inf", "1,2,3", "1.2.3", "1억 2조", "1 2", "%"])
+def test_rejects_non_numbers(text):
+    assert parse_number(text) is None
+    with pytest.raises(numeric_parser.NumberParseError):
+        numeric_parser.require_number(text)
+
+
+def test_nfp_magnitudes_compare_correctly():
+    assert parse_number("1.2M").value > parse_number("850K").value
+
+
+def render(rng, value, decimals):
+    """Renders value the way one of the upstream sites might."""
+    style = rng.choice(["us", "eu", "paren", "signed", "suffix", "korean", "percent"])
+    if style == "us":
+        return f"{value:,.{decimals}f}", value
+    if style == "eu":
+        text = f"{abs(value):,.{decimals}f}".replace(",", "\0").replace(".", ",").replace("\0", ".")
+        # "754.049" / "754,049" read as US (dot decimal, comma grouping); keep the fuzz unambiguous
+        if decimals == 0:
+            text += ",0"
+        elif decimals == 3 and "." not in text:
+            text += "0"
+        return ("-" if value < 0 else "") + text, value
+    if style == "paren":
+        return (f"({abs(value):,.{decimals}f})" if value < 0 else f"{value:,.{decimals}f}"), value
+    if style == "signed":
+        return f"{value:+,.{decimals}f}", value
+    if style == "suffix":
+        suffix, mult = rng.choice([("K", 1e3), ("M", 1e6), ("B", 1e9), ("T", 1e12)])
+        return f"{value:.{decimals}f}{suffix}", round(value, decimals) * mult
+    if style == "korean":
+        jo, eok = rng.randint(1, 999), rng.randint(0, 9999)
+        return f"{jo}조 {eok:,}억", jo * 1e12 + eok * 1e8
+    return f"{value:+.{decimals}f}%", value
+
+
+def test_round_trip_fuzz():
+    rng = random.Random(20251205)
+    for _ in range(5000):
+        decimals = rng.randint(0, 4)
+        value = round(rng.uniform(-1e7, 1e7) * 10 ** -rng.randint(0, 6), decimals)
+        text, expected = render(rng, value, decimals)
+        parsed = parse_number(text)
+        assert parsed is not None, text
+        assert parsed.value == pytest.approx(expected, rel=1e-9, abs=10 ** -decimals), text
+
+
+def test_garbage_fuzz_never_raises():
+    rng = random.Random(7)
+    alphabet = string.digits * 3 + ".,%()+-−KMBkb조억만 \u00a0$₩원"
+    for _ in range(20000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        result = parse_number(text)
+        assert result is None or isinstance(result.value, float)
+
+
+def scraped_values():
+    """Every Actual cell of the recorded calendar pages, as the crawler sees it."""
+    from bs4 import BeautifulSoup
+
+    texts = []
+    for event_id in CALENDAR_EVENTS:
+        soup = BeautifulSoup(read_fixture(f"investing_calendar_{event_id}"), "html.parser")
+        for row in soup.select(f"#eventHistoryTable{event_id} tbody tr"):
+            cols = row.find_all("td")
+            texts.extend(col.text.strip() for col in cols[2:5] if col.text.strip())
+    return texts + ["6,012.25", "+12.50", "(+0.21%)", "3.482", "-0.021", "898.0조", "1조 2,345억"]
+
+
+def parse_all(texts):
+    return [parse_number(t) for t in texts]
+
+
+def test_bench_parse_cold(benchmark):
+    texts = scraped_values()
+    result = benchmark.pedantic(
+        parse_all, args=(texts,), setup=parse_number.cache_clear, rounds=200,
+    )
+    assert all(r is not None for r in result)
+
+
+def test_bench_parse_memoized(benchmark):
+    texts = scraped_values()
+    parse_all(texts)
+    result = benchmark(parse_all, texts)
+    assert all(r is not None for r in result)
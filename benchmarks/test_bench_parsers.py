@@ -0,0 +1,164 @@
+"""
+Parser throughput and allocation benchmarks against recorded fixtures (no network).
+
+Run:  pytest benchmarks --benchmark-autosave
+Compare with a previous run:  pytest benchmarks --benchmark-compare
+"""
+import pandas as pd
+import pytest
+
+import crawler_service
+import finance_service
+from conftest import read_fixture, read_fixture_json, record_allocations
+from event_series import EventSeriesStore
+from history_cache import to_records
+from quotes import Release
+from series_store import SeriesStore
+
+CALENDAR_EVENTS = [48, 300, 227, 173, 168, 164, 473, 1889]
+
+
+@pytest.mark.parametrize("name", [
+    "investing_quote_sp_futures",
+    "investing_quote_us_2y",
+    "investing_quote_kr_10y",
+])
+def test_parse_investing_price(benchmark, name):
+    html = read_fixture(name)
+    record_allocations(benchmark, crawler_service.parse_investing_price, html, name)
+    result = benchmark(crawler_service.parse_investing_price, html, name)
+    assert result and result.value is not None
+
+
+@pytest.mark.parametrize("event_id", CALENDAR_EVENTS)
+def test_parse_investing_calendar(benchmark, event_id):
+    html = read_fixture(f"investing_calendar_{event_id}")
+    record_allocations(benchmark, crawler_service.parse_investing_calendar, html, event_id)
+    result = benchmark(crawler_service.parse_investing_calendar, html, event_id)
+    assert result and result.value is not None
+
+
+@pytest.mark.parametrize("event_id", CALENDAR_EVENTS)
+def test_parse_investing_calendar_history(benchmark, event_id):
+    """Every history row, oldest first; the latest actual agrees with parse_investing_calendar."""
+    html = read_fixture(f"investing_calendar_{event_id}")
+    record_allocations(benchmark, crawler_service.parse_investing_calendar_history, html, event_id)
+    result = benchmark(crawler_service.parse_investing_calendar_history, html, event_id)
+    released = [r for r in result if r.actual is not None]
+    assert len(released) > 2
+    assert [r.date for r in result] == sorted(r.date for r in result)
+    assert released[-1].actual == crawler_service.parse_investing_calendar(html, event_id).value
+
+
+def test_event_series_surprise():
+    store = EventSeriesStore()
+    releases = crawler_service.parse_investing_calendar_history(read_fixture("investing_calendar_227"), 227)
+    assert store.merge("non_farm", releases) == len(releases)
+    assert store.merge("non_farm", releases) == 0
+    chart = store.chart("non_farm")
+    assert chart["values"][-1] == 64000.0
+    surprise = store.surprise("non_farm")
+    latest = [r for r in releases if r.actual is not None][-1]
+    assert surprise["surprise"] == pytest.approx(latest.actual - latest.forecast)
+    assert surprise["count"] == len(chart["values"])
+    assert 0 <= surprise["beat_rate"] <= 100
+
+
+def test_event_series_survives_restart(tmp_path):
+    store = EventSeriesStore(store=SeriesStore(str(tmp_path)))
+    releases = crawler_service.parse_investing_calendar_history(read_fixture("investing_calendar_227"), 227)
+    store.merge("non_farm", releases)
+    store.merge("non_farm", [Release("2001-01-05", 268000.0)])
+    restarted = EventSeriesStore(store=SeriesStore(str(tmp_path)))
+    assert restarted.releases("non_farm") == store.releases("non_farm")
+    assert restarted.releases("non_farm")[0] == Release("2001-01-05", 268000.0, None, None)
+    assert restarted.summary("non_farm") == store.summary("non_farm")
+    assert sorted(SeriesStore(str(tmp_path)).ids()) == ["non_farm.actual", "non_farm.forecast", "non_farm.previous"]
+
+
+def test_calendar_history_skips_unparsed_dates():
+    html = read_fixture("investing_calendar_227")
+    rows = crawler_service.parse_investing_calendar_history(html, 227)
+    # The newest row's date in another locale
+    tbody = html.index("<tbody", html.index('id="eventHistoryTable227"'))
+    cell = html.index("<td", tbody)
+    mangled = html[:cell] + "<td>Dec 05, 2025 (Nov)" + html[html.index("</td>", cell):]
+    parsed = crawler_service.parse_investing_calendar_history(mangled, 227)
+    assert parsed == rows[:-1]
+    store = EventSeriesStore()
+    store.merge("non_farm", parsed)
+    assert len(to_records(store.chart("non_farm"))) == len([r for r in parsed if r.actual is not None])
+
+
+def test_parse_investing_calendar_listing(benchmark):
+    """One listing parse yields every tracked event, matching the per-event pages."""
+    rows = read_fixture_json("investing_calendar_bulk")["data"]
+    record_allocations(benchmark, crawler_service.parse_investing_calendar_listing, rows, CALENDAR_EVENTS)
+    result = benchmark(crawler_service.parse_investing_calendar_listing, rows, CALENDAR_EVENTS)
+    assert set(result) == set(CALENDAR_EVENTS)
+    for event_id in CALENDAR_EVENTS:
+        page = crawler_service.parse_investing_calendar(read_fixture(f"investing_calendar_{event_id}"), event_id)
+        assert result[event_id] == page, event_id
+
+
+def test_parse_indexergo(benchmark):
+    html = read_fixture("indexergo_high_yield")
+    record_allocations(benchmark, crawler_service.parse_indexergo, html)
+    result = benchmark(crawler_service.parse_indexergo, html)
+    assert result and result.value is not None
+
+
+def test_parse_enara(benchmark):
+    html = read_fixture("enara_1086")
+    record_allocations(benchmark, crawler_service.parse_enara_foreign_holding, html)
+    result = benchmark(crawler_service.parse_enara_foreign_holding, html)
+    assert result and result.value is not None
+
+
+def test_parse_google_finance(benchmark):
+    html = read_fixture("google_finance_rut")
+    record_allocations(benchmark, crawler_service.parse_google_finance, html)
+    result = benchmark(crawler_service.parse_google_finance, html)
+    assert result and result.value is not None
+
+
+def test_parse_ny_fed_sofr(benchmark):
+    # parse_ny_fed_sofr sorts in place, so hand each round a fresh payload
+    payload = read_fixture_json("nyfed_sofr")
+    record_allocations(benchmark, crawler_service.parse_ny_fed_sofr, payload)
+    result = benchmark.pedantic(
+        crawler_service.parse_ny_fed_sofr,
+        setup=lambda: ((read_fixture_json("nyfed_sofr"),), {}),
+        rounds=200,
+    )
+    assert result and result.value is not None
+
+
+@pytest.mark.parametrize("name, parser", [
+    ("fred_T10Y2Y_latest", finance_service.parse_fred_latest),
+    ("fred_DFF_latest", finance_service.parse_fred_latest),
+    ("fred_UNRATE_history", finance_service.parse_fred_history),
+])
+def test_parse_fred(benchmark, name, parser):
+    payload = read_fixture_json(name)
+    record_allocations(benchmark, parser, payload)
+    result = benchmark(parser, payload)
+    assert result
+
+
+def yahoo_chart_frame(payload):
+    """Builds the DataFrame yfinance's history() returns from a recorded chart payload."""
+    chart = payload["chart"]["result"][0]
+    quote = chart["indicators"]["quote"][0]
+    index = pd.to_datetime(chart["timestamp"], unit="s", utc=True).tz_convert(chart["meta"]["exchangeTimezoneName"])
+    return pd.DataFrame({
+        "Open": quote["open"], "High": quote["high"], "Low": quote["low"],
+        "Close": quote["close"], "Volume": quote["volume"],
+    }, index=index)
+
+
+def test_yfinance_history_to_series(benchmark):
+    hist = yahoo_chart_frame(read_fixture_json("yahoo_chart_ES=F"))
+    record_allocations(benchmark, finance_service.history_frame_to_series, hist)
+    result = benchmark(finance_service.history_frame_to_series, hist)
+    assert len(result["dates"]) == len(hist)
@@ -0,0 +1,161 @@
+"""
+profiler: sampled stacks of live executor jobs come back in collapsed
+(flamegraph) format rooted at the job id, and per-job cProfile capture
+follows its toggle; the admin endpoints answer 409 on API workers, which
+run no jobs. The cost of one sampling round over busy workers is
+benchmarked.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from apscheduler.schedulers.background import BackgroundScheduler
+from fastapi.testclient import TestClient
+
+from job_executor import PriorityExecutor
+from profiler import JobProfiles, collapse, format_collapsed, sample_round, sample_stacks
+
+COLLAPSED_LINE = re.compile(r"^[^;\n]+(;[^;\n]+)* \d+$")
+
+
+def spin(stop):
+    """Busy loop until stop is set (the frame the sampler should see)."""
+    total = 0
+    while not stop.is_set():
+        total += sum(range(200))
+    return total
+
+
+def idle(stop):
+    stop.wait(5)
+
+
+@pytest.fixture
+def scheduler():
+    profiles = JobProfiles(top=20)
+    executor = PriorityExecutor(lambda job_id: "daily", workers=3, reserved=1, profiles=profiles)
+    scheduler = BackgroundScheduler(executors={"default": executor})
+    scheduler.start()
+    yield scheduler, executor, profiles
+    scheduler.shutdown(wait=False)
+
+
+def run_now(scheduler, job_id, func, *args):
+    scheduler.add_job(func, id=job_id, args=args, next_run_time=datetime.now())
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_samples_running_jobs_by_job_id(scheduler):
+    scheduler, executor, _ = scheduler
+    stop = threading.Event()
+    run_now(scheduler, "daily_spin", spin, stop)
+    run_now(scheduler, "daily_idle", idle, stop)
+    assert wait_for(lambda: len(executor.thread_jobs()) == 2)
+    stacks, rounds = sample_stacks(0.3, 0.005, roots=executor.thread_jobs)
+    stop.set()
+    assert rounds >= 20
+    text = format_collapsed(stacks)
+    assert all(COLLAPSED_LINE.match(line) for line in text.splitlines())
+    by_root = {}
+    for stack, count in stacks.items():
+        by_root.setdefault(stack.split(";")[0], []).append((stack, count))
+    assert set(by_root) == {"daily_spin", "daily_idle"}
+    # Every round saw both jobs; the busy one's leaf is its own loop (or a builtin it calls)
+    assert sum(c for _, c in by_root["daily_spin"]) == rounds
+    assert all("spin (test_bench_profiler.py:" in stack for stack, _ in by_root["daily_spin"])
+    assert all("wait (threading.py:" in stack for stack, _ in by_root["daily_idle"])
+    # Idle workers aren't sampled
+    assert wait_for(lambda: not executor.thread_jobs())
+    assert sample_stacks(0.05, 0.005, roots=executor.thread_jobs)[0] == {}
+
+
+def test_all_threads_roots_by_thread_name():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin, args=(stop,), name="custom-spinner")
+    thread.start()
+    try:
+        stacks, _ = sample_stacks(0.1, 0.005)
+    finally:
+        stop.set()
+        thread.join()
+    assert any(stack.startswith("custom-spinner;") for stack in stacks)
+    assert not any(stack.startswith(threading.current_thread().name + ";sample_stacks") for stack in stacks)
+
+
+def test_collapse_is_outermost_first():
+    def inner():
+        import sys
+        return collapse(sys._getframe())
+
+    def outer():
+        return inner()
+    labels = outer()
+    assert labels[-1].startswith("inner (") and labels[-2].startswith("outer (")
+
+
+def test_job_profile_toggle(scheduler):
+    scheduler, executor, profiles = scheduler
+    done = []
+
+    def work(name):
+        sorted(range(50000), key=lambda x: -x)
+        done.append(name)
+
+    profiles.enable("daily_work")
+    run_now(scheduler, "daily_work", work, "first")
+    run_now(scheduler, "daily_other", work, "other")
+    assert wait_for(lambda: len(done) == 2)
+    assert wait_for(lambda: profiles.capture("daily_work") is not None)
+    capture = profiles.capture("daily_work")
+    assert "work" in capture["stats"] and "cumulative" in capture["stats"] and capture["calls"] > 0
+    assert profiles.capture("daily_other") is None
+    assert profiles.report()["enabled"] == ["daily_work"]
+
+    profiles.disable("daily_work")
+    run_now(scheduler, "daily_work", work, "second")
+    assert wait_for(lambda: len(done) == 3)
+    time.sleep(0.05)
+    assert profiles.capture("daily_work")["captured_at"] == capture["captured_at"]
+
+
+def test_endpoints_refuse_on_api_workers(app_main, monkeypatch):
+    monkeypatch.setattr(app_main, "ADMIN_TOKEN", "secret")
+    client = TestClient(app_main.app)
+    admin = {"X-Admin-Token": "secret"}
+    assert client.get("/api/admin/job-profiles", headers=admin).json() == {"enabled": [], "captures": {}}
+    assert client.get("/api/admin/profile?seconds=0.05", headers=admin).status_code == 200
+
+    monkeypatch.setattr(app_main, "APP_ROLE", "api")
+    assert client.get("/api/admin/job-profiles").status_code == 403
+    for method, path in [("GET", "/api/admin/profile?seconds=0.05"), ("GET", "/api/admin/job-profiles"),
+                         ("PUT", "/api/admin/job-profiles/realtime_stocks"),
+                         ("DELETE", "/api/admin/job-profiles/realtime_stocks"),
+                         ("GET", "/api/admin/job-profiles/realtime_stocks")]:
+        response = client.request(method, path, headers=admin)
+        assert response.status_code == 409 and response.json()["role"] == "api"
+
+
+def test_bench_sampling_round(benchmark, scheduler):
+    """One round: read and collapse the stacks of two busy job workers."""
+    scheduler, executor, _ = scheduler
+    stop = threading.Event()
+    run_now(scheduler, "daily_a", spin, stop)
+    run_now(scheduler, "daily_b", spin, stop)
+    assert wait_for(lambda: len(executor.thread_jobs()) == 2)
+    stacks = Counter()
+    try:
+        benchmark(sample_round, stacks, executor.thread_jobs)
+    finally:
+        stop.set()
+    assert {stack.split(";")[0] for stack in stacks} == {"daily_a", "daily_b"}
@@ -0,0 +1,217 @@
+"""
+quote_engine: many users' overlapping watchlists against the stand-in Yahoo
+spark endpoint (upstream batches per interval, not per user), plus lease
+refcounting and LRU+TTL eviction that spares live leases, per-client caps
+on leases and on-the-spot fetches, and the multi-process split (API workers
+lease through the shared store, only the publisher fetches).
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import finance_service
+from conftest import read_fixture_json, record_allocations
+from quote_engine import QuoteEngine, parse_symbols
+from quotes import Quote
+from shared_store import SharedStore
+from starlette.requests import Request
+
+WATCHLIST = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "005930.KS", "^GSPC", "BTC-USD"]
+
+
+def spark_requests(upstream):
+    return requests.get(f"{upstream}/__stats").json()["hosts"].get("query1.finance.yahoo.com", {}).get("served", 0)
+
+
+def test_parse_yahoo_spark(benchmark):
+    data = read_fixture_json("yahoo_spark_watchlist")
+    record_allocations(benchmark, finance_service.parse_yahoo_spark, data)
+    result = benchmark(finance_service.parse_yahoo_spark, data)
+    assert set(result) == set(WATCHLIST)
+    assert result["AAPL"].value == 254.49
+
+
+def test_parse_symbols():
+    assert parse_symbols("aapl, MSFT,,aapl,005930.ks,^gspc,krw=x") == (["AAPL", "MSFT", "005930.KS", "^GSPC", "KRW=X"], [])
+    assert parse_symbols("AAPL,<script>,A B") == (["AAPL"], ["<script>", "A B"])
+    assert len(parse_symbols(",".join(f"S{i}" for i in range(100)), limit=50)[0]) == 50
+
+
+def test_thousand_users_share_batches(upstream, monkeypatch):
+    """1000 users polling overlapping watchlists: one spark batch per interval once the symbols are known."""
+    monkeypatch.setenv("UPSTREAM_BASE_URL", upstream)
+    engine = QuoteEngine(finance_service.fetch_quotes_batch, refresh_sec=0.5, lease_sec=60, idle_ttl=60)
+    rng = random.Random(41)
+    watchlists = [rng.sample(WATCHLIST, rng.randint(2, 5)) for _ in range(1000)]
+
+    before = spark_requests(upstream)
+    with ThreadPoolExecutor(16) as pool:
+        results = list(pool.map(lambda i: engine.quotes(watchlists[i], f"user{i}"), range(1000)))
+    # First touches: at most one batch per symbol, however many users asked for it
+    assert spark_requests(upstream) - before <= len(WATCHLIST) + 1
+    assert all(isinstance(q, Quote) for result in results for q in result.values())
+    assert engine.refcount("AAPL") == sum("AAPL" in w for w in watchlists)
+
+    time.sleep(0.6)
+    before = spark_requests(upstream)
+    with ThreadPoolExecutor(16) as pool:
+        list(pool.map(lambda i: engine.quotes(watchlists[i], f"user{i}"), range(1000)))
+    deadline = time.monotonic() + 5
+    while engine.report()["refreshes"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.1)
+    assert spark_requests(upstream) - before == 1
+
+
+def fake_batch(calls):
+    def fetch(symbols):
+        calls.append(list(symbols))
+        return {s: Quote(100.0, 1.0, 1.0) for s in symbols}
+    return fetch
+
+
+def test_batches_split_by_size():
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=60, batch_size=3)
+    engine.quotes(WATCHLIST, "user")
+    assert [len(c) for c in calls] == [3, 3, 2]
+
+
+def test_lapsed_leases_and_idle_symbols_are_evicted():
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=0.05, lease_sec=0.1, idle_ttl=0.1)
+    engine.quotes(["AAPL", "MSFT"], "a")
+    engine.quotes(["MSFT"], "b")
+    assert (engine.refcount("AAPL"), engine.refcount("MSFT")) == (1, 2)
+
+    time.sleep(0.25)
+    assert engine.refcount("MSFT") == 0
+    engine.quotes(["NVDA"], "c")  # triggers the refresh that sweeps
+    deadline = time.monotonic() + 2
+    while engine.report()["evicted"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert engine.report()["symbols"] == 1
+    assert engine.report()["evicted"] == 2
+
+
+def test_lru_cap_drops_idle_first():
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=60, lease_sec=0.05, idle_ttl=60, max_symbols=3)
+    engine.quotes(["AAPL"], "a")
+    engine.quotes(["MSFT"], "b")
+    time.sleep(0.1)  # both leases lapse: idle, AAPL least recently used
+    engine.quotes(["MSFT"], "b")
+    engine.quotes(["NVDA"], "c")
+    engine.quotes(["TSLA"], "d")
+    assert engine.report()["symbols"] == 3
+    assert engine.quotes(["MSFT", "NVDA", "TSLA"], "e")["MSFT"] is not None
+    assert engine.refcount("AAPL") == 0 and engine.report()["evicted"] == 1
+
+
+def test_live_leases_are_never_evicted():
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=60, lease_sec=60, max_symbols=3)
+    engine.quotes(["AAPL", "MSFT"], "user")
+    # A client cycling tickers fills the table, then gets refused instead of evicting
+    engine.quotes(["R1"], "cycler")
+    assert engine.quotes(["R2", "R3"], "cycler") == {"R2": None, "R3": None}
+    assert engine.refcount("AAPL") == engine.refcount("MSFT") == 1
+    report = engine.report()
+    assert report["symbols"] == 3 and report["evicted"] == 0 and report["rejected"] == 2
+    assert ["R2"] not in calls and ["R3"] not in calls
+
+
+def test_client_lease_cap():
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=60, lease_sec=60, max_per_client=3)
+    engine.quotes(["A", "B"], "cycler")
+    assert engine.subscribe(["B", "C", "D", "E"], "cycler") == ["D", "E"]
+    # Renewing held leases always works; other clients are unaffected
+    assert engine.subscribe(["A", "B", "C"], "cycler") == []
+    assert engine.subscribe(["D", "E"], "user") == []
+
+
+def test_cold_fetches_per_client_are_capped():
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=60, lease_sec=60, batch_size=3, cold_per_client=3)
+    engine.refresh()  # nothing due until a minute from now
+    first = engine.quotes(["A", "B", "C", "D", "E"], "cycler")
+    assert calls == [["A", "B", "C"]]
+    assert first["D"] is None and engine.report()["deferred"] == 2
+    # Its allowance for this refresh window is spent; deferred symbols wait for the refresh
+    engine.quotes(["F"], "cycler")
+    assert calls == [["A", "B", "C"]]
+    engine.quotes(["G"], "user")
+    assert calls[-1] == ["G"]
+    engine.refresh()
+    assert sorted(calls[-1]) == ["D", "E", "F"]
+
+
+def test_subscribe_then_refresh_publishes_snapshot():
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=60, batch_size=3)
+    engine.subscribe(["AAPL", "MSFT"], "worker-client")
+    engine.subscribe(["MSFT", "NVDA", "TSLA"], "other")
+    assert calls == [] and engine.snapshot() == {}
+    assert engine.refresh()
+    assert [len(c) for c in calls] == [3, 1]
+    assert set(engine.snapshot()) == {"AAPL", "MSFT", "NVDA", "TSLA"}
+    # Fetched moments ago: the next refresh has nothing due yet
+    assert engine.refresh() and len(calls) == 2
+
+
+def quotes_request(client):
+    return Request({"type": "http", "method": "GET", "path": "/api/quotes", "client": ("10.0.0.9", 5000),
+                    "headers": [(b"x-client-id", client.encode())]})
+
+
+def test_api_workers_lease_through_store_and_publisher_fetches(app_main, tmp_path, monkeypatch):
+    worker_calls, publisher_calls = [], []
+    monkeypatch.setattr(app_main, "shared_store", SharedStore(str(tmp_path / "shared.db")))
+    monkeypatch.setattr(app_main, "SHARED_STORE_POLL_SEC", 0)
+    for name in ("STORE_VERSIONS", "SHARED_QUOTES", "_quote_leases"):
+        monkeypatch.setattr(app_main, name, {})
+
+    # API worker: records leases, answers from the published category, never fetches
+    monkeypatch.setattr(app_main, "APP_ROLE", "api")
+    monkeypatch.setattr(app_main, "QUOTE_ENGINE", QuoteEngine(fake_batch(worker_calls)))
+    first = app_main.api_quotes(quotes_request("alice"), "aapl,msft")
+    assert first["quotes"] == {"AAPL": None, "MSFT": None}
+    app_main.api_quotes(quotes_request("bob"), "MSFT")
+    assert app_main.shared_store.quote_subscriptions() == {"alice": ["AAPL", "MSFT"], "bob": ["MSFT"]}
+    # Polling again within half a lease doesn't rewrite it
+    writes = dict(app_main._quote_leases)
+    app_main.api_quotes(quotes_request("alice"), "AAPL,MSFT")
+    assert app_main._quote_leases == writes
+
+    # Publisher: one engine, one batch for everyone's symbols
+    monkeypatch.setattr(app_main, "APP_ROLE", "collector")
+    monkeypatch.setattr(app_main, "QUOTE_ENGINE", QuoteEngine(fake_batch(publisher_calls)))
+    app_main.update_realtime_quotes_job()
+    assert publisher_calls == [["AAPL", "MSFT"]]
+
+    monkeypatch.setattr(app_main, "APP_ROLE", "api")
+    second = app_main.api_quotes(quotes_request("alice"), "AAPL,MSFT")
+    assert second["quotes"]["AAPL"]["value"] == "100.00"
+    assert worker_calls == []
+
+
+@pytest.mark.parametrize("users", [100, 1000])
+def test_bench_quotes_warm(benchmark, users):
+    """Request cost once the table is warm (no upstream calls on the request path)."""
+    calls = []
+    engine = QuoteEngine(fake_batch(calls), refresh_sec=3600)
+    rng = random.Random(users)
+    watchlists = [rng.sample(WATCHLIST, 4) for _ in range(users)]
+    for i, watchlist in enumerate(watchlists):
+        engine.quotes(watchlist, f"user{i}")
+
+    def poll_all():
+        for i, watchlist in enumerate(watchlists):
+            engine.quotes(watchlist, f"user{i}")
+
+    benchmark(poll_all)
+    assert len(calls) <= len(WATCHLIST)
@@ -0,0 +1,118 @@
+"""
+series_store.SeriesStore: file round trip, zero-copy range slices, the
+streamed JSON / binary bodies, and memory while streaming decades of daily
+points. Range query and streaming cost are benchmarked per series length.
+"""
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from series_store import SERIES_DTYPE, SeriesStore, epoch_day, stream_binary, stream_json
+
+
+def daily_records(years, seed=1.0):
+    days = years * 365
+    records = np.empty(days, dtype=SERIES_DTYPE)
+    records["day"] = np.arange(epoch_day("1990-01-01"), epoch_day("1990-01-01") + days)
+    records["value"] = seed + np.arange(days) * 0.01
+    return records
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SeriesStore(str(tmp_path))
+
+
+def test_round_trip_and_sorting(store):
+    records = daily_records(2)
+    store.write("^TNX", records[::-1])  # written sorted whatever the input order
+    assert store.ids() == ["^TNX"]
+    assert np.array_equal(store.open("^TNX"), records)
+    assert store.file_bytes("^TNX") == len(records) * 12
+    store.delete("^TNX")
+    with pytest.raises(KeyError):
+        store.open("^TNX")
+
+
+def test_range_is_zero_copy_view(store):
+    store.write("s", daily_records(5))
+    mapped = store.open("s")
+    view = store.range("s", "1991-01-01", "1991-12-31")
+    assert len(view) == 365
+    assert view["day"][0] == epoch_day("1991-01-01") and view["day"][-1] == epoch_day("1991-12-31")
+    assert np.shares_memory(view, mapped)
+    assert len(store.range("s")) == len(mapped)
+    assert len(store.range("s", "2030-01-01")) == 0
+
+
+def test_rewrite_reopens_map(store):
+    store.write("s", daily_records(1))
+    old = store.open("s")
+    store.write("s", daily_records(2))
+    assert len(store.open("s")) == 730
+    assert len(old) == 365  # readers of the old map are unaffected
+
+
+def test_stream_json_matches_records(store):
+    records = daily_records(3)
+    store.write("DGS10", records)
+    view = store.range("DGS10", "1990-06-01")
+    body = json.loads(b"".join(stream_json("DGS10", view, chunk_points=100)))
+    assert body["id"] == "DGS10"
+    assert body["dates"][0] == "1990-06-01" and len(body["dates"]) == len(view)
+    assert body["values"] == view["value"].tolist()
+    assert json.loads(b"".join(stream_json("x", view[:0]))) == {"id": "x", "dates": [], "values": []}
+
+
+def test_stream_binary_is_raw_records(store):
+    store.write("s", daily_records(3))
+    view = store.range("s")
+    body = b"".join(stream_binary(view, chunk_points=1000))
+    assert len(body) == 12 * len(view)
+    assert np.array_equal(np.frombuffer(body, dtype=SERIES_DTYPE), view)
+
+
+def streaming_peak(store, years):
+    store.write("s", daily_records(years))
+    view = store.range("s")
+    tracemalloc.start()
+    total = sum(len(chunk) for chunk in stream_json("s", view))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return total, peak
+
+
+def test_streaming_memory_is_flat(store):
+    """Peak allocation while streaming is one chunk's worth, whether the series holds 20 or 50 years."""
+    total_20, peak_20 = streaming_peak(store, 20)
+    total_50, peak_50 = streaming_peak(store, 50)
+    assert total_50 > 2 * total_20
+    assert peak_50 < peak_20 * 1.2
+
+    # Building the whole body at once (lists, then one JSON string) grows with the series
+    view = store.range("s")
+    tracemalloc.start()
+    json.dumps({"id": "s", "dates": view["day"].astype("datetime64[D]").astype(str).tolist(),
+                "values": view["value"].tolist()})
+    whole_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak_50 * 3 < whole_peak
+
+
+@pytest.mark.parametrize("years", [1, 30])
+def test_bench_range_query(benchmark, store, years):
+    store.write("s", daily_records(years))
+    store.open("s")
+    view = benchmark(store.range, "s", "1990-03-01", "1990-03-31")
+    assert len(view) == 31
+
+
+@pytest.mark.parametrize("years", [1, 30])
+def test_bench_stream_json(benchmark, store, years):
+    store.write("s", daily_records(years))
+    view = store.range("s")
+    benchmark.extra_info["points"] = len(view)
+    body = benchmark(lambda: b"".join(stream_json("s", view)))
+    assert body.startswith(b'{"id":"s"')
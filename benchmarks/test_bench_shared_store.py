@@ -0,0 +1,61 @@
+"""
+shared_store.SharedStore: publish bumps a category's version, versions()
+reads no payloads, and load() round-trips what the collector published,
+also from another connection (an API worker's); watchlist leases lapse.
+Loading one category is benchmarked.
+"""
+import threading
+import time
+
+from quotes import Quote
+from shared_store import SharedStore
+
+
+def test_publish_versions_load(tmp_path):
+    store = SharedStore(str(tmp_path / "shared.db"))
+    assert store.versions() == {}
+    assert store.load("stocks") == (0, None)
+
+    store.publish("stocks", {"kospi": {"price": "2,500"}})
+    store.publish("rates", {"us10": 4.2})
+    store.publish("stocks", {"kospi": {"price": "2,510"}})
+    assert store.versions() == {"stocks": 2, "rates": 1}
+    assert store.load("stocks") == (2, {"kospi": {"price": "2,510"}})
+
+    # A worker's own connection sees the collector's commits
+    worker = SharedStore(str(tmp_path / "shared.db"))
+    assert worker.load("rates") == (1, {"us10": 4.2})
+
+
+def test_publish_formats_models_and_keeps_one_connection_per_thread(tmp_path):
+    store = SharedStore(str(tmp_path / "shared.db"))
+    store.publish("exchange", {"usd": Quote(1380.5, 2.5, 0.18)})
+    version, data = store.load("exchange")
+    assert version == 1 and data["usd"]["value"] == "1,380.50" and data["usd"]["raw_change"] == 2.5
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append((store.versions(), store._conn())))
+    thread.start()
+    thread.join()
+    assert seen[0][0] == {"exchange": 1} and seen[0][1] is not store._conn()
+
+
+def test_quote_subscriptions_lapse(tmp_path):
+    store = SharedStore(str(tmp_path / "shared.db"))
+    store.subscribe_quotes(["AAPL", "MSFT"], "alice", lease_sec=60)
+    store.subscribe_quotes(["NVDA"], "bob", lease_sec=0.1)
+    assert store.quote_subscriptions() == {"alice": ["AAPL", "MSFT"], "bob": ["NVDA"]}
+    time.sleep(0.15)
+    assert store.quote_subscriptions() == {"alice": ["AAPL", "MSFT"]}
+    # Renewing extends instead of duplicating
+    store.subscribe_quotes(["AAPL"], "alice", lease_sec=60)
+    assert store.quote_subscriptions() == {"alice": ["AAPL", "MSFT"]}
+
+
+def test_bench_load_category(benchmark, tmp_path):
+    """Load and decode a 200-symbol category snapshot."""
+    store = SharedStore(str(tmp_path / "shared.db"))
+    store.publish("stocks", {f"s{i}": {"price": f"{i},000.00", "change": "+1.00", "change_pct": "+0.10%"}
+                             for i in range(200)})
+    version, data = benchmark(store.load, "stocks")
+    assert version == 1 and len(data) == 200
@@ -0,0 +1,125 @@
+"""
+snapshot_log.SnapshotLog: point-in-time reads against a naive replay of the
+same change stream (keyframes, deltas, day boundaries), bounded reads per
+lookup, retention, and lookup cost on a full day of realtime changes.
+Bytes per logged block land in extra_info.
+"""
+import calendar
+import random
+import time
+
+import pytest
+
+from quotes import Quote
+from snapshot_log import SnapshotLog, parse_ts
+
+DAY0 = calendar.timegm(time.strptime("2026-03-02", "%Y-%m-%d"))
+KEYS = ["sp_futures", "nasdaq_futures", "dow_futures", "vix", "us10y", "krw"]
+
+
+def change_stream(n, seed=46, start=DAY0 + 3600, step=30):
+    """n realtime-like updates: (ts, category, {key: Quote}) with 1-3 changed keys each."""
+    rng = random.Random(seed)
+    prices = {key: 100.0 + i for i, key in enumerate(KEYS)}
+    for i in range(n):
+        category = rng.choice(["stocks", "stocks", "rates"])
+        changes = {}
+        for key in rng.sample(KEYS, rng.randint(1, 3)):
+            prices[key] = round(prices[key] * (1 + rng.uniform(-0.002, 0.002)), 2)
+            changes[key] = Quote(prices[key], 0.1, 0.1)
+        yield start + i * step, category, changes
+
+
+def write_stream(log, stream):
+    """Appends the stream and returns the expected wire state per (category, ts) after every update."""
+    state = {"stocks": {}, "rates": {}}
+    expected = []
+    for ts, category, changes in stream:
+        state[category].update(changes)
+        log.append(category, changes, lambda c=category: dict(state[c]), ts=ts)
+        expected.append((ts, category, {k: q.to_dict() for k, q in state[category].items()}))
+    return expected
+
+
+@pytest.fixture
+def log(tmp_path):
+    return SnapshotLog(str(tmp_path), keyframe_every=8, retention_days=0)
+
+
+def test_point_in_time_matches_replay(log):
+    # 30 s apart for 6000 updates: spans two UTC day boundaries
+    expected = write_stream(log, change_stream(6000))
+    assert len(log.days()) == 3
+    rng = random.Random(1)
+    for ts, category, state in rng.sample(expected, 200):
+        got, as_of = log.at(category, ts + rng.uniform(0, 29))
+        assert got == state
+        assert as_of <= ts + 29 and as_of >= ts - 30 * 50
+    # Between updates: the latest state before ts
+    ts, category, state = expected[100]
+    later = [e for e in expected[101:] if e[1] == category][0]
+    assert log.at(category, (ts + later[0]) / 2)[0] == state
+
+
+def test_lookup_reads_at_most_one_keyframe_run(log):
+    write_stream(log, change_stream(2000))
+    for ts in (DAY0 + 3600 + 500 * 30, DAY0 + 3600 + 1999 * 30):
+        before = log.counts["blocks_read"]
+        log.at("stocks", ts)
+        assert log.counts["blocks_read"] - before <= log.keyframe_every
+
+
+def test_before_first_and_other_categories(log):
+    write_stream(log, change_stream(10))
+    assert log.at("stocks", DAY0) == (None, None)
+    assert log.at("economy", DAY0 + 86400) == (None, None)
+
+
+def test_crosses_days_to_previous_segment(log):
+    state = {}
+    for ts, key in [(DAY0 + 100, "a"), (DAY0 + 200, "b"), (DAY0 + 86400 * 3 + 50, "c")]:
+        state[key] = ts
+        log.append("economy", {key: ts}, lambda: dict(state), ts=ts)
+    # A day without blocks (and the hours before the next one) fall back to the last segment
+    assert log.at("economy", DAY0 + 86400 * 2)[0] == {"a": DAY0 + 100, "b": DAY0 + 200}
+    assert log.at("economy", DAY0 + 86400 * 3)[0] == {"a": DAY0 + 100, "b": DAY0 + 200}
+    assert log.at("economy", DAY0 + 86400 * 3 + 60)[0]["c"] == DAY0 + 86400 * 3 + 50
+
+
+def test_retention_drops_old_segments(tmp_path):
+    log = SnapshotLog(str(tmp_path), retention_days=2)
+    for day in range(5):
+        log.append("rates", {"x": day}, lambda d=day: {"x": d}, ts=DAY0 + day * 86400)
+    assert log.days() == ["2026-03-04", "2026-03-05", "2026-03-06"]
+
+
+def test_parse_ts():
+    assert parse_ts("1772409600") == 1772409600
+    assert parse_ts("1772409600000") == 1772409600
+    assert parse_ts("2026-03-02T09:31:00") == calendar.timegm(time.strptime("2026-03-02 00:31", "%Y-%m-%d %H:%M"))
+    assert parse_ts("2026-03-02T00:31:00Z") == parse_ts("2026-03-02T09:31:00")
+    with pytest.raises(ValueError):
+        parse_ts("yesterday")
+
+
+def test_bench_append(benchmark, log):
+    state = {"stocks": {}, "rates": {}}
+    items = iter(list(change_stream(2000)))
+
+    def append_next():
+        ts, category, changes = next(items)
+        state[category].update(changes)
+        log.append(category, changes, lambda: state[category], ts=ts)
+
+    benchmark.pedantic(append_next, rounds=2000)
+    benchmark.extra_info["bytes_per_block"] = round(log.counts["bytes"] / log.counts["blocks"], 1)
+
+
+@pytest.mark.parametrize("keyframe_every", [16, 64])
+def test_bench_at(benchmark, tmp_path, keyframe_every):
+    """Lookup at a random time of a full day (2880 realtime updates)."""
+    log = SnapshotLog(str(tmp_path), keyframe_every=keyframe_every, retention_days=0)
+    write_stream(log, change_stream(2880, start=DAY0))
+    rng = random.Random(2)
+    result = benchmark(lambda: log.at("stocks", DAY0 + rng.uniform(0, 86399)))
+    assert result[0]
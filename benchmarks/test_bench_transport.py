@@ -0,0 +1,114 @@
+"""
+crawler_transport against the stand-in: per-host pacing keeps a crawl under
+an upstream's rate limit, and a 403/429 starts a cooldown (at least the
+Retry-After) during which requests to that host fail with Throttled without
+being sent, while other hosts are unaffected.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+
+import pytest
+import requests
+
+import crawler_transport
+from conftest import MANIFEST
+from crawler_transport import CrawlerTransport, HostState, Throttled, _retry_after
+from upstream_server import FaultProfile, local_url, start_server
+
+UPSTREAM_RATE = 5  # requests/second per client IP
+
+
+@pytest.fixture
+def limited_upstream():
+    server, base_url = start_server(default_profile=FaultProfile(rate_limit=UPSTREAM_RATE))
+    yield base_url
+    server.shutdown()
+
+
+def upstream_counts(base_url, host="kr.investing.com"):
+    return requests.get(f"{base_url}/__stats", timeout=5).json()["hosts"].get(host, {})
+
+
+def crawl(transport, url, n, workers=4):
+    with ThreadPoolExecutor(workers) as pool:
+        return [r.status_code for r in pool.map(lambda _: transport.get(url, timeout=5), range(n))]
+
+
+def test_paces_under_upstream_limit(benchmark, limited_upstream):
+    url = local_url(limited_upstream, MANIFEST["investing_quote_sp_futures"]["url"])
+    # Paced just under the upstream's per-IP limit
+    transport = CrawlerTransport(rate_per_min=(UPSTREAM_RATE - 1) * 60, burst=UPSTREAM_RATE - 1)
+
+    statuses = benchmark.pedantic(crawl, args=(transport, url, 12), rounds=2, iterations=1)
+    assert statuses == [200] * 12
+    (host_report,) = transport.report().values()
+    assert host_report["blocked"] == host_report["refused"] == 0
+    assert upstream_counts(limited_upstream).get("throttled", 0) == 0
+
+
+def test_block_cools_the_host_down_without_sending(limited_upstream, upstream, monkeypatch):
+    monkeypatch.setattr(crawler_transport, "COOLDOWN_BASE_SEC", 0.2)
+    url = local_url(limited_upstream, MANIFEST["investing_quote_us_2y"]["url"])
+    transport = CrawlerTransport(rate_per_min=0)
+
+    # Unpaced: the stand-in's burst runs out and it answers 429 with Retry-After: 1
+    statuses = [transport.get(url, timeout=5).status_code for _ in range(UPSTREAM_RATE + 1)]
+    assert statuses[-1] == 429
+    sent = upstream_counts(limited_upstream)
+    with pytest.raises(Throttled) as refused:
+        transport.get(url, timeout=5)
+    # Retry-After outlasts the 0.2s backoff and wins
+    assert 0.5 < refused.value.retry_after <= 1
+    time.sleep(0.3)
+    with pytest.raises(Throttled):
+        transport.get(url, timeout=5)
+    assert upstream_counts(limited_upstream) == sent
+
+    # Another host is unaffected
+    assert transport.get(local_url(upstream, MANIFEST["investing_quote_us_2y"]["url"]), timeout=5).status_code == 200
+
+    time.sleep(0.8)
+    assert transport.get(url, timeout=5).status_code == 200
+    (host_report,) = [r for host, r in transport.report().items() if host in limited_upstream]
+    assert host_report["blocked"] == 1 and host_report["refused"] == 2
+
+
+def test_rate_budget_refuses_instead_of_overrunning(upstream):
+    url = local_url(upstream, MANIFEST["investing_quote_kr_10y"]["url"])
+    transport = CrawlerTransport(rate_per_min=60, burst=1, max_wait=0.2)
+    assert transport.get(url, timeout=5).status_code == 200
+    started = time.monotonic()
+    with pytest.raises(Throttled):
+        transport.get(url, timeout=5)
+    assert time.monotonic() - started < 0.1
+    (host_report,) = transport.report().values()
+    assert host_report["requests"] == 1 and host_report["refused"] == 1
+
+
+def test_cooldown_backs_off_exponentially():
+    state = HostState(rate_per_min=0, burst=1)
+    state.record(403, 0.1)
+    first = state.cooldown_until - time.monotonic()
+    state.record(429, 0.1)
+    second = state.cooldown_until - time.monotonic()
+    assert 29 < first <= 30 and 59 < second <= 60
+    state.record(200, 0.1)
+    assert state.strikes == 0
+    # A 503 backs off only when it says for how long
+    state = HostState(rate_per_min=0, burst=1)
+    state.record(503, 0.1)
+    assert state.cooldown_until == 0
+    state.record(503, 0.1, retry_after=120)
+    assert state.cooldown_until - time.monotonic() > 119
+
+
+def test_retry_after_formats():
+    response = requests.Response()
+    assert _retry_after(response) is None
+    response.headers["Retry-After"] = "12"
+    assert _retry_after(response) == 12
+    response.headers["Retry-After"] = formatdate(time.time() + 90, usegmt=True)
+    assert 85 < _retry_after(response) <= 90
+    response.headers["Retry-After"] = "soon"
+    assert _retry_after(response) is None
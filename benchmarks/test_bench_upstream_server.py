@@ -0,0 +1,24 @@
+"""
+upstream_server fault injection: --rate-limit applies per upstream host (and
+client), so one host's burst doesn't throttle the others.
+"""
+import requests
+
+from conftest import MANIFEST
+from upstream_server import FaultProfile, local_url, start_server
+
+
+def test_default_rate_limit_is_per_host():
+    server, base_url = start_server(default_profile=FaultProfile(rate_limit=2))
+    try:
+        investing = local_url(base_url, MANIFEST["investing_quote_sp_futures"]["url"])
+        yahoo = local_url(base_url, MANIFEST["yahoo_chart_^TNX"]["url"])
+        # Spend investing's burst, then some
+        assert [requests.get(investing, timeout=5).status_code for _ in range(4)][-1] == 429
+        # Yahoo still has its own full bucket
+        assert [requests.get(yahoo, timeout=5).status_code for _ in range(2)] == [200, 200]
+        hosts = requests.get(f"{base_url}/__stats", timeout=5).json()["hosts"]
+        assert hosts["kr.investing.com"]["throttled"] >= 1
+        assert hosts["query2.finance.yahoo.com"]["throttled"] == 0
+    finally:
+        server.shutdown()
@@ -0,0 +1,110 @@
+"""
+Yahoo daily closes: the chart JSON decoded straight into NumPy records
+(parse_yahoo_chart_records + monthly_closes) against the yfinance history()
+path it replaces (a pandas DataFrame, then history_frame_to_series +
+monthly_series). Latency is benchmarked in-process; peak RSS (VmHWM) is
+measured in fresh interpreters, since pandas is already loaded in this one.
+RSS figures land in extra_info.
+"""
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import finance_service
+from conftest import BENCH_DIR, read_fixture_json, record_allocations
+from test_bench_parsers import yahoo_chart_frame
+
+BACKEND_DIR = os.path.join(os.path.dirname(BENCH_DIR), "backend")
+
+
+def daily_chart_payload(years=1, ticker="ES=F"):
+    """A recorded chart payload stretched to `years` of weekday bars (14:30 UTC, a null bar now and then)."""
+    payload = copy.deepcopy(read_fixture_json(f"yahoo_chart_{ticker}"))
+    chart = payload["chart"]["result"][0]
+    start = 1_577_975_400  # 2020-01-02 14:30 UTC
+    timestamps = [start + day * 86400 for day in range(years * 365) if (day + 3) % 7 < 5]
+    closes = [None if i % 97 == 50 else 4000 + (i % 200) * 1.25 for i in range(len(timestamps))]
+    chart["timestamp"] = timestamps
+    chart["indicators"]["quote"][0] = {k: closes for k in ("open", "high", "low", "close", "volume")}
+    return payload
+
+
+def test_records_match_dataframe_path():
+    payload = daily_chart_payload()
+    chart = payload["chart"]["result"][0]
+    records = finance_service.parse_yahoo_chart_records(chart)
+    from_frame = finance_service.history_frame_to_series(yahoo_chart_frame(payload))
+    assert finance_service.parse_yahoo_chart_series(chart) == from_frame
+    assert finance_service.monthly_closes(records) == finance_service.monthly_series(from_frame, last=True)
+
+
+def test_all_null_chart():
+    chart = copy.deepcopy(read_fixture_json("yahoo_chart_^TNX"))["chart"]["result"][0]
+    chart["indicators"]["quote"][0]["close"] = [None] * len(chart["timestamp"])
+    assert finance_service.parse_yahoo_chart_records(chart) is None
+
+
+def chart_path(text):
+    records = finance_service.parse_yahoo_chart_records(json.loads(text)["chart"]["result"][0])
+    return finance_service.monthly_closes(records)
+
+
+def frame_path(text):
+    return finance_service.monthly_series(finance_service.history_frame_to_series(yahoo_chart_frame(json.loads(text))), last=True)
+
+
+@pytest.mark.parametrize("path", [chart_path, frame_path], ids=["chart_json", "dataframe"])
+def test_bench_daily_to_monthly(benchmark, path):
+    """Payload text -> monthly closes (the frame path skips yfinance's own request handling)."""
+    text = json.dumps(daily_chart_payload())
+    record_allocations(benchmark, path, text)
+    assert len(benchmark(path, text)["dates"]) == 12
+
+
+RSS_SCRIPT = """
+import json, sys, time
+sys.path[:0] = [{backend!r}, {bench!r}]
+text = {payload!r}
+start = time.perf_counter()
+import finance_service
+if {pandas!r}:
+    import yfinance  # what the history() path loads
+    from test_bench_parsers import yahoo_chart_frame
+    series = finance_service.history_frame_to_series(yahoo_chart_frame(json.loads(text)))
+    monthly = finance_service.monthly_series(series, last=True)
+else:
+    records = finance_service.parse_yahoo_chart_records(json.loads(text)["chart"]["result"][0])
+    monthly = finance_service.monthly_closes(records)
+print(json.dumps({{
+    # ru_maxrss survives fork/exec on Linux (it would report pytest's peak); VmHWM is this process's own
+    "rss_kb": int(next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM:"))),
+    "first_call_ms": round((time.perf_counter() - start) * 1000, 1),
+    "pandas_loaded": "pandas" in sys.modules,
+    "months": len(monthly["dates"]),
+}}))
+"""
+
+
+def measure_rss(pandas):
+    script = RSS_SCRIPT.format(backend=BACKEND_DIR, bench=BENCH_DIR, payload=json.dumps(daily_chart_payload()), pandas=pandas)
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="reads VmHWM from /proc (Linux)")
+def test_rss_chart_json_vs_dataframe(benchmark):
+    """Peak RSS of a process that imports finance_service and turns one year of daily bars into monthly closes."""
+    chart = measure_rss(pandas=False)
+    frame = measure_rss(pandas=True)
+    benchmark.extra_info.update({
+        "chart_json_rss_kb": chart["rss_kb"], "dataframe_rss_kb": frame["rss_kb"],
+        "chart_json_first_call_ms": chart["first_call_ms"], "dataframe_first_call_ms": frame["first_call_ms"],
+    })
+    benchmark.pedantic(lambda: None, rounds=1)
+    assert not chart["pandas_loaded"] and frame["pandas_loaded"]
+    assert chart["months"] == frame["months"] == 12
+    assert chart["rss_kb"] * 1.5 < frame["rss_kb"]
@@ -0,0 +1,288 @@
+"""
+Local stand-in for the upstream sites (Investing.com, IndexerGo, e-Nara,
+NY Fed, FRED, Yahoo, CNN) that serves the recorded responses in fixtures/.
+
+Live URLs map to local ones by moving the host into the path:
+    https://kr.investing.com/indices/us-spx-500-futures
+ -> http://127.0.0.1:<port>/kr.investing.com/indices/us-spx-500-futures
+
+Setting UPSTREAM_BASE_URL=http://127.0.0.1:<port> makes crawler_service and
+finance_service apply the same rewrite to every upstream request.
+
+Faults can be injected globally or per upstream host, to load test the
+pipeline under realistic conditions:
+    --latency-ms / --jitter-ms   added response delay
+    --error-rate / --error-status  fraction of requests answered with an error
+    --rate-limit                 requests/second per host and client before 429s
+    --config faults.json         per-host overrides, e.g.
+                                 {"kr.investing.com": {"latency_ms": 400, "rate_limit": 2}}
+
+POSTs (the Investing calendar listing XHR) are served like GETs.
+GET /__stats returns per-host counters, POST /__reset clears them.
+POST /__webhook records a JSON body (the alert webhook stand-in); GET
+/__webhook returns what was recorded since the last reset.
+
+Usage:
+    python benchmarks/upstream_server.py --port 9000 --latency-ms 150 --rate-limit 5
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+}
+
+
+def local_path(live_url):
+    """Returns the stand-in path ('/host/path?query') for a live upstream URL."""
+    parts = urlsplit(live_url)
+    path = f"/{parts.netloc}{parts.path}"
+    if parts.query:
+        path += f"?{parts.query}"
+    return path
+
+
+def local_url(base_url, live_url):
+    """Rewrites a live upstream URL to point at the stand-in server at base_url."""
+    return base_url.rstrip("/") + local_path(live_url)
+
+
+def load_manifest(fixture_dir=FIXTURE_DIR):
+    with open(os.path.join(fixture_dir, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FixtureRoutes:
+    """Resolves request paths to recorded fixture bodies (loaded once into memory)."""
+
+    def __init__(self, fixture_dir=FIXTURE_DIR):
+        manifest = load_manifest(fixture_dir)
+        files = {entry["name"]: entry["file"] for entry in manifest if "file" in entry}
+        self.routes = {}
+        for entry in manifest:
+            file = files[entry.get("same_as", entry["name"])]
+            route = urlsplit(local_path(entry["url"])).path
+            with open(os.path.join(fixture_dir, file), "rb") as f:
+                body = f.read()
+            content_type = CONTENT_TYPES.get(os.path.splitext(file)[1], "application/octet-stream")
+            self.routes.setdefault(route, []).append((entry.get("match", {}), body, content_type))
+
+    def resolve(self, raw_path):
+        parts = urlsplit(raw_path)
+        candidates = self.routes.get(unquote(parts.path))
+        if not candidates:
+            return None
+        query = dict(parse_qsl(parts.query))
+        for match, body, content_type in candidates:
+            if all(query.get(k) == v for k, v in match.items()):
+                return body, content_type
+        return None
+
+
+class FaultProfile:
+    """Latency, error and rate-limit settings for one upstream host."""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503, rate_limit=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit  # requests/second per client, 0 = unlimited
+        self._buckets = {}  # client -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def copy(self):
+        """Same settings, fresh token buckets (the default profile is copied per host)."""
+        return FaultProfile(self.latency_ms, self.jitter_ms, self.error_rate, self.error_status, self.rate_limit)
+
+    def delay(self):
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def should_fail(self):
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    def take_token(self, client=""):
+        """Token bucket per client IP (burst = one second of rate). False means answer 429."""
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.setdefault(client, [float(self.rate_limit), now])
+            bucket[0] = min(self.rate_limit, bucket[0] + (now - bucket[1]) * self.rate_limit)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+
+class UpstreamStats:
+    """Thread-safe per-host counters exposed on /__stats."""
+
+    FIELDS = ("served", "errors", "throttled", "missing")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.hosts = {}
+            self.webhooks = []
+
+    def record_webhook(self, payload):
+        with self._lock:
+            self.webhooks.append(payload)
+
+    def webhook_payloads(self):
+        with self._lock:
+            return list(self.webhooks)
+
+    def count(self, host, field):
+        with self._lock:
+            counters = self.hosts.setdefault(host, dict.fromkeys(self.FIELDS, 0))
+            counters[field] += 1
+
+    def snapshot(self):
+        with self._lock:
+            totals = dict.fromkeys(self.FIELDS, 0)
+            for counters in self.hosts.values():
+                for field in self.FIELDS:
+                    totals[field] += counters[field]
+            return {
+                "elapsed_sec": round(time.time() - self.started, 3),
+                "totals": totals,
+                "hosts": {host: dict(counters) for host, counters in self.hosts.items()},
+            }
+
+
+def make_handler(routes, default_profile=None, host_profiles=None, stats=None):
+    default_profile = default_profile or FaultProfile()
+    # Hosts without their own settings get a copy of the default on first sight, so limits stay per host
+    host_profiles = dict(host_profiles or {})
+    profiles_lock = threading.Lock()
+
+    def profile_for(host):
+        with profiles_lock:
+            profile = host_profiles.get(host)
+            if profile is None:
+                profile = host_profiles[host] = default_profile.copy()
+            return profile
+    stats = stats or UpstreamStats()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/__stats":
+                self._send(200, json.dumps(stats.snapshot()).encode(), "application/json")
+                return
+            if self.path == "/__webhook":
+                self._send(200, json.dumps(stats.webhook_payloads()).encode(), "application/json")
+                return
+            self._serve()
+
+        def _serve(self):
+            host = self.path.lstrip("/").split("/", 1)[0]
+            profile = profile_for(host)
+
+            # Rate limits apply per client IP, as upstream
+            if not profile.take_token(self.client_address[0]):
+                stats.count(host, "throttled")
+                self._send(429, b"Too Many Requests", "text/plain", {"Retry-After": "1"})
+                return
+
+            delay = profile.delay()
+            if delay:
+                time.sleep(delay)
+
+            if profile.should_fail():
+                stats.count(host, "errors")
+                self._send(profile.error_status, b"Injected upstream error", "text/plain")
+                return
+
+            hit = routes.resolve(self.path)
+            if hit is None:
+                stats.count(host, "missing")
+                self._send(404, b"No fixture recorded for this URL", "text/plain")
+                return
+            stats.count(host, "served")
+            self._send(200, *hit)
+
+        def do_POST(self):
+            # Drain the form body; POST fixtures (XHR endpoints) are matched on path and query only
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self.path == "/__webhook":
+                try:
+                    stats.record_webhook(json.loads(body))
+                except ValueError:
+                    self._send(400, b"Expected a JSON body", "text/plain")
+                    return
+                self._send(204, b"", "application/json")
+                return
+            if self.path == "/__reset":
+                stats.reset()
+                self._send(200, b"{}", "application/json")
+                return
+            self._serve()
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def load_host_profiles(path):
+    with open(path, encoding="utf-8") as f:
+        return {host: FaultProfile(**settings) for host, settings in json.load(f).items()}
+
+
+def start_server(host="127.0.0.1", port=0, fixture_dir=FIXTURE_DIR, default_profile=None, host_profiles=None):
+    """Starts the stand-in server on a daemon thread. Returns (server, base_url)."""
+    handler = make_handler(FixtureRoutes(fixture_dir), default_profile, host_profiles)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded upstream fixtures locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests/second per upstream host and client (0 = unlimited)")
+    parser.add_argument("--config", help="JSON file with per-host fault overrides")
+    args = parser.parse_args()
+
+    default_profile = FaultProfile(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.rate_limit)
+    host_profiles = load_host_profiles(args.config) if args.config else {}
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(FixtureRoutes(), default_profile, host_profiles))
+    server.daemon_threads = True
+    print(f"[Upstream] Serving fixtures on http://{args.host}:{args.port}")
+    print(f"[Upstream] Run the backend with UPSTREAM_BASE_URL=http://{args.host}:{args.port}")
+    server.serve_forever()